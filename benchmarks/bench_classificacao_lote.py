@@ -0,0 +1,90 @@
+"""Mede a vazão da classificação em lote contra a escalar
+
+Uso: python benchmarks/bench_classificacao_lote.py [linhas] [--semente N]
+
+Compara o tempo das versões (escalar, lote e lote com colunas
+categóricas) sobre `linhas` submissões aleatórias: respostas válidas do
+formulário, valores fora do domínio, vazios e condições físicas
+fracionárias ou fora de 1-5. A equivalência linha a linha entre lote e
+escalar é conferida em tests/test_classificacao_lote.py.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+# Adiciona o diretório src ao path
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(BASE_DIR, 'src'))
+
+from utils.classificacao_lote import mascara_restricoes_lote, classificar_lote
+from utils.questionario import OPCOES
+from utils.training_logic import calcular_classificacao, identificar_restricoes
+
+# Opções do formulário (utils.questionario)
+DOMINIOS = {
+    campo: list(OPCOES[campo])
+    for campo in ('inatividade', 'caminhada', 'saude', 'medicamentos', 'liberacao_medica', 'lesoes')
+}
+
+def gerar_texto(aleatorio, dominio):
+    """Quase sempre uma opção do formulário; às vezes vazio, lixo ou variação de caixa/espaços"""
+    sorteio = aleatorio.random()
+    if sorteio < 0.85:
+        return aleatorio.choice(dominio)
+    if sorteio < 0.90:
+        return ""
+    if sorteio < 0.95:
+        opcao = aleatorio.choice(dominio)
+        return aleatorio.choice([opcao.upper(), opcao + " ", " " + opcao, opcao[:-1]])
+    return "".join(aleatorio.choice("abcãé -/0123") for _ in range(aleatorio.randint(1, 12)))
+
+def gerar_condicao(aleatorio):
+    sorteio = aleatorio.random()
+    if sorteio < 0.85:
+        return aleatorio.randint(1, 5)
+    if sorteio < 0.95:
+        return aleatorio.randint(-2, 8)
+    return aleatorio.choice([2.5, 3.0, 3.5, 4.0, 0.5])
+
+def gerar_respostas(aleatorio):
+    respostas = {coluna: gerar_texto(aleatorio, dominio) for coluna, dominio in DOMINIOS.items()}
+    respostas['condicao_fisica'] = gerar_condicao(aleatorio)
+    return respostas
+
+def categorizar(df):
+    """Mesmo DataFrame com as colunas de texto categóricas (como lido com dtype='category')"""
+    return df.astype({coluna: 'category' for coluna in DOMINIOS})
+
+def medir(linhas, semente):
+    aleatorio = random.Random(semente)
+    registros = [gerar_respostas(aleatorio) for _ in range(linhas)]
+    df = pd.DataFrame(registros)
+
+    inicio = time.perf_counter()
+    for respostas in registros:
+        calcular_classificacao(respostas)
+        identificar_restricoes(respostas)
+    escalar = time.perf_counter() - inicio
+
+    print(f"{linhas} linhas")
+    print(f"  {'escalar':22} {escalar * 1000:9.1f} ms ({linhas / escalar:12.0f} linhas/s)")
+    for nome, dados in (("lote", df), ("lote (categórico)", categorizar(df))):
+        inicio = time.perf_counter()
+        classificar_lote(dados)
+        mascara_restricoes_lote(dados)
+        lote = time.perf_counter() - inicio
+        print(f"  {nome:22} {lote * 1000:9.1f} ms ({linhas / lote:12.0f} linhas/s)  {escalar / lote:.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description="Classificação em lote: vazão")
+    parser.add_argument("linhas", nargs="?", type=int, default=200000)
+    parser.add_argument("--semente", type=int, default=0)
+    args = parser.parse_args()
+    medir(args.linhas, args.semente)
+
+if __name__ == "__main__":
+    main()
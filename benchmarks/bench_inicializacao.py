@@ -0,0 +1,153 @@
+"""Mede a partida a frio do app: importação de src/app.py e tempo até a primeira tela (etapa 0)
+
+Uso:
+    python benchmarks/bench_inicializacao.py [--repeticoes 5]
+    python benchmarks/bench_inicializacao.py --gravar-base benchmarks/base_inicializacao.json
+    python benchmarks/bench_inicializacao.py --base benchmarks/base_inicializacao.json --tolerancia 1.5
+
+Cada medição roda num processo novo (python -X importtime), então nada
+vem de cache de módulos. Sai com código 1 se algum módulo pesado voltar a
+ser importado junto com o app ou se os tempos passarem da base
+multiplicada pela tolerância (ou de --limite-ms), para o CI barrar a
+regressão.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Diretório src, posto no path dos subprocessos
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(BASE_DIR, 'src')
+
+# Só devem carregar no primeiro uso (conexão com a planilha, geração de PDF)
+MODULOS_PESADOS = [
+    "pandas",
+    "numpy",
+    "gspread",
+    "google.oauth2",
+    "google.auth",
+    "requests",
+    "reportlab",
+    "pypdf",
+]
+
+CODIGO_IMPORTACAO = f"""
+import json, sys
+sys.path.insert(0, {SRC_DIR!r})
+import app
+print(json.dumps([m for m in {MODULOS_PESADOS!r} if m in sys.modules]))
+"""
+
+CODIGO_PRIMEIRA_TELA = f"""
+import sys, time
+sys.path.insert(0, {SRC_DIR!r})
+from streamlit.testing.v1 import AppTest
+inicio = time.perf_counter()
+at = AppTest.from_file({os.path.join(SRC_DIR, 'app.py')!r}, default_timeout=60).run()
+decorrido = time.perf_counter() - inicio
+if at.exception:
+    sys.exit(f"Erro na primeira tela: {{at.exception}}")
+print(decorrido * 1000)
+"""
+
+def ambiente(diretorio):
+    """Ambiente do subprocesso: armazenamento em memória e arquivos locais num diretório temporário"""
+    env = dict(os.environ)
+    env.setdefault('ROCKRUN_ARMAZENAMENTO', 'memoria')
+    env['ROCKRUN_SPOOL'] = os.path.join(diretorio, 'spool.db')
+    return env
+
+def medir_importacao(diretorio):
+    """(ms cumulativos de `import app`, [(ms, módulo)] importados direto pelo app, módulos pesados carregados)"""
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CODIGO_IMPORTACAO],
+        cwd=diretorio, env=ambiente(diretorio), capture_output=True, text=True, check=True
+    )
+
+    # Formato: "import time: self [us] | cumulative | imported package"; o recuo
+    # do nome indica a profundidade e os filhos aparecem antes do módulo pai
+    modulos = []
+    filhos = []
+    total_app = 0
+    for linha in resultado.stderr.splitlines():
+        if not linha.startswith("import time:") or "cumulative" in linha:
+            continue
+        _, cumulativo, nome = linha[len("import time:"):].split("|")
+        profundidade = (len(nome) - len(nome.lstrip()) - 1) // 2
+        ms = int(cumulativo) / 1000
+        if profundidade == 1:
+            filhos.append((ms, nome.strip()))
+        elif profundidade == 0:
+            if nome.strip() == "app":
+                total_app = ms
+                modulos = filhos
+            filhos = []
+
+    carregados = json.loads(resultado.stdout.strip().splitlines()[-1])
+    return total_app, sorted(modulos, reverse=True), carregados
+
+def medir_primeira_tela(diretorio):
+    resultado = subprocess.run(
+        [sys.executable, "-c", CODIGO_PRIMEIRA_TELA],
+        cwd=diretorio, env=ambiente(diretorio), capture_output=True, text=True
+    )
+    if resultado.returncode != 0:
+        raise RuntimeError(resultado.stderr.strip().splitlines()[-1])
+    return float(resultado.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede a partida a frio do app")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--base", help="JSON com os tempos de referência")
+    parser.add_argument("--gravar-base", help="Grava as medianas medidas neste JSON")
+    parser.add_argument("--tolerancia", type=float, default=1.5, help="Falha acima de base x tolerância")
+    parser.add_argument("--limite-ms", type=float, help="Falha se a primeira tela passar deste tempo")
+    args = parser.parse_args()
+
+    importacoes, telas = [], []
+    with tempfile.TemporaryDirectory() as diretorio:
+        for _ in range(args.repeticoes):
+            total_app, modulos, carregados = medir_importacao(diretorio)
+            importacoes.append(total_app)
+            telas.append(medir_primeira_tela(diretorio))
+
+    medianas = {
+        "importacao_ms": round(statistics.median(importacoes), 1),
+        "primeira_tela_ms": round(statistics.median(telas), 1),
+    }
+
+    print("Imports diretos de src/app.py (ms cumulativos, última medição):")
+    for ms, nome in modulos[:10]:
+        print(f"  {ms:8.1f}  {nome}")
+    print(f"Importação do app:  {medianas['importacao_ms']:.1f} ms (mediana de {args.repeticoes})")
+    print(f"Primeira tela:      {medianas['primeira_tela_ms']:.1f} ms (mediana de {args.repeticoes})")
+
+    falhas = []
+    if carregados:
+        falhas.append(f"módulos pesados carregados na importação: {', '.join(carregados)}")
+    if args.limite_ms is not None and medianas["primeira_tela_ms"] > args.limite_ms:
+        falhas.append(f"primeira tela em {medianas['primeira_tela_ms']:.1f} ms (limite {args.limite_ms:.1f} ms)")
+    if args.base:
+        with open(args.base, encoding='utf-8') as arquivo:
+            base = json.load(arquivo)
+        for chave, valor in medianas.items():
+            if chave in base and valor > base[chave] * args.tolerancia:
+                falhas.append(f"{chave} = {valor:.1f} ms, base {base[chave]:.1f} ms x {args.tolerancia}")
+
+    if args.gravar_base:
+        with open(args.gravar_base, 'w', encoding='utf-8') as arquivo:
+            json.dump(medianas, arquivo, indent=2)
+            arquivo.write("\n")
+
+    if falhas:
+        for falha in falhas:
+            print(f"REGRESSÃO: {falha}")
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
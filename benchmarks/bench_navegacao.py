@@ -0,0 +1,70 @@
+"""Execuções do script e CPU do servidor para preencher e enviar o questionário
+
+Uso: python benchmarks/bench_navegacao.py [repeticoes]
+
+Preenche o formulário com o AppTest do Streamlit nos dois modos, por
+etapas (um "Próximo" por etapa) e com ROCKRUN_ETAPAS_NO_NAVEGADOR=1 (abas
+no navegador, só o envio vai ao servidor), e conta quantas vezes o script
+foi executado e quanto tempo de CPU o processo gastou até o plano aparecer.
+O armazenamento usado é o "memoria" e o PDF segue o modo configurado.
+"""
+import os
+import sys
+import time
+
+# Adiciona o diretório src ao path
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(BASE_DIR, 'src'))
+os.environ.setdefault('ROCKRUN_ARMAZENAMENTO', 'memoria')
+
+from streamlit.runtime.scriptrunner.script_run_context import ScriptRunContext
+from streamlit.testing.v1 import AppTest
+
+APP = os.path.join(BASE_DIR, 'src', 'app.py')
+
+execucoes = 0
+_inicio_original = ScriptRunContext.on_script_start
+
+def _contar_execucao(self):
+    """Chamado a cada execução do script, inclusive as pedidas por st.rerun()"""
+    global execucoes
+    execucoes += 1
+    return _inicio_original(self)
+
+ScriptRunContext.on_script_start = _contar_execucao
+
+def clicar(app, rotulo):
+    for botao in app.button:
+        if rotulo in botao.label:
+            botao.click()
+            return app.run()
+    raise RuntimeError(f"botão '{rotulo}' não encontrado")
+
+def preencher(no_navegador):
+    """Abre a página, preenche e envia; retorna (execuções do script, segundos de CPU)"""
+    global execucoes
+    os.environ['ROCKRUN_ETAPAS_NO_NAVEGADOR'] = '1' if no_navegador else '0'
+    execucoes = 0
+    inicio = time.process_time()
+    app = AppTest.from_file(APP, default_timeout=120).run()
+    app.text_input[0].input("Ana")
+    app.text_input[1].input("11999998888")
+    if not no_navegador:
+        while not any("GERAR" in botao.label for botao in app.button):
+            app = clicar(app, "Próximo")
+    app = clicar(app, "GERAR")
+    if not any(metrica.label == "Perfil" for metrica in app.metric):
+        raise RuntimeError("o plano não apareceu")
+    return execucoes, time.process_time() - inicio
+
+def main():
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    preencher(False)  # aquece imports e caches
+
+    print(f"{'modo':16} {'execuções':>10} {'CPU (ms)':>10}")
+    for nome, no_navegador in (("por etapas", False), ("no navegador", True)):
+        medidas = [preencher(no_navegador) for _ in range(repeticoes)]
+        print(f"{nome:16} {medidas[0][0]:10} {min(cpu for _, cpu in medidas) * 1000:10.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Mede o tempo de CPU por PDF: layout completo (gerar_pdf) e carimbo sobre modelo (gerar_pdf_por_modelo)
+
+Uso: python benchmarks/bench_pdf.py [quantidade]
+"""
+import os
+import sys
+import time
+
+# Adiciona o diretório src ao path
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(BASE_DIR, 'src'))
+
+from utils.pdf_generator import gerar_pdf
+from utils.modelos_pdf import gerar_pdf_por_modelo
+from utils.training_logic import (
+    calcular_classificacao,
+    identificar_restricoes,
+    gerar_programa_treino,
+    adaptar_por_objetivo,
+    gerar_exercicios_complementares
+)
+
+RESPOSTAS = {
+    'nome': 'Maria',
+    'condicao_fisica': 3,
+    'inatividade': "Parei há menos de 6 meses",
+    'caminhada': "20-30 minutos",
+    'saude': "Hipertensão",
+    'medicamentos': "Não tomo medicamentos",
+    'liberacao_medica': "Sim, tenho liberação",
+    'lesoes': "Joelhos",
+    'objetivo': "Melhorar a saúde geral",
+}
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    classificacao = calcular_classificacao(RESPOSTAS)
+    restricoes = identificar_restricoes(RESPOSTAS)
+    programa = gerar_programa_treino(classificacao, RESPOSTAS)
+    adaptacao = adaptar_por_objetivo(programa, RESPOSTAS['objetivo'])
+    exercicios = gerar_exercicios_complementares()
+
+    argumentos = (RESPOSTAS, classificacao, programa, adaptacao, exercicios, restricoes)
+    for nome, funcao in (("gerar_pdf", gerar_pdf), ("gerar_pdf_por_modelo", gerar_pdf_por_modelo)):
+        # Primeira chamada fora da média (fontes, estilos, trechos fixos e modelo)
+        inicio = time.process_time()
+        funcao(*argumentos)
+        primeira = time.process_time() - inicio
+
+        inicio = time.process_time()
+        for _ in range(quantidade):
+            buffer, erro = funcao(*argumentos)
+            if erro:
+                sys.exit(erro)
+        media = (time.process_time() - inicio) / quantidade
+
+        print(f"{nome}: primeiro PDF {primeira * 1000:.1f} ms, "
+              f"média em {quantidade} PDFs {media * 1000:.2f} ms de CPU por PDF")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Mede o custo de montar um plano (classificação, restrições, programa, adaptação e exercícios)
+
+Uso: python benchmarks/bench_plano.py [repeticoes]
+"""
+import os
+import sys
+import timeit
+import tracemalloc
+
+# Adiciona o diretório src ao path
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(BASE_DIR, 'src'))
+
+from utils.training_logic import (
+    calcular_classificacao,
+    identificar_restricoes,
+    gerar_programa_treino,
+    adaptar_por_objetivo,
+    gerar_exercicios_complementares
+)
+
+RESPOSTAS = {
+    'nome': 'Maria',
+    'condicao_fisica': 3,
+    'inatividade': "Parei há menos de 6 meses",
+    'caminhada': "20-30 minutos",
+    'saude': "Hipertensão",
+    'medicamentos': "Não tomo medicamentos",
+    'liberacao_medica': "Sim, tenho liberação",
+    'lesoes': "Joelhos",
+    'objetivo': "Melhorar a saúde geral",
+}
+
+def montar_plano():
+    """Mesma sequência do envio do formulário em app.py"""
+    classificacao = calcular_classificacao(RESPOSTAS)
+    restricoes = identificar_restricoes(RESPOSTAS)
+    programa = gerar_programa_treino(classificacao, RESPOSTAS)
+    adaptacao = adaptar_por_objetivo(programa, RESPOSTAS['objetivo'])
+    exercicios = gerar_exercicios_complementares()
+    return classificacao, restricoes, programa, adaptacao, exercicios
+
+CASOS = [
+    ("gerar_programa_treino", lambda: gerar_programa_treino("INICIANTE", RESPOSTAS)),
+    ("adaptar_por_objetivo", lambda: adaptar_por_objetivo(None, RESPOSTAS['objetivo'])),
+    ("gerar_exercicios_complementares", gerar_exercicios_complementares),
+    ("plano completo", montar_plano),
+]
+
+def bytes_por_chamada(funcao, repeticoes=1000):
+    """Memória alocada por chamada, mantendo os resultados vivos como uma sessão faria"""
+    resultados = []
+    tracemalloc.start()
+    antes = tracemalloc.take_snapshot()
+    for _ in range(repeticoes):
+        resultados.append(funcao())
+    depois = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    alocado = sum(d.size_diff for d in depois.compare_to(antes, 'filename'))
+    return max(0, alocado - sys.getsizeof(resultados)) / repeticoes
+
+def main():
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    print(f"{'função':34} {'µs/chamada':>11} {'bytes/chamada':>14}")
+    for nome, funcao in CASOS:
+        tempo = min(timeit.repeat(funcao, number=repeticoes, repeat=5)) / repeticoes
+        print(f"{nome:34} {tempo * 1e6:11.3f} {bytes_por_chamada(funcao):14.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Bytes enviados ao navegador por execução do script, com o tema inline e injetado uma vez
+
+Uso: python benchmarks/bench_tema.py
+
+Abre o app com o AppTest do Streamlit e soma o tamanho das mensagens
+(ForwardMsg): a primeira execução (página aberta) e a média das execuções
+seguintes ("Próximo" no formulário por etapas). Compara ROCKRUN_TEMA_INLINE=1 (o
+<style> inteiro em toda execução, como antes) com o padrão (o tema vai só
+na primeira execução da sessão).
+"""
+import os
+import sys
+
+# Adiciona o diretório src ao path
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(BASE_DIR, 'src'))
+os.environ.setdefault('ROCKRUN_ARMAZENAMENTO', 'memoria')
+
+from streamlit.runtime.scriptrunner.script_run_context import ScriptRunContext
+from streamlit.testing.v1 import AppTest
+
+from utils.tema import CAMINHO_TEMA, carregar_tema
+
+APP = os.path.join(BASE_DIR, 'src', 'app.py')
+
+bytes_enviados = 0
+execucoes = 0
+_enfileirar_original = ScriptRunContext.enqueue
+_inicio_original = ScriptRunContext.on_script_start
+
+def _enfileirar_medindo(self, mensagem):
+    global bytes_enviados
+    bytes_enviados += mensagem.ByteSize()
+    return _enfileirar_original(self, mensagem)
+
+def _contar_execucao(self):
+    global execucoes
+    execucoes += 1
+    return _inicio_original(self)
+
+ScriptRunContext.enqueue = _enfileirar_medindo
+ScriptRunContext.on_script_start = _contar_execucao
+
+def medir(inline):
+    """Bytes da primeira execução e a média por execução depois de um "Próximo" """
+    global bytes_enviados, execucoes
+    import utils.tema
+    utils.tema.TEMA_INLINE = inline
+
+    bytes_enviados = 0
+    app = AppTest.from_file(APP, default_timeout=120).run()
+    primeira = bytes_enviados
+    app.text_input[0].input("Ana")
+    app.text_input[1].input("11999998888")
+
+    # O "Próximo" gera mais de uma execução (clique + st.rerun()); conta todas
+    bytes_enviados = execucoes = 0
+    next(botao for botao in app.button if "Próximo" in botao.label).click()
+    app.run()
+    return primeira, bytes_enviados / execucoes
+
+def main():
+    with open(CAMINHO_TEMA, encoding='utf-8') as arquivo:
+        original = len(arquivo.read().encode('utf-8'))
+    css, versao = carregar_tema()
+    print(f"tema.css: {original} bytes; minificado: {len(css.encode('utf-8'))} bytes (versão {versao})")
+
+    print(f"{'modo':22} {'1ª execução':>12} {'demais (média)':>15}")
+    for nome, inline in (("inline (antes)", True), ("uma vez por sessão", False)):
+        primeira, seguintes = medir(inline)
+        print(f"{nome:22} {primeira:12} {seguintes:15.0f}")
+
+if __name__ == "__main__":
+    main()
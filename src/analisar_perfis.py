@@ -0,0 +1,72 @@
+"""Soma os perfis gravados com ROCKRUN_PERFIL e mostra as funções mais caras
+
+Uso:
+    ROCKRUN_PERFIL=sempre streamlit run src/app.py          # perfila toda execução do script
+    ROCKRUN_PERFIL=consulta streamlit run src/app.py        # só as abertas com ?perfil=1
+    python src/analisar_perfis.py                           # top 25 de todas as execuções
+    python src/analisar_perfis.py --envio --top 40          # só execuções que processaram um envio
+    python src/analisar_perfis.py --etapa 0 --ordem tottime # navegação na primeira etapa, tempo próprio
+"""
+import argparse
+import collections
+import os
+import pstats
+import sys
+
+# Adiciona o diretório src ao path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.perfilador import DIRETORIO_PERFIS, marcas_perfil
+
+def selecionar(diretorio, etapa=None, envio=None):
+    """[(caminho, marcas)] dos perfis do diretório que passam nos filtros"""
+    selecionados = []
+    for nome in sorted(os.listdir(diretorio)):
+        marcas = marcas_perfil(nome) if nome.endswith(".prof") else None
+        if marcas is None:
+            continue
+        if etapa is not None and marcas["etapa"] != etapa:
+            continue
+        if envio is not None and marcas["envio"] != envio:
+            continue
+        selecionados.append((os.path.join(diretorio, nome), marcas))
+    return selecionados
+
+def main():
+    parser = argparse.ArgumentParser(description="Agrega perfis do cProfile gravados pelo app")
+    parser.add_argument("diretorio", nargs="?", default=DIRETORIO_PERFIS)
+    parser.add_argument("--top", type=int, default=25, help="Quantas funções mostrar")
+    parser.add_argument("--ordem", default="cumulative", choices=["cumulative", "tottime", "ncalls"])
+    parser.add_argument("--etapa", type=int, help="Só execuções desta etapa do formulário")
+    filtro_envio = parser.add_mutually_exclusive_group()
+    filtro_envio.add_argument("--envio", dest="envio", action="store_const", const=True,
+                              help="Só execuções que processaram um envio")
+    filtro_envio.add_argument("--navegacao", dest="envio", action="store_const", const=False,
+                              help="Só execuções sem envio")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.diretorio):
+        print(f"Diretório de perfis não encontrado: {args.diretorio}")
+        sys.exit(1)
+    perfis = selecionar(args.diretorio, args.etapa, args.envio)
+    if not perfis:
+        print("Nenhum perfil com esses filtros")
+        sys.exit(1)
+
+    # Quantas execuções e quanto tempo por etapa/tipo, antes do detalhe por função
+    grupos = collections.defaultdict(list)
+    for _, marcas in perfis:
+        grupos[(marcas["etapa"], marcas["envio"])].append(marcas["ms"])
+    print(f"{len(perfis)} execuções em {args.diretorio}")
+    for (etapa, envio), duracoes in sorted(grupos.items()):
+        duracoes.sort()
+        print(f"  etapa {etapa} {'envio' if envio else 'navegação':10} {len(duracoes):5} execuções, "
+              f"mediana {duracoes[len(duracoes) // 2]} ms, máximo {duracoes[-1]} ms")
+    print()
+
+    estatisticas = pstats.Stats(*(caminho for caminho, _ in perfis))
+    estatisticas.files = []  # a lista de arquivos já saiu no resumo acima
+    estatisticas.strip_dirs().sort_stats(args.ordem).print_stats(args.top)
+
+if __name__ == "__main__":
+    main()
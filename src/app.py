@@ -1,23 +1,35 @@
 # Importações do sistema
 import os
 import sys
-import io
+import concurrent.futures
 import datetime
-import traceback
+import time
 
 # Adiciona o diretório src ao path
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(BASE_DIR)
 
-# Streamlit e visualização
+# Streamlit
 import streamlit as st
-import pandas as pd
-import numpy as np
 
-# Nossos módulos
-from utils.helpers import formatar_tel
-from utils.gsheets import conectar_google_sheets, salvar_dados_sheets
-from utils.pdf_generator import gerar_pdf
+# Nossos módulos (gspread/google-auth e ReportLab/pypdf ficam para o primeiro uso)
+from utils.armazenamento import obter_armazenamento, salvar_submissao
+from utils.spool import nova_submissao_id
+from utils.aquecimento import estado_aquecimento, iniciar_aquecimento
+from utils.cache_pdf import estatisticas_cache_pdf
+from utils.fila_pdf import FILA_CHEIA, enviar_pdf, tamanho_fila_pdf
+from utils.metricas import exportar_prometheus, medir, registrar, resumo_metricas
+from utils.perfilador import PERFIL_ATIVO, executar_com_perfil
+from utils.tema import aplicar_tema
+from utils.questionario import (
+    ESCALA,
+    ETAPAS,
+    OPCOES,
+    PERGUNTAS,
+    Respostas,
+    respostas_faltando,
+    validar_etapa
+)
 from utils.training_logic import (
     calcular_classificacao,
     identificar_restricoes,
@@ -26,326 +38,217 @@ from utils.training_logic import (
     gerar_exercicios_complementares
 )
 
-def main():
-    # CSS personalizado com novo design
-    st.markdown("""
-    <style>
-        /* Definição de variáveis de cor para reutilização no tema */
-        :root {
-            --primary: #FF6B35;      /* Cor principal (laranja) */
-            --secondary: #2E86AB;    /* Cor secundária (azul) */
-            --accent: #4CAF50;       /* Cor de destaque (verde água) */
-            --dark: #292F36;         /* Cor escura (quase preto) */
-            --light: #F7F9FC;        /* Cor clara (quase branco) */
-            --success: #4CAF50;      /* Verde para sucesso */
-            --warning: #FF9800;      /* Laranja para alerta */
-            --danger: #F44336;       /* Vermelho para erro */
-        }
-        
-        /* Estilo do cabeçalho principal */
-        .main-header {
-            
-            text-align: left; /* Alinha o texto à esquerda */
-            color: #22F20F; /* Usa a cor principal (mas é sobrescrita pelo gradiente) */
-            font-size: 2.5rem; /* Tamanho grande da fonte */
-            font-weight: 800; /* Negrito forte */
-            margin-bottom: 1rem; /* Espaço abaixo */
-            text-shadow: 1px 1px 3px rgba(0,0,0,0.1); /* Sombra leve no texto */
-            background: linear-gradient(45deg, white, #22F20F); /* Gradiente no texto */
-            -webkit-background-clip: text; /* Aplica o gradiente só no texto */
-            -webkit-text-fill-color: transparent; /* Torna o texto transparente para mostrar o gradiente */
-            padding: 0.5rem 0; /* Espaçamento vertical interno */
-        }
-        
-        /* Estilo do cabeçalho de seção */
-        .section-header {
-            color: var(--secondary); /* Cor secundária */
-            font-size: 1.5rem; /* Tamanho médio da fonte */
-            font-weight: 700; /* Negrito */
-            margin-top: 2rem; /* Espaço acima */
-            margin-bottom: 1rem; /* Espaço abaixo */
-            padding-bottom: 0.5rem; /* Espaço interno abaixo */
-            border-bottom: 2px solid var(--secondary); /* Linha inferior */
-            position: relative; /* Necessário para o ::after */
-        }
-        
-        /* Linha de destaque abaixo do cabeçalho de seção */
-        .section-header::after {
-            content: ""; /* Elemento vazio */
-            position: absolute; /* Posicionamento absoluto */
-            bottom: -2px; /* 2px abaixo do fundo */
-            left: 0; /* Alinhado à esquerda */
-            width: 50px; /* Largura da linha */
-            height: 4px; /* Altura da linha */
-            background: var(--accent); /* Cor de destaque */
-        }
-        
-        /* Estilo dos botões do Streamlit */
-        .stButton > button {
-            width: 100%; /* Ocupa toda a largura */
-            background: linear-gradient(135deg, var(--primary), var(--accent)); /* Gradiente */
-            color: white; /* Texto branco */
-            font-weight: bold; /* Negrito */
-            font-size: 1.1rem; /* Tamanho da fonte */
-            height: 3rem; /* Altura fixa */
-            border-radius: 12px; /* Cantos arredondados */
-            border: none; /* Sem borda */
-            box-shadow: 0 4px 6px rgba(0,0,0,0.1); /* Sombra */
-            transition: all 0.3s ease; /* Transição suave */
-        }
-        
-        /* Efeito ao passar o mouse no botão */
-        .stButton > button:hover {
-            transform: translateY(-2px); /* Sobe levemente */
-             box-shadow: 0 6px 8px rgba(0,0,0,0.15); /* Sombra mais forte */
-        }
-        
-        /* Efeito ao clicar no botão */
-        .stButton > button:active {
-            transform: translateY(0); /* Volta ao normal */
-        }
-        
-        /* Caixa de sucesso (mensagens positivas) */
-        .success-box {
-            background: linear-gradient(135deg, #d4edda, #c3e6cb); /* Gradiente verde claro */
-            border-radius: 12px; /* Cantos arredondados */
-            padding: 1.5rem; /* Espaço interno */
-            margin: 1.5rem 0; /* Espaço externo */
-            box-shadow: 0 4px 6px rgba(0,0,0,0.05); /* Sombra leve */
-            border-left: 5px solid var(--success); /* Barra verde à esquerda */
-        }
-        
-        /* Adiciona asterisco vermelho em campos obrigatórios */
-        .required::after {
-            content: " *"; /* Asterisco */
-            color: var(--danger); /* Vermelho */
-            font-weight: bold; /* Negrito */
-        }
-        
-        /* Container da barra de progresso */
-        .progress-container {
-            margin: 1.5rem 0; /* Espaço externo */
-            padding: 1rem; /* Espaço interno */
-            border-radius: 12px; /* Cantos arredondados */
-            background: var(--light); /* Fundo claro */
-            border: 1px solid #e0e0e0; /* Borda cinza clara */
-            box-shadow: 0 4px 6px rgba(0,0,0,0.05); /* Sombra leve */
-        }
-        
-        /* Botões de navegação em etapas */
-        .step-buttons {
-            display: flex; /* Layout flexível */
-            justify-content: space-between; /* Espaço entre botões */
-            margin-top: 1.5rem; /* Espaço acima */
-            gap: 0.5rem; /* Espaço entre botões */
-        }
-        
-        /* Barra de progresso customizada */
-        .stProgress > div > div > div {
-            background: linear-gradient(100deg, white, #22F20F); /* Gradiente */
-            border-radius: 10px; /* Cantos arredondados */
-        }
-        
-        /* Mensagem de erro */
-        .error-message {
-            color: var(--danger); /* Vermelho */
-            font-weight: bold; /* Negrito */
-            margin-top: 0.5rem; /* Espaço acima */
-            padding: 0.75rem; /* Espaço interno */
-            border-radius: 8px; /* Cantos arredondados */
-            background-color: #ffebee; /* Fundo vermelho claro */
-            border-left: 4px solid var(--danger); /* Barra vermelha à esquerda */
-        }
-        
-        /* Cartão de conteúdo */
-        .card {
-            background: white; /* Fundo branco */
-            border-radius: 12px; /* Cantos arredondados */
-            padding: 1.5rem; /* Espaço interno */
-            margin: 1rem 0; /* Espaço externo */
-            box-shadow: 0 4px 12px rgba(0,0,0,0.08); /* Sombra */
-            border: 1px solid #eaeaea; /* Borda cinza clara */
-            transition: all 0.3s ease; /* Transição suave */
-        }
-        
-        /* Efeito ao passar o mouse no cartão */
-        .card:hover {
-            transform: translateY(-3px); /* Sobe levemente */
-            cursor: pointer; /* Muda o cursor */
-            box-shadow: 0 6px 16px rgba(0,0,0,0.12); /* Sombra mais forte */
-        }
-        
-        /* Sidebar do Streamlit */
-        [data-testid="stSidebar"] {
-            background: linear-gradient(100deg, #81EB78, #81EB78); /* Gradiente verde-escuro */
-            color: white; /* Texto branco */
-        }
-        
-        /* Remove fundo de alguns elementos do sidebar */
-        [data-testid="stSidebar"] .st-bb {
-            background-color: transparent;
-        }
-        [data-testid="stSidebar"] .st-cb {
-            background-color: rgba(255,255,255,0.1);
-        }
-        
-        /* Deixa todos os textos do sidebar brancos */
-        [data-testid="stSidebar"] h1, 
-        [data-testid="stSidebar"] h2, 
-        [data-testid="stSidebar"] h3, 
-        [data-testid="stSidebar"] h4, 
-        [data-testid="stSidebar"] h5, 
-        [data-testid="stSidebar"] h6,
-        [data-testid="stSidebar"] p {
-            color: #292F36 !important;
-        }
-        
-        /* Responsividade para telas pequenas (mobile) */
-        @media (max-width: 768px) {
-            .main-header {
-                font-size: 1.8rem; /* Reduz tamanho do título */
-            }
-            .section-header {
-                font-size: 1.3rem; /* Reduz tamanho do subtítulo */
-            }
-            .step-buttons {
-                flex-direction: column; /* Botões em coluna */
-            }
-        }
-        
-        /* Estilo para container de botões de navegação */
-        .nav-buttons-container {
-            display: flex;
-            justify-content: space-between;
-            gap: 10px;
-            margin-top: 1.5rem;
-        }
-        .full-width-button {
-            width: 100%;
-            margin-top: 1rem;
-        }
-                
+@st.cache_resource
+def iniciar_aquecimento_processo():
+    """Garante o aquecimento (utils.aquecimento) também quando o app sobe com `streamlit run` direto"""
+    iniciar_aquecimento()
+    return True
 
-        /* ESTILO DOS BOTÕES PRINCIPAIS (mantenha como está) */
-        .stButton > button {
-        width: 100%;
-        background: linear-gradient(135deg, var(--primary), var(--accent));
-        color: white;
-        font-weight: bold;
-        font-size: 1.1rem;
-        height: 3rem;
-        border-radius: 12px;
-        border: none;
-        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-        transition: all 0.3s ease;
-    }
-    
-    /* === NOVOS ESTILOS PARA BOTÕES DE NAVEGAÇÃO === */
-    .nav-buttons .stButton > button {
-        background-color: #81EB78 !important;
-        color: #292F36 !important;
-        border: 2px solid transparent !important;
-        transition: all 0.3s ease !important;
-    }
+# Tempo máximo que a sessão espera pelo PDF (vaga na fila + renderização)
+ESPERA_MAXIMA_PDF = 60
 
-    .nav-buttons .stButton > button:hover {
-        background-color: transparent !important;
-        border: 2px solid #81EB78 !important;
-        color: #81EB78 !important;
-    }
+# Modo sob demanda: o PDF só é renderizado quando o usuário pede para baixar
+PDF_SOB_DEMANDA = os.environ.get('ROCKRUN_PDF_SOB_DEMANDA', '0') == '1'
 
-    .nav-buttons .stButton > button:active {
-        background-color: #22F20F !important;
-        color: white !important;
-        border: 2px solid transparent !important;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+# Etapas em abas de um só formulário: a navegação fica no navegador e o servidor
+# só executa o script ao abrir a página e no envio final
+ETAPAS_NO_NAVEGADOR = os.environ.get('ROCKRUN_ETAPAS_NO_NAVEGADOR', '0') == '1'
 
-    # Cabeçalho moderno
-    #st.markdown(("---"))
-    st.markdown('<h2 class="main-header">RockRun - Seu Personal de Corrida!</h2>', unsafe_allow_html=True)
-    st.markdown(("---"))
-    st.markdown("""
-    <div style="text-align: center; margin-bottom: 2rem;">
-        <p style="font-size: 1.0rem; color: var(--light);">Descubra seu perfil e receba um plano de treino personalizado baseado em ciência esportiva!</p>
-        <div style="display: flex; justify-content: center; gap: 1rem; margin-top: 1rem;">
-            <span style="background: #AEE7CC; color: #292F36; padding: 0.3rem 0.8rem; border-radius: 20px; font-size: 0.9rem;">✅ Personalizado</span>
-            <span style="background: #AEE7CC; color: #292F36; padding: 0.3rem 0.8rem; border-radius: 20px; font-size: 0.9rem;">📊 Base Científica</span>
-            <span style="background: #AEE7CC; color: #292F36; padding: 0.3rem 0.8rem; border-radius: 20px; font-size: 0.9rem;">💯 Gratuito</span>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+# Resultados (plano, salvamento, PDF) guardados por sessão, indexados pelo id da submissão
+RESULTADOS_POR_SESSAO = 3
 
-    # Inicializar session state
-    if 'respostas' not in st.session_state:
-        st.session_state.respostas = {}
-    if 'form_valido' not in st.session_state:
-        st.session_state.form_valido = False
-    if 'etapa_formulario' not in st.session_state:
-        st.session_state.etapa_formulario = 0
-    if 'erros_etapa1' not in st.session_state:
-        st.session_state.erros_etapa1 = []
+# Painel de latência por etapa na barra lateral (operação/diagnóstico)
+PAINEL_METRICAS = os.environ.get('ROCKRUN_PAINEL_METRICAS', '0') == '1'
 
-    # Inicializar todas as variáveis do formulário
-    nome = telefone_input = idade = sexo = ""
-    inatividade = experiencia = ""
-    saude = medicamentos = liberacao_medica = ""
-    condicao_fisica = escada = caminhada = 0
-    objetivo = motivacao = ""
-    dias_semana = tempo_treino = horario = local = ""
-    sono = estresse = 0
-    lesoes = preferencia_social = ""
+@st.cache_resource
+def obter_executor_salvamento():
+    """Threads que salvam as submissões enquanto o PDF é renderizado (uma vez por processo)"""
+    return concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix="salvamento")
 
-    # Sidebar atualizada
-    st.sidebar.header("⚙️ Configurações do Sistema")
-    st.sidebar.subheader("🔍 Diagnóstico de Conexão")
-    
-    # Verifica se o arquivo credentials.json existe
-    CREDENTIALS_PATH = 'credentials.json'
-    credentials_exist = os.path.exists(CREDENTIALS_PATH)
-    
-    st.sidebar.markdown(f"""
-    <div style="background: rgba(255,255,255,0.1); padding: 1rem; border-radius: 10px; margin-bottom: 1rem;">
-        <p style="margin-bottom: 0.5rem;"><strong>🔑 Credenciais:</strong> {'✅ Encontradas' if credentials_exist else '❌ Não encontradas'}</p>
-        <p style="font-size: 0.8rem; margin-bottom: 0;">{'Excluir depois' if credentials_exist else 'Coloque na pasta do app'}</p>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Botão para testar conexão
-    if st.sidebar.button("🧪 Testar Conexão Google Sheets", use_container_width=True):
-        cliente, erro = conectar_google_sheets()
-        if erro:
-            st.sidebar.error(f"❌ {erro}")
-        elif cliente:
-            try:
-                planilha = cliente.open_by_key("1WdcJclPYrrLoBJfIRrNLd9WEVJ9v2Rh5bekmwlAGjb0")
-                st.sidebar.success("✅ Conexão bem-sucedida!")
-                st.sidebar.info(f"📊 Planilha: {planilha.title}")
-            except Exception as e:
-                st.sidebar.error(f"❌ Falha: {str(e)}")
+def encomendar_pdf(respostas, classificacao, programa, adaptacao, exercicios, restricoes, prazo):
+    """Encomenda o PDF ao pool de processos, esperando vaga se a fila estiver cheia"""
+    aviso = st.empty()
+    trabalho, erro = enviar_pdf(respostas, classificacao, programa, adaptacao, exercicios, restricoes)
+    # Fila cheia: espera uma vaga em vez de renderizar na thread da sessão; outros erros
+    # (pool quebrado, servidor encerrando) não passam esperando e voltam na hora
+    while trabalho is None and erro == FILA_CHEIA and time.monotonic() < prazo:
+        aviso.info("⏳ Muitos planos sendo gerados agora, aguardando uma vaga...")
+        time.sleep(0.5)
+        trabalho, erro = enviar_pdf(respostas, classificacao, programa, adaptacao, exercicios, restricoes)
+    aviso.empty()
+    return trabalho, erro
+
+def aguardar_pdf(trabalho, prazo):
+    """Mostra a posição na fila enquanto o PDF encomendado é renderizado"""
+    aviso = st.empty()
+    while not trabalho.pronto() and time.monotonic() < prazo:
+        posicao = trabalho.posicao()
+        if posicao:
+            aviso.info(f"⏳ Seu PDF está na fila (posição {posicao})...")
         else:
-            st.sidebar.error("❌ Conexão falhou sem mensagem de erro")
-    
-    # Informações sobre o app
-    st.sidebar.markdown("---")
-    st.sidebar.markdown("### ℹ️ Sobre o RockRun")
-    st.sidebar.markdown("Plataforma para corredores amadores criarem planos de treino personalizados com base científica.")
-    st.sidebar.markdown("Desenvolvido com ❤️ usando Python e Streamlit")
-    st.sidebar.caption("Versão 1.0.1 | Junho 2025")
-    st.sidebar.markdown("© 2025 RockRun. Todos os direitos reservados.")
+            aviso.info("📄 Gerando seu PDF...")
+        time.sleep(0.2)
+    aviso.empty()
+    return trabalho.resultado(timeout=max(0, prazo - time.monotonic()))
+
+def exibir_download_pdf(pdf_buffer, pdf_erro, classificacao, key):
+    """Mostra o botão de download do PDF pronto (ou o erro da geração)"""
+    if pdf_buffer:
+        # Mensagem informativa sobre o conteúdo completo no PDF
+        st.info("""
+        📄 **O plano de treino completo está disponível apenas no PDF**, incluindo:
+        - Detalhamento completo das fases de treinamento
+        - Exercícios complementares específicos
+        - Adaptações para seu objetivo
+        - Dicas personalizadas
+        """)
+
+        # Botão de download
+        st.download_button(
+            label="📥 BAIXAR PROGRAMA EM PDF",
+            data=pdf_buffer.getvalue(),
+            file_name=f"programa_corrida_{classificacao.lower()}_{datetime.datetime.now().strftime('%Y%m%d')}.pdf",
+            mime="application/pdf",
+            use_container_width=True,
+            key=key,
+            type= "primary",
+            help="Clique para baixar seu programa completo"
+        )
+    else:
+        st.error(f"Erro ao gerar PDF: {pdf_erro}")
+
+def exibir_pdf_sob_demanda(plano):
+    """Renderiza o PDF do plano guardado só quando o usuário clica; sessões abandonadas não custam nada"""
+    st.markdown(f"### 📄 Plano de {plano['respostas']['nome']}: {plano['classificacao']}")
+    if st.button("📄 PREPARAR PROGRAMA EM PDF", key=f"preparar_{plano['token']}", use_container_width=True):
+        prazo = time.monotonic() + ESPERA_MAXIMA_PDF
+        trabalho, pdf_erro = encomendar_pdf(
+            plano['respostas'], plano['classificacao'], plano['programa'],
+            plano['adaptacao'], plano['exercicios'], plano['restricoes'], prazo
+        )
+        pdf_buffer = None
+        if trabalho:
+            pdf_buffer, pdf_erro = aguardar_pdf(trabalho, prazo)
+        exibir_download_pdf(pdf_buffer, pdf_erro, plano['classificacao'], f"download_{plano['token']}")
+
+def exibir_painel_metricas():
+    """Latência de cada etapa do envio neste processo (p50/p95/p99), com o texto Prometheus para baixar"""
+    with st.sidebar.expander("📈 Latência por etapa"):
+        resumo = resumo_metricas()
+        if not resumo:
+            st.caption("Nenhum envio medido ainda neste processo")
+            return
+        linhas = ["| Etapa | n | p50 | p95 | p99 |", "|---|---:|---:|---:|---:|"]
+        for etapa, medidas in resumo.items():
+            linhas.append(
+                f"| {etapa} | {medidas['contagem']} | {medidas['p50'] * 1000:.2f} "
+                f"| {medidas['p95'] * 1000:.2f} | {medidas['p99'] * 1000:.2f} |"
+            )
+        st.markdown("\n".join(linhas))
+        st.caption("Tempos em ms, sobre as medidas mais recentes de cada etapa")
+        st.download_button(
+            "⬇️ Métricas (Prometheus)", exportar_prometheus(),
+            file_name="rockrun_metricas.prom", mime="text/plain", use_container_width=True
+        )
+
+def confirmar_envio():
+    """Marca o questionário como enviado; um novo clique antes do fim do processamento mantém o mesmo id"""
+    if not st.session_state.form_valido:
+        st.session_state.submissao_id = nova_submissao_id()
+        st.session_state.form_valido = True
 
-    # Lista de etapas do formulário
-    ETAPAS = [
-        "DADOS PESSOAIS", #👤
-        "📚 HISTÓRICO DE ATIVIDADES FÍSICAS",
-        "🏥 CONDIÇÃO DE SAÚDE",
-        "💪 CONDICIONAMENTO FÍSICO ATUAL",
-        "🎯 OBJETIVOS E MOTIVAÇÃO",
-        "⏰ DISPONIBILIDADE",
-        "🌟 ESTILO DE VIDA"
-    ]
+def processar_submissao(submissao_id, respostas):
+    """Plano da submissão, com salvamento e PDF disparados uma única vez por id nesta sessão"""
+    resultados = st.session_state.resultados
+    resultado = resultados.get(submissao_id)
+    if resultado is None:
+        # Calcular classificação e gerar programa
+        inicio = time.perf_counter()
+        respostas = Respostas(respostas)
+        with medir("calcular_classificacao"):
+            classificacao = calcular_classificacao(respostas)
+        with medir("identificar_restricoes"):
+            restricoes = identificar_restricoes(respostas)
+        with medir("gerar_programa_treino"):
+            programa = gerar_programa_treino(classificacao, respostas)
+        resultado = {
+            'inicio': inicio,
+            'respostas': respostas,
+            'classificacao': classificacao,
+            'restricoes': restricoes,
+            'programa': programa,
+            'adaptacao': adaptar_por_objetivo(programa, respostas['objetivo']),
+            'exercicios': gerar_exercicios_complementares(),
+            'prazo_pdf': time.monotonic() + ESPERA_MAXIMA_PDF,
+            # Salvamento (E/S) e PDF (CPU, no pool de processos) correm ao mesmo tempo;
+            # a falha de um não interrompe o outro. O id evita linha duplicada no destino.
+            'salvamento': obter_executor_salvamento().submit(salvar_submissao, respostas, classificacao, submissao_id),
+        }
+        resultados[submissao_id] = resultado
+        for antigo in list(resultados)[:-RESULTADOS_POR_SESSAO]:
+            del resultados[antigo]
+    if 'trabalho_pdf' not in resultado:
+        trabalho_pdf, pdf_erro = None, ""
+        if not PDF_SOB_DEMANDA:
+            trabalho_pdf, pdf_erro = encomendar_pdf(
+                resultado['respostas'], resultado['classificacao'], resultado['programa'],
+                resultado['adaptacao'], resultado['exercicios'], resultado['restricoes'], resultado['prazo_pdf']
+            )
+        resultado['trabalho_pdf'], resultado['pdf_erro'] = trabalho_pdf, pdf_erro
+    return resultado
+
+def exibir_pergunta(campo, respostas):
+    """Widget da pergunta conforme PERGUNTAS, já com a resposta salva; retorna o valor escolhido"""
+    pergunta = PERGUNTAS[campo]
+    if pergunta["tipo"] == "opcao":
+        return st.selectbox(pergunta["rotulo"], OPCOES[campo], index=respostas.codigo(campo))
+    if pergunta["tipo"] == "escala":
+        return st.slider(
+            pergunta["rotulo"],
+            min_value=ESCALA[0], max_value=ESCALA[1],
+            value=respostas.get(campo, pergunta["padrao"]),
+            help=pergunta["ajuda"]
+        )
+    return st.text_input(
+        pergunta["rotulo"],
+        value=respostas.get(campo, ''),
+        placeholder=pergunta.get("placeholder"),
+        max_chars=pergunta.get("max_chars")
+    )
+
+def exibir_formulario_em_abas():
+    """Todas as etapas em abas de um só formulário; trocar de aba não executa o script, só o envio"""
+    valores = {}
+    with st.form(key="formulario_corrida"):
+        abas = st.tabs([etapa["titulo"] for etapa in ETAPAS])
+        for aba, etapa in zip(abas, ETAPAS):
+            with aba:
+                for campo in etapa["perguntas"]:
+                    valores[campo] = exibir_pergunta(campo, st.session_state.respostas)
+        
+        submit_final = st.form_submit_button(
+            "🚀 GERAR MEU PLANO!", 
+            type="primary",
+            use_container_width=True,
+            help="Finalizar e gerar seu plano personalizado"
+        )
     
+    if submit_final:
+        # Valida todas as etapas de uma vez; os erros aparecem aqui mesmo, sem nova execução
+        novas, erros = {}, []
+        for numero, etapa in enumerate(ETAPAS):
+            respostas_etapa, erros_etapa = validar_etapa(numero, valores)
+            novas.update(respostas_etapa)
+            erros.extend(f"{erro} (aba {etapa['titulo']})" for erro in erros_etapa)
+        if erros:
+            for erro in erros:
+                st.markdown(f'<div class="error-message">{erro}</div>', unsafe_allow_html=True)
+        else:
+            st.session_state.respostas.update(novas)
+            confirmar_envio()
+
+def exibir_formulario_por_etapas():
+    """Uma etapa por vez; cada "Próximo"/"Voltar" executa o script de novo"""
     # Barra de progresso moderna
     with st.container():
         progresso = st.session_state.etapa_formulario / (len(ETAPAS) - 1)
@@ -365,323 +268,18 @@ def main():
     # Formulário multi-etapas em cartões
     form = st.form(key="formulario_corrida")
     with form:
-        # ETAPA 0: Dados Pessoais
-        if st.session_state.etapa_formulario == 0:
-            with st.container():
-                st.subheader("DADOS PESSOAIS")
-                
-                # Nome (campo obrigatório)
-                nome = st.text_input("Digite seu nome*:", value=st.session_state.respostas.get('nome', ''))
-                
-                # Telefone (campo obrigatório com validação)
-                telefone_input = st.text_input(
-                    "Telefone* (formato: (99) 99999-9999):", 
-                    value=st.session_state.respostas.get('telefone_input', ''),
-                    placeholder="(99) 99999-9999",
-                    max_chars=15
-                )
+        # Etapa atual montada a partir do questionário (utils.questionario)
+        etapa = ETAPAS[st.session_state.etapa_formulario]
+        valores = {}
+        with st.container():
+            st.subheader(etapa["titulo"])
+            for campo in etapa["perguntas"]:
+                valores[campo] = exibir_pergunta(campo, st.session_state.respostas)
                 
                 # Mostrar erros se existirem
-                if st.session_state.erros_etapa1:
+                if campo == etapa.get("erros_apos") and st.session_state.erros_etapa1:
                     for erro in st.session_state.erros_etapa1:
                         st.markdown(f'<div class="error-message">{erro}</div>', unsafe_allow_html=True)
-                
-                idade = st.selectbox(
-                    "1. Qual é a sua idade?",
-                    ["Menos de 18 anos", "18-25 anos", "26-35 anos", "36-45 anos", "46-55 anos", "Mais de 55 anos"],
-                    index=0 if 'idade' not in st.session_state.respostas else 
-                    ["Menos de 18 anos", "18-25 anos", "26-35 anos", "36-45 anos", "46-55 anos", "Mais de 55 anos"].index(st.session_state.respostas['idade'])
-                )
-                sexo = st.selectbox(
-                    "2. Qual é o seu sexo?",
-                    ["Feminino", "Masculino", "Prefiro não informar"],
-                    index=0 if 'sexo' not in st.session_state.respostas else 
-                    ["Feminino", "Masculino", "Prefiro não informar"].index(st.session_state.respostas['sexo'])
-                )
-        
-        # ETAPA 1: Histórico de Atividades Físicas
-        elif st.session_state.etapa_formulario == 1:
-            with st.container():
-                st.subheader("📚 HISTÓRICO DE ATIVIDADES FÍSICAS")
-                inatividade = st.selectbox(
-                    "3. Há quanto tempo você não pratica exercícios físicos regulares?",
-                    [
-                        "Pratico atualmente (pelo menos 2x por semana)",
-                        "Parei há menos de 6 meses",
-                        "Parei há 6 meses a 1 ano",
-                        "Parei há 1 a 3 anos",
-                        "Parei há mais de 3 anos",
-                        "Nunca pratiquei exercícios regulares"
-                    ],
-                    index=0 if 'inatividade' not in st.session_state.respostas else 
-                    ["Pratico atualmente (pelo menos 2x por semana)",
-                     "Parei há menos de 6 meses",
-                     "Parei há 6 meses a 1 ano",
-                     "Parei há 1 a 3 anos",
-                     "Parei há mais de 3 anos",
-                     "Nunca pratiquei exercícios regulares"].index(st.session_state.respostas['inatividade'])
-                )
-                
-                experiencia = st.selectbox(
-                    "4. Qual foi sua última experiência com atividade física regular?",
-                    [
-                        "Corrida/caminhada",
-                        "Academia/musculação",
-                        "Esportes coletivos (futebol, vôlei, etc.)",
-                        "Dança ou lutas",
-                        "Ciclismo ou natação",
-                        "Nunca tive experiência regular"
-                    ],
-                    index=0 if 'experiencia' not in st.session_state.respostas else 
-                    ["Corrida/caminhada",
-                     "Academia/musculação",
-                     "Esportes coletivos (futebol, vôlei, etc.)",
-                     "Dança ou lutas",
-                     "Ciclismo ou natação",
-                     "Nunca tive experiência regular"].index(st.session_state.respostas['experiencia'])
-                )
-        
-        # ETAPA 2: Condição de Saúde
-        elif st.session_state.etapa_formulario == 2:
-            with st.container():
-                st.subheader("🏥 CONDIÇÃO DE SAÚDE")
-                saude = st.selectbox(
-                    "5. Você possui alguma condição de saúde que pode afetar a prática de exercícios?",
-                    [
-                        "Não tenho nenhuma condição",
-                        "Problemas cardíacos",
-                        "Diabetes",
-                        "Hipertensão",
-                        "Problemas respiratórios (asma, etc.)",
-                        "Outras condições"
-                    ],
-                    index=0 if 'saude' not in st.session_state.respostas else 
-                    ["Não tenho nenhuma condição",
-                     "Problemas cardíacos",
-                     "Diabetes",
-                     "Hipertensão",
-                     "Problemas respiratórios (asma, etc.)",
-                     "Outras condições"].index(st.session_state.respostas['saude'])
-                )
-                
-                medicamentos = st.selectbox(
-                    "6. Você toma algum medicamento regularmente?",
-                    [
-                        "Não tomo medicamentos",
-                        "Sim, mas não afeta exercícios",
-                        "Sim, e pode afetar exercícios",
-                        "Não tenho certeza"
-                    ],
-                    index=0 if 'medicamentos' not in st.session_state.respostas else 
-                    ["Não tomo medicamentos",
-                     "Sim, mas não afeta exercícios",
-                     "Sim, e pode afetar exercícios",
-                     "Não tenho certeza"].index(st.session_state.respostas['medicamentos'])
-                )
-                
-                liberacao_medica = st.selectbox(
-                    "7. Você tem liberação médica para praticar exercícios?",
-                    [
-                        "Sim, tenho liberação",
-                        "Não preciso (sou saudável)",
-                        "Pretendo consultar um médico antes",
-                        "Não sei se preciso"
-                    ],
-                    index=0 if 'liberacao_medica' not in st.session_state.respostas else 
-                    ["Sim, tenho liberação",
-                     "Não preciso (sou saudável)",
-                     "Pretendo consultar um médico antes",
-                     "Não sei se preciso"].index(st.session_state.respostas['liberacao_medica'])
-                )
-        
-        # ETAPA 3: Condicionamento Físico Atual
-        elif st.session_state.etapa_formulario == 3:
-            with st.container():
-                st.subheader("💪 CONDICIONAMENTO FÍSICO ATUAL")
-                condicao_fisica = st.slider(
-                    "8. Como você avalia sua condição física atual?",
-                    min_value=1, max_value=5, 
-                    value=st.session_state.respostas.get('condicao_fisica', 3),
-                    help="1 = Muito ruim, 5 = Excelente"
-                )
-                
-                escada = st.selectbox(
-                    "9. Você consegue subir 2 lances de escada sem ficar muito ofegante?",
-                    [
-                        "Sim, facilmente",
-                        "Sim, mas fico um pouco cansado(a)",
-                        "Com dificuldade",
-                        "Não consigo"
-                    ],
-                    index=0 if 'escada' not in st.session_state.respostas else 
-                    ["Sim, facilmente",
-                     "Sim, mas fico um pouco cansado(a)",
-                     "Com dificuldade",
-                     "Não consigo"].index(st.session_state.respostas['escada'])
-                )
-                
-                caminhada = st.selectbox(
-                    "10. Quanto tempo você consegue caminhar em ritmo moderado sem parar?",
-                    [
-                        "Menos de 10 minutos",
-                        "10-20 minutos",
-                        "20-30 minutos",
-                        "30-45 minutos",
-                        "Mais de 45 minutos"
-                    ],
-                    index=0 if 'caminhada' not in st.session_state.respostas else 
-                    ["Menos de 10 minutos",
-                     "10-20 minutos",
-                     "20-30 minutos",
-                     "30-45 minutos",
-                     "Mais de 45 minutos"].index(st.session_state.respostas['caminhada'])
-                )
-        
-        # ETAPA 4: Objetivos e Motivação
-        elif st.session_state.etapa_formulario == 4:
-            with st.container():
-                st.subheader("🎯 OBJETIVOS E MOTIVAÇÃO")
-                objetivo = st.selectbox(
-                    "11. Qual é seu principal objetivo com a corrida?",
-                    [
-                        "Emagrecimento/perda de peso",
-                        "Melhorar a saúde geral",
-                        "Reduzir estresse/bem-estar mental",
-                        "Participar de provas/competições",
-                        "Diversão e lazer",
-                        "Socialização/fazer novos amigos"
-                    ],
-                    index=0 if 'objetivo' not in st.session_state.respostas else 
-                    ["Emagrecimento/perda de peso",
-                     "Melhorar a saúde geral",
-                     "Reduzir estresse/bem-estar mental",
-                     "Participar de provas/competições",
-                     "Diversão e lazer",
-                     "Socialização/fazer novos amigos"].index(st.session_state.respostas['objetivo'])
-                )
-                
-                motivacao = st.slider(
-                    "12. Qual é seu nível de motivação para começar?",
-                    min_value=1, max_value=5, 
-                    value=st.session_state.respostas.get('motivacao', 4),
-                    help="1 = Pouco motivado, 5 = Muito motivado"
-                )
-        
-        # ETAPA 5: Disponibilidade
-        elif st.session_state.etapa_formulario == 5:
-            with st.container():
-                st.subheader("⏰ DISPONIBILIDADE")
-                dias_semana = st.selectbox(
-                    "13. Quantos dias por semana você pode treinar?",
-                    ["1-2 dias", "3 dias", "4 dias", "5 dias", "6-7 dias"],
-                    index=0 if 'dias_semana' not in st.session_state.respostas else 
-                    ["1-2 dias", "3 dias", "4 dias", "5 dias", "6-7 dias"].index(st.session_state.respostas['dias_semana'])
-                )
-                
-                tempo_treino = st.selectbox(
-                    "14. Tempo disponível por sessão?",
-                    [
-                        "Menos de 20 minutos",
-                        "20-30 minutos",
-                        "30-45 minutos",
-                        "45-60 minutos",
-                        "Mais de 60 minutos"
-                    ],
-                    index=0 if 'tempo_treino' not in st.session_state.respostas else 
-                    ["Menos de 20 minutos",
-                     "20-30 minutos",
-                     "30-45 minutos",
-                     "45-60 minutos",
-                     "Mais de 60 minutos"].index(st.session_state.respostas['tempo_treino'])
-                )
-                
-                horario = st.selectbox(
-                    "15. Horário preferido?",
-                    [
-                        "Manhã (6h às 9h)",
-                        "Meio do dia (9h às 14h)",
-                        "Tarde (14h às 18h)",
-                        "Noite (18h às 21h)",
-                        "Varia conforme o dia"
-                    ],
-                    index=0 if 'horario' not in st.session_state.respostas else 
-                    ["Manhã (6h às 9h)",
-                     "Meio do dia (9h às 14h)",
-                     "Tarde (14h às 18h)",
-                     "Noite (18h às 21h)",
-                     "Varia conforme o dia"].index(st.session_state.respostas['horario'])
-                )
-                
-                local = st.selectbox(
-                    "16. Onde você prefere correr?",
-                    [
-                        "Rua/calçada",
-                        "Parques/praças",
-                        "Esteira (academia ou casa)",
-                        "Pista de atletismo",
-                        "Trilhas na natureza"
-                    ],
-                    index=0 if 'local' not in st.session_state.respostas else 
-                    ["Rua/calçada",
-                     "Parques/praças",
-                     "Esteira (academia ou casa)",
-                     "Pista de atletismo",
-                     "Trilhas na natureza"].index(st.session_state.respostas['local'])
-                )
-        
-        # ETAPA 6: Estilo de Vida
-        elif st.session_state.etapa_formulario == 6:
-            with st.container():
-                st.subheader("🌟 ESTILO DE VIDA")
-                sono = st.slider(
-                    "17. Qualidade do seu sono?",
-                    min_value=1, max_value=5, 
-                    value=st.session_state.respostas.get('sono', 3),
-                    help="1 = Muito ruim, 5 = Excelente"
-                )
-                
-                estresse = st.slider(
-                    "18. Como lida com o estresse?",
-                    min_value=1, max_value=5, 
-                    value=st.session_state.respostas.get('estresse', 3),
-                    help="1 = Muito mal, 5 = Muito bem"
-                )
-                
-                lesoes = st.selectbox(
-                    "19. Você já teve lesões ou sente dores em:",
-                    [
-                        "Não tenho dores ou lesões",
-                        "Joelhos",
-                        "Tornozelos/pés",
-                        "Quadril/lombar",
-                        "Ombros/pescoço",
-                        "Outras regiões"
-                    ],
-                    index=0 if 'lesoes' not in st.session_state.respostas else 
-                    ["Não tenho dores ou lesões",
-                     "Joelhos",
-                     "Tornozelos/pés",
-                     "Quadril/lombar",
-                     "Ombros/pescoço",
-                     "Outras regiões"].index(st.session_state.respostas['lesoes'])
-                )
-                
-                preferencia_social = st.selectbox(
-                    "20. Como prefere treinar?",
-                    [
-                        "Sozinho(a) - prefiro meu próprio ritmo",
-                        "Com um(a) parceiro(a) de treino",
-                        "Em pequenos grupos (3-5 pessoas)",
-                        "Em grupos maiores/assessorias",
-                        "Não tenho preferência"
-                    ],
-                    index=0 if 'preferencia_social' not in st.session_state.respostas else 
-                    ["Sozinho(a) - prefiro meu próprio ritmo",
-                     "Com um(a) parceiro(a) de treino",
-                     "Em pequenos grupos (3-5 pessoas)",
-                     "Em grupos maiores/assessorias",
-                     "Não tenho preferência"].index(st.session_state.respostas['preferencia_social'])
-                )
         
         # ===============================================
         # CORREÇÃO DOS BOTÕES - AGORA LADO A LADO
@@ -733,118 +331,158 @@ def main():
                     )
 
         # ===============================================
-        # LÓGICA DE PROCESSAMENTO (PERMANECE IGUAL)
+        # LÓGICA DE PROCESSAMENTO
         # ===============================================
         if voltar_clicado:
             st.session_state.etapa_formulario -= 1
             st.rerun()
             
-        if proximo_clicado:
-            # Validação específica para a etapa 0
-            if st.session_state.etapa_formulario == 0:
-                erros = []
-                
-                # Validar nome
-                if not nome:
-                    erros.append("Por favor, informe seu nome")
-                
-                # Validar telefone
-                telefone_formatado = formatar_tel(telefone_input)
-                if telefone_formatado is None:
-                    erros.append("Por favor, informe um telefone válido com 11 dígitos: (99) 99999-9999)")
-                
-                # Se houver erros, mostrar mas não avançar
-                if erros:
-                    st.session_state.erros_etapa1 = erros
-                    st.rerun()
-                else:
-                    # Salvar dados e avançar
-                    st.session_state.respostas.update({
-                        'nome': nome,
-                        'telefone': telefone_formatado,
-                        'telefone_input': telefone_input,
-                        'idade': idade,
-                        'sexo': sexo
-                    })
-                    st.session_state.etapa_formulario += 1
-                    st.rerun()
+        if proximo_clicado or submit_final:
+            # Valida e salva as respostas da etapa atual
+            novas, erros = validar_etapa(st.session_state.etapa_formulario, valores)
             
-            # Para outras etapas, apenas salvar e avançar
-            else:
-                # Salva as respostas na etapa atual
-                if st.session_state.etapa_formulario == 1:
-                    st.session_state.respostas.update({
-                        'inatividade': inatividade,
-                        'experiencia': experiencia
-                    })
-                elif st.session_state.etapa_formulario == 2:
-                    st.session_state.respostas.update({
-                        'saude': saude,
-                        'medicamentos': medicamentos,
-                        'liberacao_medica': liberacao_medica
-                    })
-                elif st.session_state.etapa_formulario == 3:
-                    st.session_state.respostas.update({
-                        'condicao_fisica': condicao_fisica,
-                        'escada': escada,
-                        'caminhada': caminhada
-                    })
-                elif st.session_state.etapa_formulario == 4:
-                    st.session_state.respostas.update({
-                        'objetivo': objetivo,
-                        'motivacao': motivacao
-                    })
-                elif st.session_state.etapa_formulario == 5:
-                    st.session_state.respostas.update({
-                        'dias_semana': dias_semana,
-                        'tempo_treino': tempo_treino,
-                        'horario': horario,
-                        'local': local
-                    })
-                
-                # Avançar para próxima etapa
+            # Se houver erros, mostrar mas não avançar
+            if erros:
+                st.session_state.erros_etapa1 = erros
+                st.rerun()
+            st.session_state.respostas.update(novas)
+            
+            if proximo_clicado:
                 st.session_state.etapa_formulario += 1
                 st.rerun()
         
         # Validação e processamento final
         if submit_final:
-            # Salvar dados da última etapa
-            st.session_state.respostas.update({
-                'sono': sono,
-                'estresse': estresse,
-                'lesoes': lesoes,
-                'preferencia_social': preferencia_social
-            })
-            
             # Validar campos obrigatórios
-            erros = []
-            if not st.session_state.respostas.get('nome', ''):
-                erros.append("Por favor, informe seu nome")
-                
-            telefone_valido = st.session_state.respostas.get('telefone', '')
-            if not telefone_valido:
-                erros.append("Por favor, informe seu telefone")
-            
+            erros = respostas_faltando(st.session_state.respostas)
             if erros:
                 st.session_state.etapa_formulario = 0
                 st.session_state.erros_etapa1 = erros
                 st.rerun()
             else:
-                st.session_state.form_valido = True
+                confirmar_envio()
+
+def main():
+    iniciar_aquecimento_processo()
+    
+    # Tema (static/tema.css): enviado uma vez por sessão, não a cada execução
+    aplicar_tema()
+
+    # Cabeçalho moderno
+    #st.markdown(("---"))
+    st.markdown('<h2 class="main-header">RockRun - Seu Personal de Corrida!</h2>', unsafe_allow_html=True)
+    st.markdown(("---"))
+    st.markdown("""
+    <div class="intro">
+        <p>Descubra seu perfil e receba um plano de treino personalizado baseado em ciência esportiva!</p>
+        <div class="selos">
+            <span class="selo">✅ Personalizado</span>
+            <span class="selo">📊 Base Científica</span>
+            <span class="selo">💯 Gratuito</span>
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    # Inicializar session state
+    if 'respostas' not in st.session_state:
+        st.session_state.respostas = Respostas()
+    if 'form_valido' not in st.session_state:
+        st.session_state.form_valido = False
+    if 'submissao_id' not in st.session_state:
+        st.session_state.submissao_id = None
+    if 'resultados' not in st.session_state:
+        st.session_state.resultados = {}
+    if 'etapa_formulario' not in st.session_state:
+        st.session_state.etapa_formulario = 0
+    if 'erros_etapa1' not in st.session_state:
+        st.session_state.erros_etapa1 = []
+
+    # Sidebar atualizada
+    st.sidebar.header("⚙️ Configurações do Sistema")
+    st.sidebar.subheader("🔍 Diagnóstico de Conexão")
+    
+    armazenamento = obter_armazenamento()
+    st.sidebar.markdown(f"**💾 Armazenamento:** {armazenamento.nome}")
+    
+    if armazenamento.nome == "sheets":
+        # Verifica se o arquivo credentials.json existe
+        CREDENTIALS_PATH = 'credentials.json'
+        credentials_exist = os.path.exists(CREDENTIALS_PATH)
+        
+        st.sidebar.markdown(f"""
+        <div style="background: rgba(255,255,255,0.1); padding: 1rem; border-radius: 10px; margin-bottom: 1rem;">
+            <p style="margin-bottom: 0.5rem;"><strong>🔑 Credenciais:</strong> {'✅ Encontradas' if credentials_exist else '❌ Não encontradas'}</p>
+            <p style="font-size: 0.8rem; margin-bottom: 0;">{'Excluir depois' if credentials_exist else 'Coloque na pasta do app'}</p>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        # Estado da sincronização com a planilha (disjuntor, cota e spool local)
+        from utils.gsheets import diagnostico_sheets
+        diagnostico = diagnostico_sheets()
+        icone_circuito = {"fechado": "🟢", "semiaberto": "🟡", "aberto": "🔴"}[diagnostico["estado"]]
+        st.sidebar.markdown(f"**{icone_circuito} Circuito Google Sheets:** {diagnostico['estado']}")
+        if diagnostico["estado"] == "aberto":
+            st.sidebar.caption(f"Nova tentativa em {diagnostico['reabre_em']}s — os envios seguem guardados localmente")
+        if diagnostico["ultimo_erro"]:
+            st.sidebar.caption(f"Último erro: {diagnostico['ultimo_erro']}")
+        st.sidebar.caption(f"📤 Envios pendentes para a planilha: {diagnostico['fila']} | 🎟️ Cota disponível: {diagnostico['fichas']}")
+    
+    # Botão para testar conexão
+    if st.sidebar.button("🧪 Testar Armazenamento", use_container_width=True):
+        ok, mensagem = armazenamento.saude()
+        if ok:
+            st.sidebar.success("✅ Conexão bem-sucedida!")
+            st.sidebar.info(mensagem)
+        else:
+            st.sidebar.error(f"❌ {mensagem}")
+    
+    # Uso do cache de PDFs (para dimensionar limite e validade)
+    cache = estatisticas_cache_pdf()
+    st.sidebar.caption(
+        f"🗂️ Cache de PDFs: {cache['itens']} itens, {cache['bytes'] // 1024} KB | "
+        f"acertos {cache['acertos_memoria'] + cache['acertos_disco']} / falhas {cache['falhas']}"
+    )
+    st.sidebar.caption(f"🖨️ PDFs na fila de renderização: {tamanho_fila_pdf()}")
+
+    # Aquecimento do processo (Sheets, tabelas, ReportLab, pool de PDFs)
+    aquecimento = estado_aquecimento()
+    etapas = " | ".join(
+        f"{'✅' if etapa['ok'] else '⚠️'} {nome} {etapa['ms']:.0f} ms"
+        for nome, etapa in aquecimento["etapas"].items()
+    )
+    st.sidebar.caption(f"{'🟢 Processo pronto' if aquecimento['pronto'] else '🟡 Aquecendo'}: {etapas or 'iniciando'}")
+    if PAINEL_METRICAS:
+        exibir_painel_metricas()
+    
+    # Informações sobre o app
+    st.sidebar.markdown("---")
+    st.sidebar.markdown("### ℹ️ Sobre o RockRun")
+    st.sidebar.markdown("Plataforma para corredores amadores criarem planos de treino personalizados com base científica.")
+    st.sidebar.markdown("Desenvolvido com ❤️ usando Python e Streamlit")
+    st.sidebar.caption("Versão 1.0.1 | Junho 2025")
+    st.sidebar.markdown("© 2025 RockRun. Todos os direitos reservados.")
+
+    # Questionário: etapas em abas no navegador ou uma etapa por execução do script
+    if ETAPAS_NO_NAVEGADOR:
+        exibir_formulario_em_abas()
+    else:
+        exibir_formulario_por_etapas()
 
     # Processamento externo (fora do formulário) se o formulário for válido
     if st.session_state.form_valido:
-        respostas = st.session_state.respostas
-        
-        # Calcular classificação e gerar programa
-        classificacao = calcular_classificacao(respostas)
-        restricoes = identificar_restricoes(respostas)
-        programa = gerar_programa_treino(classificacao, respostas)
-        adaptacao = adaptar_por_objetivo(programa, respostas['objetivo'])
-        exercicios = gerar_exercicios_complementares()
+        # Uma execução interrompida no meio (clique, download, reconexão) retoma o
+        # que já foi feito para este id em vez de salvar e renderizar de novo
+        submissao_id = st.session_state.submissao_id
+        resultado = processar_submissao(submissao_id, st.session_state.respostas)
+        respostas = resultado['respostas']
+        classificacao = resultado['classificacao']
+        programa = resultado['programa']
+        restricoes = resultado['restricoes']
         
         with st.spinner('💾 Analisando suas respostas e criando seu plano...'):
-            sucesso, mensagem_erro = salvar_dados_sheets(respostas, classificacao)
+            if 'salvo' not in resultado:
+                resultado['salvo'] = resultado['salvamento'].result()
+            sucesso, mensagem_erro = resultado['salvo']
             if sucesso:
                 st.toast("Dados Calculados com sucesso!", icon="✅")
         
@@ -865,35 +503,31 @@ def main():
                 st.metric("Objetivo", respostas['objetivo'].split('/')[0])
             st.markdown('</div>', unsafe_allow_html=True)
         
-        # Gerar PDF
-        pdf_buffer, pdf_erro = gerar_pdf(
-            respostas, classificacao, programa, 
-            adaptacao, exercicios, restricoes
-        )
-        
-        if pdf_buffer:
-            # Mensagem informativa sobre o conteúdo completo no PDF
-            st.info("""
-            📄 **O plano de treino completo está disponível apenas no PDF**, incluindo:
-            - Detalhamento completo das fases de treinamento
-            - Exercícios complementares específicos
-            - Adaptações para seu objetivo
-            - Dicas personalizadas
-            """)
-
-            # Botão de download
-            st.download_button(
-                label="📥 BAIXAR PROGRAMA EM PDF",
-                data=pdf_buffer.getvalue(),
-                file_name=f"programa_corrida_{classificacao.lower()}_{datetime.datetime.now().strftime('%Y%m%d')}.pdf",
-                mime="application/pdf",
-                use_container_width=True,
-                key="download_button",
-                type= "primary",
-                help="Clique para baixar seu programa completo"
-            )
+        if PDF_SOB_DEMANDA:
+            # Guarda só o necessário para renderizar quando (e se) o usuário pedir
+            st.session_state.plano_pdf = {
+                'token': submissao_id,
+                'respostas': respostas,
+                'classificacao': classificacao,
+                'programa': programa,
+                'adaptacao': resultado['adaptacao'],
+                'exercicios': resultado['exercicios'],
+                'restricoes': restricoes,
+            }
         else:
-            st.error(f"Erro ao gerar PDF: {pdf_erro}")
+            # Gerar PDF (uma vez por submissão; execuções seguintes reaproveitam os bytes)
+            if 'pdf' not in resultado:
+                pdf_buffer, pdf_erro = None, resultado['pdf_erro']
+                if resultado['trabalho_pdf']:
+                    pdf_buffer, pdf_erro = aguardar_pdf(resultado['trabalho_pdf'], resultado['prazo_pdf'])
+                resultado['pdf'] = (pdf_buffer, pdf_erro)
+            pdf_buffer, pdf_erro = resultado['pdf']
+            exibir_download_pdf(pdf_buffer, pdf_erro, classificacao, "download_button")
+        
+        # Do envio até o plano (e o download, se o PDF não for sob demanda) na tela
+        if 'total' not in resultado:
+            resultado['total'] = time.perf_counter() - resultado['inicio']
+            registrar("submissao.total", resultado['total'])
        
         if restricoes:
             st.warning("⚠️ **ATENÇÕES ESPECIAIS IDENTIFICADAS:**")
@@ -902,10 +536,19 @@ def main():
         
         # Resetar estado para evitar reexecução
         st.session_state.form_valido = False
+        st.session_state.submissao_id = None
         st.session_state.etapa_formulario = 0
-        st.session_state.respostas = {}
+        st.session_state.respostas = Respostas()
         st.session_state.erros_etapa1 = []
         "---"
+    
+    # PDF sob demanda do último plano gerado nesta sessão
+    if st.session_state.get('plano_pdf'):
+        exibir_pdf_sob_demanda(st.session_state.plano_pdf)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # ROCKRUN_PERFIL liga o cProfile por execução; desligado, main() roda direto
+    if PERFIL_ATIVO:
+        executar_com_perfil(main)
+    else:
+        main()
\ No newline at end of file
@@ -0,0 +1,201 @@
+"""Regera os PDFs de todas as submissões já gravadas, usando todos os núcleos da máquina
+
+Uso:
+    python src/regerar_pdfs.py --origem csv --caminho export_planilha.csv --saida pdfs/
+    python src/regerar_pdfs.py --origem sqlite --saida pdfs/ --processos 8
+    python src/regerar_pdfs.py --origem sheets --saida pdfs/
+
+O progresso fica em <saida>/progresso.jsonl: rodar de novo com a mesma
+saída pula as submissões já concluídas. As falhas vão para
+<saida>/falhas.jsonl e são tentadas de novo na próxima execução.
+
+Linhas gravadas antes das colunas de saúde (Saude, Medicamentos,
+Liberacao_Medica) não dizem se o plano precisa de atenção médica: vão
+para falhas.jsonl, a não ser que --assumir-sem-restricoes seja passado
+explicitamente (o PDF sai sem as restrições médicas dessas respostas).
+"""
+import argparse
+import concurrent.futures
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+# Adiciona o diretório src ao path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.armazenamento import (
+    CABECALHOS,
+    COLUNA_ID,
+    POSICAO_ID,
+    ArmazenamentoCSV,
+    ArmazenamentoSQLite,
+    ArmazenamentoSheets
+)
+from utils.modelos_pdf import gerar_pdf_por_modelo
+from utils.questionario import COLUNAS_PLANILHA, OPCOES
+from utils.training_logic import (
+    MOTOR_REGRAS,
+    calcular_classificacao,
+    identificar_restricoes,
+    gerar_programa_treino,
+    adaptar_por_objetivo,
+    gerar_exercicios_complementares
+)
+
+# Colunas da planilha -> chaves de st.session_state.respostas
+COLUNAS_RESPOSTAS = {coluna: campo for coluna, campo in COLUNAS_PLANILHA if campo}
+
+# Respostas de que as restrições dependem; linhas sem alguma delas não são regeradas
+CAMPOS_RESTRICOES = tuple(MOTOR_REGRAS.campos_restricoes)
+
+# Só com --assumir-sem-restricoes: a primeira opção de cada pergunta (nenhuma restrição)
+RESPOSTAS_SEM_RESTRICOES = {campo: OPCOES[campo][0] for campo in CAMPOS_RESTRICOES}
+
+def abrir_origem(origem, caminho):
+    if origem == "csv":
+        return ArmazenamentoCSV(caminho)
+    if origem == "sqlite":
+        return ArmazenamentoSQLite(caminho) if caminho else ArmazenamentoSQLite()
+    return ArmazenamentoSheets()
+
+def id_do_registro(registro):
+    """ID da submissão; linhas antigas sem a coluna recebem um hash estável do conteúdo"""
+    if registro.get(COLUNA_ID):
+        return registro[COLUNA_ID]
+    # Só as colunas anteriores ao id: colunas novas não mudam o hash de uma linha antiga
+    conteudo = json.dumps([registro.get(c, '') for c in CABECALHOS[:POSICAO_ID]], ensure_ascii=False)
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()[:32]
+
+def respostas_do_registro(registro):
+    """Reconstrói as respostas a partir de uma linha gravada (colunas da planilha ou chaves das respostas)"""
+    respostas = {}
+    for coluna, valor in registro.items():
+        if valor in (None, ''):
+            continue
+        respostas[COLUNAS_RESPOSTAS.get(coluna, coluna)] = valor
+    if 'condicao_fisica' in respostas:
+        respostas['condicao_fisica'] = int(respostas['condicao_fisica'])
+    return respostas
+
+def regerar(tarefa):
+    """Executa no processo filho: classificação -> programa -> PDF gravado em disco"""
+    submissao_id, registro, saida, assumir_sem_restricoes = tarefa
+    try:
+        respostas = respostas_do_registro(registro)
+
+        # Sem as respostas de saúde o plano perderia avisos médicos: não inventa
+        faltando = [campo for campo in CAMPOS_RESTRICOES if campo not in respostas]
+        if faltando and not assumir_sem_restricoes:
+            return submissao_id, False, (
+                f"Linha sem as respostas {', '.join(faltando)}: restrições desconhecidas "
+                "(use --assumir-sem-restricoes para gerar o PDF sem elas)"
+            )
+        for campo in faltando:
+            respostas[campo] = RESPOSTAS_SEM_RESTRICOES[campo]
+
+        # Reclassifica quando a linha traz as respostas; senão mantém o perfil gravado
+        if {'inatividade', 'caminhada', 'condicao_fisica'} <= respostas.keys():
+            classificacao = calcular_classificacao(respostas)
+        else:
+            classificacao = registro["Perfil"]
+
+        restricoes = identificar_restricoes(respostas)
+        programa = gerar_programa_treino(classificacao, respostas)
+        adaptacao = adaptar_por_objetivo(programa, respostas.get('objetivo', ''))
+        exercicios = gerar_exercicios_complementares()
+
+        buffer, erro = gerar_pdf_por_modelo(respostas, classificacao, programa, adaptacao, exercicios, restricoes)
+        if erro:
+            return submissao_id, False, erro
+
+        nome_seguro = re.sub(r'\W+', '_', respostas.get('nome', '')).strip('_').lower()
+        caminho = os.path.join(saida, f"programa_corrida_{nome_seguro}_{submissao_id}.pdf")
+        with open(caminho, 'wb') as arquivo:
+            arquivo.write(buffer.getvalue())
+        return submissao_id, True, ""
+    except Exception as e:
+        return submissao_id, False, f"{type(e).__name__}: {str(e)}"
+
+def carregar_concluidos(caminho_progresso):
+    if not os.path.exists(caminho_progresso):
+        return set()
+    with open(caminho_progresso, encoding='utf-8') as arquivo:
+        return {json.loads(linha)["id"] for linha in arquivo if linha.strip()}
+
+def main():
+    parser = argparse.ArgumentParser(description="Regera os PDFs de todas as submissões gravadas")
+    parser.add_argument("--origem", choices=["csv", "sqlite", "sheets"], default="csv")
+    parser.add_argument("--caminho", help="Arquivo CSV (export da planilha) ou banco SQLite")
+    parser.add_argument("--saida", required=True, help="Diretório onde os PDFs são gravados")
+    parser.add_argument("--processos", type=int, default=os.cpu_count(), help="Processos em paralelo (padrão: núcleos da máquina)")
+    parser.add_argument("--limite", type=int, help="Processa no máximo N submissões")
+    parser.add_argument("--assumir-sem-restricoes", action="store_true",
+                        help="Gera as linhas sem respostas de saúde como se não houvesse restrição médica")
+    args = parser.parse_args()
+
+    if args.origem == "csv" and not args.caminho:
+        parser.error("--origem csv precisa de --caminho")
+
+    os.makedirs(args.saida, exist_ok=True)
+    caminho_progresso = os.path.join(args.saida, "progresso.jsonl")
+    concluidos = carregar_concluidos(caminho_progresso)
+    if concluidos:
+        print(f"Retomando: {len(concluidos)} submissões já concluídas serão puladas")
+
+    def tarefas():
+        enviadas = 0
+        for registro in abrir_origem(args.origem, args.caminho).iterar_linhas():
+            if args.limite is not None and enviadas >= args.limite:
+                return
+            submissao_id = id_do_registro(registro)
+            if submissao_id in concluidos:
+                continue
+            enviadas += 1
+            yield submissao_id, registro, args.saida, args.assumir_sem_restricoes
+
+    sucessos = falhas = 0
+    inicio = time.monotonic()
+    # Limita as tarefas em voo para ler a origem aos poucos, sem carregar tudo na memória
+    em_voo_maximo = args.processos * 4
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.processos) as executor, \
+            open(caminho_progresso, 'a', encoding='utf-8') as progresso, \
+            open(os.path.join(args.saida, "falhas.jsonl"), 'a', encoding='utf-8') as arquivo_falhas:
+        pendentes = set()
+        fila = tarefas()
+        esgotou = False
+        while pendentes or not esgotou:
+            while not esgotou and len(pendentes) < em_voo_maximo:
+                tarefa = next(fila, None)
+                if tarefa is None:
+                    esgotou = True
+                else:
+                    pendentes.add(executor.submit(regerar, tarefa))
+            if not pendentes:
+                break
+
+            prontas, pendentes = concurrent.futures.wait(pendentes, return_when=concurrent.futures.FIRST_COMPLETED)
+            for futura in prontas:
+                submissao_id, ok, erro = futura.result()
+                if ok:
+                    sucessos += 1
+                    progresso.write(json.dumps({"id": submissao_id}) + "\n")
+                else:
+                    falhas += 1
+                    arquivo_falhas.write(json.dumps({"id": submissao_id, "erro": erro}, ensure_ascii=False) + "\n")
+            progresso.flush()
+
+            total = sucessos + falhas
+            if total and total % 100 < len(prontas):
+                decorrido = time.monotonic() - inicio
+                print(f"{total} processadas | {total / decorrido:.1f} PDFs/s | {falhas} falhas", flush=True)
+
+    decorrido = time.monotonic() - inicio
+    taxa = (sucessos + falhas) / decorrido if decorrido else 0.0
+    print(f"Concluído: {sucessos} PDFs gerados, {falhas} falhas em {decorrido:.1f}s ({taxa:.1f} PDFs/s)")
+    sys.exit(1 if falhas else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""Sobe o servidor do Streamlit com o processo já aquecendo antes do primeiro usuário
+
+Uso:
+    python src/servidor.py [opções do `streamlit run`, ex.: --server.port 8501]
+    ROCKRUN_ARQUIVO_PRONTO=/tmp/rockrun.pronto python src/servidor.py
+
+Com `streamlit run src/app.py` o aquecimento só começa na primeira sessão.
+Aqui ele começa junto com o processo, e a sonda de prontidão pode checar
+o arquivo de ROCKRUN_ARQUIVO_PRONTO (ex.: `test -f /tmp/rockrun.pronto`).
+"""
+import os
+import sys
+
+# Adiciona o diretório src ao path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from streamlit.web import cli
+
+from utils.aquecimento import iniciar_aquecimento
+
+def main():
+    # O script do app roda neste mesmo processo, então enxerga o estado do aquecimento
+    iniciar_aquecimento()
+    app = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+    sys.argv = ["streamlit", "run", app, *sys.argv[1:]]
+    sys.exit(cli.main())
+
+if __name__ == "__main__":
+    main()
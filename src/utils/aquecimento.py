@@ -0,0 +1,113 @@
+import os
+import threading
+import time
+
+from utils.armazenamento import tipo_configurado
+from utils.metricas import coletar
+
+# Arquivo criado quando o processo fica pronto, para uma sonda do tipo
+# `test -f` (o /_stcore/health do Streamlit responde antes do aquecimento)
+ARQUIVO_PRONTO = os.environ.get('ROCKRUN_ARQUIVO_PRONTO')
+
+# Espera máxima pelos processos do pool de PDFs
+ESPERA_POOL_SEGUNDOS = 120
+
+_trava = threading.Lock()
+_trava_execucao = threading.Lock()
+_thread = None
+_pronto = threading.Event()
+_etapas = {}  # nome -> {"ok", "ms", "erro"}
+
+def _etapa(nome, funcao):
+    """Executa uma etapa do aquecimento, registrando duração e erro sem interromper as demais"""
+    inicio = time.perf_counter()
+    # Medidas do aquecimento são descartadas: não entram nos histogramas do envio
+    with coletar():
+        try:
+            erro = funcao()
+        except Exception as e:
+            erro = f"{type(e).__name__}: {str(e)}"
+    _etapas[nome] = {
+        "ok": not erro,
+        "ms": round((time.perf_counter() - inicio) * 1000, 1),
+        "erro": erro or "",
+    }
+
+def _autorizar_sheets():
+    """Autoriza o cliente, abre a aba, confere o cabeçalho e sobe o escritor"""
+    from utils.gsheets import obter_escritor, obter_folha, verificar_cabecalhos
+    obter_escritor()
+    folha, erro = obter_folha()
+    if erro:
+        return erro
+    return verificar_cabecalhos(folha)
+
+def _montar_tabelas():
+    """Monta uma vez cada programa e adaptação de utils.training_logic"""
+    from utils.training_logic import (
+        CLASSIFICACOES,
+        OBJETIVOS_ADAPTADOS,
+        gerar_programa_treino,
+        adaptar_por_objetivo,
+        gerar_exercicios_complementares
+    )
+    gerar_exercicios_complementares()
+    for classificacao in CLASSIFICACOES:
+        programa = gerar_programa_treino(classificacao, {})
+        for objetivo in OBJETIVOS_ADAPTADOS:
+            adaptar_por_objetivo(programa, objetivo)
+
+def _subir_pool_pdf():
+    """Sobe os processos do pool de PDFs, cada um já com o ReportLab aquecido (fila_pdf._iniciar_processo)"""
+    from utils.fila_pdf import PROCESSOS, aquecer_fila_pdf
+    prontos, erros = aquecer_fila_pdf(ESPERA_POOL_SEGUNDOS)
+    if erros:
+        return erros[0]
+    if prontos < PROCESSOS:
+        return f"{prontos} de {PROCESSOS} processos de PDF prontos"
+    return None
+
+def aquecer():
+    """Executa o aquecimento completo no processo atual (bloqueia); chamadas repetidas não refazem nada"""
+    with _trava_execucao:
+        if _pronto.is_set():
+            return
+        if ARQUIVO_PRONTO and os.path.exists(ARQUIVO_PRONTO):
+            # Sobra de um processo anterior: só vale depois deste aquecimento
+            os.remove(ARQUIVO_PRONTO)
+
+        if tipo_configurado() == "sheets":
+            _etapa("sheets", _autorizar_sheets)
+        _etapa("tabelas", _montar_tabelas)
+        _etapa("pool_pdf", _subir_pool_pdf)
+
+        # Erros não seguram o tráfego: o spool guarda os envios e o PDF cai no layout completo
+        _pronto.set()
+        if ARQUIVO_PRONTO:
+            with open(ARQUIVO_PRONTO, 'w', encoding='utf-8') as arquivo:
+                arquivo.write(f"{os.getpid()}\n")
+
+def iniciar_aquecimento():
+    """Dispara o aquecimento numa thread, uma vez por processo; retorna a thread"""
+    global _thread
+    with _trava:
+        if _thread is None:
+            # Os processos do pool sobem aqui, na thread de quem chama (poucos ms cada; o
+            # aquecimento deles segue sozinho). Subir processos na thread daemon
+            # do aquecimento poderia coincidir com a saída do interpretador e travá-la
+            from utils.fila_pdf import subir_fila_pdf
+            subir_fila_pdf()
+            _thread = threading.Thread(target=aquecer, name="aquecimento", daemon=True)
+            _thread.start()
+        return _thread
+
+def pronto():
+    """Indica se o aquecimento terminou e o processo pode receber usuários"""
+    return _pronto.is_set()
+
+def aguardar_pronto(timeout=None):
+    return _pronto.wait(timeout)
+
+def estado_aquecimento():
+    """Prontidão e resultado de cada etapa, para o painel de diagnóstico"""
+    return {"pronto": pronto(), "etapas": dict(_etapas)}
@@ -0,0 +1,251 @@
+import abc
+import csv
+import datetime
+import os
+import threading
+
+from utils.metricas import medir
+from utils.questionario import COLUNAS_PLANILHA
+from utils.spool import CAMINHO_SPOOL, Spool, nova_submissao_id
+
+# Colunas de uma submissão (mesma ordem da planilha)
+CABECALHOS = [coluna for coluna, _ in COLUNAS_PLANILHA]
+
+# Coluna extra com o id da submissão (deduplicação)
+COLUNA_ID = "ID_Submissao"
+
+# Na planilha e no CSV o id fica logo após as colunas que existiam quando ele foi criado
+# (até "Lesoes"); as acrescentadas depois vêm após o id. Planilhas antigas só ganham
+# cabeçalhos no fim e as linhas já gravadas continuam com cada valor na sua coluna
+POSICAO_ID = CABECALHOS.index("Lesoes") + 1
+CABECALHOS_GRAVADOS = CABECALHOS[:POSICAO_ID] + [COLUNA_ID] + CABECALHOS[POSICAO_ID:]
+
+# Arquivo usado pelo armazenamento "csv"
+CAMINHO_CSV = os.environ.get('ROCKRUN_CSV', 'rockrun_submissoes.csv')
+
+def montar_linha(respostas, classificacao):
+    """Monta a linha da submissão na ordem de CABECALHOS, com as respostas em texto"""
+    preenchidas = {
+        "Timestamp": datetime.datetime.now().strftime("%d/%m/%Y %H:%M"),
+        "Perfil": classificacao,
+    }
+    return [
+        preenchidas[coluna] if campo is None else str(respostas.get(campo, ''))
+        for coluna, campo in COLUNAS_PLANILHA
+    ]
+
+def linha_gravada(submissao_id, linha):
+    """Linha na ordem de CABECALHOS_GRAVADOS, com o id na sua posição"""
+    linha = list(linha)
+    return linha[:POSICAO_ID] + [submissao_id] + linha[POSICAO_ID:]
+
+def _como_dicionario(submissao_id, linha):
+    registro = dict(zip(CABECALHOS, linha))
+    registro[COLUNA_ID] = submissao_id
+    return registro
+
+def _ler_gravadas(linhas):
+    """Dicionários das linhas de uma planilha ou CSV (a primeira é o cabeçalho)"""
+    cabecalho = next(linhas, None)
+    if not cabecalho:
+        return
+    # Cabeçalho de antes das últimas colunas: as linhas novas já trazem todas
+    if cabecalho == CABECALHOS_GRAVADOS[:len(cabecalho)]:
+        cabecalho = CABECALHOS_GRAVADOS
+    for linha in linhas:
+        yield dict(zip(cabecalho, list(linha) + [''] * (len(cabecalho) - len(linha))))
+
+class Armazenamento(abc.ABC):
+    """Interface comum dos destinos das submissões.
+
+    `salvar` e `salvar_varios` retornam os submissao_id gravados (repetir
+    um id não duplica a linha); `iterar_linhas` gera dicionários com
+    CABECALHOS + COLUNA_ID (vazios nas linhas gravadas antes da coluna
+    existir); `saude` retorna (ok, mensagem) no formato das demais funções
+    do app.
+    """
+
+    nome = ""
+
+    def salvar(self, linha, submissao_id=None):
+        return self.salvar_varios([linha], [submissao_id])[0]
+
+    @abc.abstractmethod
+    def salvar_varios(self, linhas, submissao_ids=None):
+        pass
+
+    @abc.abstractmethod
+    def iterar_linhas(self):
+        pass
+
+    @abc.abstractmethod
+    def saude(self):
+        pass
+
+class ArmazenamentoMemoria(Armazenamento):
+    """Guarda as submissões numa lista do processo (testes, benchmarks, uso offline)"""
+
+    nome = "memoria"
+
+    def __init__(self):
+        self._linhas = []
+        self._ids = set()
+        self._trava = threading.Lock()
+
+    def salvar_varios(self, linhas, submissao_ids=None):
+        submissao_ids = [sid or nova_submissao_id() for sid in (submissao_ids or [None] * len(linhas))]
+        with self._trava:
+            for submissao_id, linha in zip(submissao_ids, linhas):
+                if submissao_id not in self._ids:
+                    self._ids.add(submissao_id)
+                    self._linhas.append(_como_dicionario(submissao_id, [str(v) for v in linha]))
+        return submissao_ids
+
+    def iterar_linhas(self):
+        with self._trava:
+            linhas = list(self._linhas)
+        yield from linhas
+
+    def saude(self):
+        return True, f"🧠 Memória: {len(self._linhas)} submissões"
+
+class ArmazenamentoCSV(Armazenamento):
+    """Acrescenta as submissões a um arquivo CSV local"""
+
+    nome = "csv"
+
+    def __init__(self, caminho=CAMINHO_CSV):
+        self.caminho = caminho
+        self._ids = None
+        self._trava = threading.Lock()
+
+    def _carregar_ids(self):
+        # Lido uma vez por processo; depois mantido em memória
+        if self._ids is None:
+            self._ids = {registro[COLUNA_ID] for registro in self._ler()}
+
+    def _ler(self):
+        if not os.path.exists(self.caminho):
+            return
+        with open(self.caminho, newline='', encoding='utf-8') as arquivo:
+            yield from _ler_gravadas(csv.reader(arquivo))
+
+    def salvar_varios(self, linhas, submissao_ids=None):
+        submissao_ids = [sid or nova_submissao_id() for sid in (submissao_ids or [None] * len(linhas))]
+        with self._trava:
+            self._carregar_ids()
+            novo = not os.path.exists(self.caminho) or os.path.getsize(self.caminho) == 0
+            with open(self.caminho, 'a', newline='', encoding='utf-8') as arquivo:
+                escritor = csv.writer(arquivo)
+                if novo:
+                    escritor.writerow(CABECALHOS_GRAVADOS)
+                for submissao_id, linha in zip(submissao_ids, linhas):
+                    if submissao_id not in self._ids:
+                        self._ids.add(submissao_id)
+                        escritor.writerow(linha_gravada(submissao_id, linha))
+        return submissao_ids
+
+    def iterar_linhas(self):
+        yield from self._ler()
+
+    def saude(self):
+        try:
+            diretorio = os.path.dirname(os.path.abspath(self.caminho))
+            if not os.access(diretorio, os.W_OK):
+                return False, f"🚨 Sem permissão de escrita em {diretorio}"
+            return True, f"📄 CSV: {self.caminho}"
+        except Exception as e:
+            return False, f"🚨 Erro geral: {str(e)}"
+
+class ArmazenamentoSQLite(Armazenamento):
+    """Grava as submissões só no diário SQLite local (utils.spool), sem espelho remoto"""
+
+    nome = "sqlite"
+
+    def __init__(self, caminho=CAMINHO_SPOOL):
+        self.caminho = caminho
+        self._spool = Spool(CABECALHOS, caminho)
+
+    def salvar_varios(self, linhas, submissao_ids=None):
+        submissao_ids = submissao_ids or [None] * len(linhas)
+        return [self._spool.registrar(linha, sid) for sid, linha in zip(submissao_ids, linhas)]
+
+    def iterar_linhas(self):
+        for submissao_id, linha in self._spool.iterar():
+            yield _como_dicionario(submissao_id, linha)
+
+    def saude(self):
+        try:
+            return True, f"🗄️ SQLite: {self._spool.contar()} submissões em {self.caminho}"
+        except Exception as e:
+            return False, f"🚨 Erro geral: {str(e)}"
+
+class ArmazenamentoSheets(Armazenamento):
+    """Grava no spool local e espelha para o Google Sheets em segundo plano (utils.gsheets)"""
+
+    nome = "sheets"
+
+    def salvar_varios(self, linhas, submissao_ids=None):
+        from utils.gsheets import obter_escritor
+        escritor = obter_escritor()
+        submissao_ids = submissao_ids or [None] * len(linhas)
+        return [escritor.enfileirar(linha, sid) for sid, linha in zip(submissao_ids, linhas)]
+
+    def iterar_linhas(self):
+        # Baixa a planilha inteira: uso em análises e reprocessamentos, nunca no envio
+        from utils.gsheets import obter_folha
+        folha, erro = obter_folha()
+        if erro:
+            raise RuntimeError(erro)
+        yield from _ler_gravadas(iter(folha.get_all_values()))
+
+    def saude(self):
+        from utils.gsheets import obter_planilha
+        planilha, erro = obter_planilha()
+        if erro or not planilha:
+            return False, erro or "Conexão falhou sem mensagem de erro"
+        return True, f"📊 Planilha: {planilha.title}"
+
+TIPOS_ARMAZENAMENTO = {
+    ArmazenamentoSheets.nome: ArmazenamentoSheets,
+    ArmazenamentoSQLite.nome: ArmazenamentoSQLite,
+    ArmazenamentoCSV.nome: ArmazenamentoCSV,
+    ArmazenamentoMemoria.nome: ArmazenamentoMemoria,
+}
+
+_trava = threading.Lock()
+_armazenamento = None
+
+def tipo_configurado():
+    """Tipo de armazenamento: variável ROCKRUN_ARMAZENAMENTO, depois secrets["armazenamento"], padrão "sheets\""""
+    tipo = os.environ.get('ROCKRUN_ARMAZENAMENTO')
+    if not tipo:
+        try:
+            from streamlit import secrets
+            # Sem secrets.toml, secrets.get mostraria um st.error na página; a chave é opcional
+            tipo = secrets.get("armazenamento") if secrets.load_if_toml_exists() else None
+        except Exception:
+            # secrets.toml inválido (ou fora do Streamlit): fica o padrão
+            tipo = None
+    return (tipo or ArmazenamentoSheets.nome).strip().lower()
+
+def obter_armazenamento():
+    """Retorna o armazenamento configurado, criado uma vez por processo"""
+    global _armazenamento
+    with _trava:
+        if _armazenamento is None:
+            tipo = tipo_configurado()
+            if tipo not in TIPOS_ARMAZENAMENTO:
+                raise ValueError(f"Armazenamento desconhecido: {tipo} (opções: {', '.join(TIPOS_ARMAZENAMENTO)})")
+            _armazenamento = TIPOS_ARMAZENAMENTO[tipo]()
+        return _armazenamento
+
+def salvar_submissao(respostas, classificacao, submissao_id=None):
+    """Salva a submissão no armazenamento configurado; repetir o submissao_id não duplica a linha"""
+    try:
+        with medir("salvar_submissao"):
+            obter_armazenamento().salvar(montar_linha(respostas, classificacao), submissao_id)
+        return True, ""  # Sucesso sem mensagem de erro
+
+    except Exception as e:
+        return False, f"🚨 Erro geral: {str(e)}"
@@ -0,0 +1,213 @@
+import collections
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+# Limites do cache em memória (e do diretório em disco, se configurado)
+LIMITE_BYTES = int(os.environ.get('ROCKRUN_CACHE_PDF_BYTES', 32 * 1024 * 1024))
+VALIDADE_SEGUNDOS = int(os.environ.get('ROCKRUN_CACHE_PDF_TTL', 24 * 60 * 60))
+
+# Segundo nível opcional em disco (sobrevive a reinícios e é compartilhado entre processos)
+DIRETORIO_DISCO = os.environ.get('ROCKRUN_CACHE_PDF_DIR')
+
+# O diretório só é varrido quando o tamanho estimado passa do limite (a limpeza desce até
+# FOLGA_DISCO dele) ou a cada INTERVALO_LIMPEZA_DISCO segundos, para os vencidos e os
+# arquivos gravados por outros processos
+FOLGA_DISCO = 0.9
+INTERVALO_LIMPEZA_DISCO = 10 * 60
+
+def chave_pdf(dados_usuario, classificacao, programa, adaptacao, exercicios, restricoes):
+    """Hash do conteúdo que determina o PDF: plano, restrições, nome e data de geração"""
+    conteudo = {
+        "nome": dados_usuario.get('nome', ''),
+        "data": datetime.now().strftime('%d/%m/%Y'),
+        "classificacao": classificacao,
+        "programa": programa,
+        "adaptacao": adaptacao,
+        "exercicios": exercicios,
+        "restricoes": list(restricoes),
+    }
+    serializado = json.dumps(conteudo, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(serializado.encode('utf-8')).hexdigest()
+
+class CachePDF:
+    """LRU de PDFs prontos, limitado por bytes totais e por validade (TTL)"""
+
+    def __init__(self, limite_bytes=LIMITE_BYTES, validade=VALIDADE_SEGUNDOS, diretorio=DIRETORIO_DISCO):
+        self.limite_bytes = limite_bytes
+        self.validade = validade
+        self.diretorio = diretorio
+        self._itens = collections.OrderedDict()  # chave -> (criado_em, bytes)
+        self._bytes = 0
+        self._trava = threading.Lock()
+        self.acertos_memoria = 0
+        self.acertos_disco = 0
+        self.falhas = 0
+        self.despejos = 0
+        self._bytes_disco = None  # estimativa; None até a primeira varredura
+        self._limpeza_disco_em = 0.0
+        self._trava_disco = threading.Lock()
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+
+    def _caminho(self, chave):
+        return os.path.join(self.diretorio, f"{chave}.pdf")
+
+    def _remover(self, chave):
+        _, conteudo = self._itens.pop(chave)
+        self._bytes -= len(conteudo)
+
+    def _guardar_memoria(self, chave, conteudo, criado_em):
+        if len(conteudo) > self.limite_bytes:
+            return
+        if chave in self._itens:
+            self._remover(chave)
+        self._itens[chave] = (criado_em, conteudo)
+        self._bytes += len(conteudo)
+        # Despeja os menos usados recentemente até caber no limite
+        while self._bytes > self.limite_bytes:
+            self._remover(next(iter(self._itens)))
+            self.despejos += 1
+
+    def _ler_disco(self, chave):
+        if not self.diretorio:
+            return None
+        caminho = self._caminho(chave)
+        try:
+            criado_em = os.path.getmtime(caminho)
+            if time.time() - criado_em > self.validade:
+                os.remove(caminho)
+                return None
+            with open(caminho, 'rb') as arquivo:
+                return criado_em, arquivo.read()
+        except OSError:
+            return None
+
+    def _gravar_disco(self, chave, conteudo):
+        if not self.diretorio:
+            return
+        try:
+            # Grava num temporário e renomeia: leitores nunca veem um PDF pela metade
+            temporario = f"{self._caminho(chave)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temporario, 'wb') as arquivo:
+                arquivo.write(conteudo)
+            os.replace(temporario, self._caminho(chave))
+        except OSError:
+            return
+        with self._trava:
+            if self._bytes_disco is not None:
+                self._bytes_disco += len(conteudo)
+            limpar = (
+                self._bytes_disco is None
+                or self._bytes_disco > self.limite_bytes
+                or time.monotonic() - self._limpeza_disco_em >= INTERVALO_LIMPEZA_DISCO
+            )
+        if limpar:
+            self._limpar_disco()
+
+    def _limpar_disco(self):
+        """Apaga os arquivos vencidos e os mais antigos até FOLGA_DISCO do limite de bytes"""
+        # Uma varredura por vez; quem chega enquanto isso segue sem esperar
+        if not self._trava_disco.acquire(blocking=False):
+            return
+        try:
+            agora = time.time()
+            arquivos = []
+            for nome in os.listdir(self.diretorio):
+                if not nome.endswith('.pdf'):
+                    continue
+                caminho = os.path.join(self.diretorio, nome)
+                try:
+                    estado = os.stat(caminho)
+                    if agora - estado.st_mtime > self.validade:
+                        os.remove(caminho)
+                    else:
+                        arquivos.append((estado.st_mtime, estado.st_size, caminho))
+                except OSError:
+                    continue  # Removido por outro processo no meio da varredura
+            total = sum(tamanho for _, tamanho, _ in arquivos)
+            if total > self.limite_bytes:
+                for _, tamanho, caminho in sorted(arquivos):
+                    if total <= self.limite_bytes * FOLGA_DISCO:
+                        break
+                    try:
+                        os.remove(caminho)
+                    except OSError:
+                        pass
+                    total -= tamanho
+            with self._trava:
+                self._bytes_disco = total
+                self._limpeza_disco_em = time.monotonic()
+        except OSError:
+            pass
+        finally:
+            self._trava_disco.release()
+
+    def obter(self, chave):
+        """Retorna os bytes do PDF em cache ou None"""
+        with self._trava:
+            item = self._itens.get(chave)
+            if item is not None:
+                if time.time() - item[0] <= self.validade:
+                    self._itens.move_to_end(chave)
+                    self.acertos_memoria += 1
+                    return item[1]
+                self._remover(chave)
+
+        item = self._ler_disco(chave)
+        with self._trava:
+            if item is None:
+                self.falhas += 1
+                return None
+            self.acertos_disco += 1
+            self._guardar_memoria(chave, item[1], item[0])
+            return item[1]
+
+    def guardar(self, chave, conteudo):
+        with self._trava:
+            self._guardar_memoria(chave, conteudo, time.time())
+        self._gravar_disco(chave, conteudo)
+
+    def limpar(self):
+        with self._trava:
+            self._itens.clear()
+            self._bytes = 0
+
+    def estatisticas(self):
+        """Contadores para dimensionar o cache"""
+        with self._trava:
+            consultas = self.acertos_memoria + self.acertos_disco + self.falhas
+            return {
+                "itens": len(self._itens),
+                "bytes": self._bytes,
+                "limite_bytes": self.limite_bytes,
+                "acertos_memoria": self.acertos_memoria,
+                "acertos_disco": self.acertos_disco,
+                "falhas": self.falhas,
+                "despejos": self.despejos,
+                "taxa_acerto": (self.acertos_memoria + self.acertos_disco) / consultas if consultas else 0.0,
+            }
+
+# Cache compartilhado pelo processo
+cache_pdf = CachePDF()
+
+def gerar_pdf_em_cache(dados_usuario, classificacao, programa, adaptacao, exercicios, restricoes):
+    """Mesmo contrato de gerar_pdf, servindo PDFs repetidos do cache"""
+    chave = chave_pdf(dados_usuario, classificacao, programa, adaptacao, exercicios, restricoes)
+    conteudo = cache_pdf.obter(chave)
+    if conteudo is None:
+        # ReportLab e pypdf só carregam quando um PDF precisa mesmo ser gerado
+        from utils.modelos_pdf import gerar_pdf_por_modelo
+        buffer, erro = gerar_pdf_por_modelo(dados_usuario, classificacao, programa, adaptacao, exercicios, restricoes)
+        if erro or not buffer:
+            return buffer, erro
+        conteudo = buffer.getvalue()
+        cache_pdf.guardar(chave, conteudo)
+    return io.BytesIO(conteudo), ""  # Sucesso
+
+def estatisticas_cache_pdf():
+    return cache_pdf.estatisticas()
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+from utils.training_logic import MOTOR_REGRAS
+
+# Colunas lidas pelas versões em lote (mesmas chaves das respostas do formulário)
+COLUNAS_CLASSIFICACAO = list(MOTOR_REGRAS.campos_pontuacao)
+COLUNAS_RESTRICOES = list(MOTOR_REGRAS.campos_restricoes)
+
+# Bit de cada restrição na máscara: bit i <-> RESTRICOES[i]
+BITS_RESTRICOES = {restricao: 1 << i for i, restricao in enumerate(MOTOR_REGRAS.nomes_restricoes)}
+
+# Tabelas do motor de regras como arrays, indexadas pelos mesmos códigos
+_PONTUACAO = np.array(MOTOR_REGRAS.tabela_pontuacao)
+_PERFIS = np.array(MOTOR_REGRAS.tabela_perfis, dtype=object)
+_MASCARAS = np.array(MOTOR_REGRAS.tabela_mascaras, dtype=np.uint8 if len(BITS_RESTRICOES) <= 8 else np.uint64)
+
+def codificar_coluna(df, campo):
+    """Códigos do motor de regras (MotorDeRegras.codificar) para uma coluna inteira"""
+    definicao = MOTOR_REGRAS.campos[campo]
+    serie = df[campo]
+    if definicao["numerica"]:
+        # Opção exata ou a primeira entrada de "fora" que servir; vazios e texto caem na última
+        numeros = pd.to_numeric(serie, errors='coerce').to_numpy(dtype=float)
+        codigos = np.full(len(numeros), -1, dtype=np.int64)
+        for opcao, codigo in definicao["codigos"].items():
+            codigos[numeros == opcao] = codigo
+        for limite, codigo in definicao["fora"]:
+            livres = codigos < 0
+            if limite is not None:
+                livres &= numeros >= limite
+            codigos[livres] = codigo
+        return codigos
+
+    codigos, outros = definicao["codigos"], definicao["outros"]
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        # Codifica só as categorias; o código -1 (vazio) cai no último item, "outros"
+        tabela = np.array([codigos.get(c, outros) for c in serie.cat.categories] + [outros], dtype=np.int64)
+        return tabela[serie.cat.codes.to_numpy()]
+    return serie.map(codigos).fillna(outros).to_numpy(dtype=np.int64)
+
+def _indices(df, campos, passos):
+    indice = np.zeros(len(df), dtype=np.int64)
+    for campo, passo in zip(campos, passos):
+        indice += codificar_coluna(df, campo) * passo
+    return indice
+
+def _indices_pontuacao(df):
+    return _indices(df, MOTOR_REGRAS.campos_pontuacao, MOTOR_REGRAS.passos_pontuacao)
+
+def pontuar_lote(df):
+    """Pontuação de calcular_classificacao para cada linha do DataFrame"""
+    return _PONTUACAO[_indices_pontuacao(df)]
+
+def classificar_lote(df):
+    """calcular_classificacao para cada linha; retorna uma Series com o mesmo índice"""
+    return pd.Series(_PERFIS[_indices_pontuacao(df)], index=df.index)
+
+def mascara_restricoes_lote(df):
+    """identificar_restricoes para cada linha, como máscara de bits (ver BITS_RESTRICOES)"""
+    return _MASCARAS[_indices(df, MOTOR_REGRAS.campos_restricoes, MOTOR_REGRAS.passos_restricoes)]
+
+def restricoes_da_mascara(mascara):
+    """Lista de restrições de uma máscara, na mesma ordem de identificar_restricoes"""
+    return list(MOTOR_REGRAS.tabela_restricoes[int(mascara)])
+
+def classificar_submissoes(df):
+    """DataFrame com pontuação, classificação e máscara de restrições de cada submissão"""
+    indices = _indices_pontuacao(df)
+    return pd.DataFrame({
+        'pontuacao': _PONTUACAO[indices],
+        'classificacao': _PERFIS[indices],
+        'restricoes': mascara_restricoes_lote(df),
+    }, index=df.index)
@@ -0,0 +1,113 @@
+import threading
+import time
+
+# Envia quando o lote enche ou quando a janela de tempo fecha, o que vier primeiro
+TAMANHO_LOTE = 50
+JANELA_SEGUNDOS = 2.0
+
+class EscritorEmSegundoPlano:
+    """Replica as linhas do spool local para o destino em lotes, numa thread própria.
+
+    `enfileirar` só grava no spool (utils.spool.Spool) e acorda a thread.
+    A thread lê as linhas além do cursor e chama
+    `gravar_lote(submissoes, verificar_duplicatas)`, onde `submissoes` é uma
+    lista de (submissao_id, linha); o retorno segue o formato
+    (sucesso, mensagem_erro) de utils.gsheets. O cursor só avança depois
+    da confirmação, e quando o envio anterior ficou sem resposta o próximo
+    pede verificação de duplicatas, então reenviar é idempotente.
+    """
+
+    def __init__(self, spool, gravar_lote, nome_cursor="sheets",
+                 tamanho_lote=TAMANHO_LOTE, janela=JANELA_SEGUNDOS):
+        self._spool = spool
+        self._gravar_lote = gravar_lote
+        self._nome_cursor = nome_cursor
+        self._tamanho_lote = tamanho_lote
+        self._janela = janela
+        self._condicao = threading.Condition()
+        self._forcar = False
+        self._parar = False
+        self.ultimo_erro = None
+        self._thread = threading.Thread(target=self._executar, name=f"escritor-{nome_cursor}", daemon=True)
+        self._thread.start()
+
+    def enfileirar(self, linha, submissao_id=None):
+        """Grava a linha no spool local, acorda a thread e retorna o submissao_id"""
+        submissao_id = self._spool.registrar(linha, submissao_id)
+        with self._condicao:
+            self._condicao.notify_all()
+        return submissao_id
+
+    def tamanho_fila(self):
+        """Linhas gravadas no spool e ainda não confirmadas pelo destino"""
+        return self._spool.contar_pendentes(self._nome_cursor)
+
+    def descarregar(self, timeout=None):
+        """Envia imediatamente o que estiver pendente e espera esvaziar; retorna True se esvaziou"""
+        prazo = None if timeout is None else time.monotonic() + timeout
+        with self._condicao:
+            self._forcar = True
+            self._condicao.notify_all()
+            while self.tamanho_fila() and self._thread.is_alive():
+                restante = None if prazo is None else prazo - time.monotonic()
+                if restante is not None and restante <= 0:
+                    break
+                self._condicao.wait(restante)
+            return self.tamanho_fila() == 0
+
+    def encerrar(self, timeout=None):
+        """Tenta enviar o que falta e para a thread; o que sobrar fica no spool para o próximo processo"""
+        with self._condicao:
+            self._parar = True
+            self._condicao.notify_all()
+        self._thread.join(timeout)
+        return self.tamanho_fila() == 0
+
+    def _proximo_lote(self):
+        """Espera até ter um lote pronto; retorna None quando deve parar"""
+        with self._condicao:
+            while not self.tamanho_fila() and not self._parar:
+                # Timeout de segurança: também pega linhas gravadas por outra instância do spool
+                self._condicao.wait(self._janela * 10)
+            if not self.tamanho_fila():
+                return None
+
+            # Segura a janela para juntar mais linhas no mesmo append_rows
+            prazo = time.monotonic() + self._janela
+            while self.tamanho_fila() < self._tamanho_lote and not (self._forcar or self._parar):
+                restante = prazo - time.monotonic()
+                if restante <= 0:
+                    break
+                self._condicao.wait(restante)
+
+        return self._spool.pendentes(self._nome_cursor, self._tamanho_lote)
+
+    def _executar(self):
+        while True:
+            lote = self._proximo_lote()
+            if lote is None:
+                return
+
+            try:
+                verificar = self._spool.envio_incerto(self._nome_cursor)
+                self._spool.marcar_envio(self._nome_cursor)
+                sucesso, erro = self._gravar_lote(
+                    [(submissao_id, linha) for _, submissao_id, linha in lote],
+                    verificar
+                )
+                if sucesso:
+                    self._spool.avancar_cursor(self._nome_cursor, lote[-1][0])
+            except Exception as e:
+                sucesso, erro = False, f"🚨 Erro geral: {str(e)}"
+
+            with self._condicao:
+                self.ultimo_erro = None if sucesso else erro
+                if not self.tamanho_fila():
+                    self._forcar = False
+                self._condicao.notify_all()
+
+                if not sucesso:
+                    if self._parar:
+                        return
+                    # As linhas continuam no spool; espera uma janela antes de tentar de novo
+                    self._condicao.wait(self._janela)
@@ -0,0 +1,242 @@
+import collections
+import concurrent.futures
+import concurrent.futures.process
+import io
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+from utils.cache_pdf import cache_pdf, chave_pdf
+from utils.metricas import coletar, registrar, registrar_varios
+
+# Processos que renderizam PDFs e quantos trabalhos (em execução + esperando) são aceitos
+PROCESSOS = int(os.environ.get('ROCKRUN_PDF_PROCESSOS', os.cpu_count() or 1))
+LIMITE_FILA = int(os.environ.get('ROCKRUN_PDF_FILA_MAX', PROCESSOS * 8))
+
+# Erro de enviar quando não há vaga; é o único que vale a pena esperar passar
+FILA_CHEIA = "Fila de PDFs cheia"
+
+def _renderizar(dados_usuario, classificacao, programa, adaptacao, exercicios, restricoes):
+    """Executa no processo filho; devolve bytes (BytesIO não atravessa o pool tão bem) e as medidas das etapas"""
+    # Importado aqui: só os processos filhos carregam ReportLab e pypdf
+    from utils.modelos_pdf import gerar_pdf_por_modelo
+    # As medidas voltam com o resultado e são registradas nas métricas do processo principal
+    with coletar() as medidas:
+        buffer, erro = gerar_pdf_por_modelo(dados_usuario, classificacao, programa, adaptacao, exercicios, restricoes)
+    return (buffer.getvalue() if buffer else None), erro, medidas
+
+# Dados de exemplo para o PDF descartável do aquecimento de cada processo
+RESPOSTAS_AQUECIMENTO = {
+    'nome': "Aquecimento",
+    'objetivo': "Melhorar a saúde geral",
+}
+
+def _iniciar_processo(prontos):
+    """Inicializador de cada processo filho: aquece o ReportLab e avisa o pai por `prontos` com (pid, erro)"""
+    erro = ""
+    # As medidas do aquecimento são descartadas: não entram nos histogramas do envio
+    with coletar():
+        try:
+            from utils.pdf_generator import gerar_pdf
+            from utils.training_logic import gerar_programa_treino, adaptar_por_objetivo, gerar_exercicios_complementares
+            # PDF descartável pelo layout completo: carrega fontes, estilos e seções fixas
+            programa = gerar_programa_treino("INICIANTE", RESPOSTAS_AQUECIMENTO)
+            adaptacao = adaptar_por_objetivo(programa, RESPOSTAS_AQUECIMENTO['objetivo'])
+            _, erro = gerar_pdf(RESPOSTAS_AQUECIMENTO, "INICIANTE", programa, adaptacao, gerar_exercicios_complementares(), [])
+        except Exception as e:
+            # Exceção no inicializador quebraria o pool; o PDF de verdade tenta de novo
+            erro = f"{type(e).__name__}: {str(e)}"
+    prontos.put((os.getpid(), erro))
+
+    # Os modelos de PDF demoram alguns segundos e não seguram o processo: ficam numa thread
+    threading.Thread(target=_pre_renderizar_modelos, name="modelos_pdf", daemon=True).start()
+
+def _pre_renderizar_modelos():
+    with coletar():
+        try:
+            from utils.modelos_pdf import pre_renderizar_modelos
+            pre_renderizar_modelos()
+        except Exception:
+            pass  # Sem o modelo, o PDF é montado sob demanda em obter_modelo
+
+def _subir_processo():
+    """Trabalho vazio: só força a subida de um processo do pool"""
+    return os.getpid()
+
+class TrabalhoPDF:
+    """PDF encomendado ao pool; consultado pela sessão enquanto espera"""
+
+    def __init__(self, futura, numero):
+        self.futura = futura
+        self.numero = numero
+
+    def pronto(self):
+        return self.futura.done()
+
+    def posicao(self):
+        """0 se já está renderizando; senão quantos trabalhos estão na frente esperando um processo"""
+        return _fila.posicao(self)
+
+    def resultado(self, timeout=None):
+        """(BytesIO, "") em caso de sucesso ou (None, mensagem), como gerar_pdf"""
+        try:
+            conteudo, erro, _ = self.futura.result(timeout)
+        except concurrent.futures.TimeoutError:
+            return None, "Tempo esgotado esperando o PDF"
+        except Exception as e:
+            return None, f"Erro ao gerar PDF: {str(e)}"
+        if erro or conteudo is None:
+            return None, erro
+        return io.BytesIO(conteudo), ""
+
+class FilaPDF:
+    """Pool de processos limitado para tirar o layout do ReportLab da thread da sessão"""
+
+    def __init__(self, processos=PROCESSOS, limite=LIMITE_FILA):
+        self.processos = processos
+        self.limite = limite
+        self._trava = threading.Lock()
+        self._executor = None
+        self._prontos = None
+        self._ativos = collections.OrderedDict()  # numero -> TrabalhoPDF, na ordem de chegada
+        self._proximo_numero = 0
+
+    def _obter_executor(self):
+        """Pool atual (chamar com a trava); um pool novo já sobe todos os seus processos aqui"""
+        if self._executor is None:
+            # spawn: o servidor do Streamlit tem várias threads, fork não é seguro
+            contexto = multiprocessing.get_context("spawn")
+            # Cada processo do pool avisa aqui quando termina o aquecimento
+            self._prontos = contexto.Queue()
+            executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.processos,
+                mp_context=contexto,
+                initializer=_iniciar_processo,
+                initargs=(self._prontos,)
+            )
+            # O pool só sobe um processo por envio que não acha processo ocioso: envios vazios
+            # simultâneos sobem todos agora. Nenhum nasce depois, num envio qualquer que
+            # coincida com a saída do interpretador e fique sem o aviso de parada
+            try:
+                for _ in range(self.processos):
+                    executor.submit(_subir_processo)
+            except Exception:
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+            self._executor = executor
+        return self._executor
+
+    def _descartar_executor(self, executor):
+        """Encerra um pool quebrado (chamar com a trava); o próximo envio sobe um novo"""
+        if executor is not None and executor is self._executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def tamanho(self):
+        with self._trava:
+            return len(self._ativos)
+
+    def posicao(self, trabalho):
+        with self._trava:
+            if trabalho.numero not in self._ativos:
+                return 0
+            na_frente = 0
+            for numero in self._ativos:
+                if numero == trabalho.numero:
+                    break
+                na_frente += 1
+            return max(0, na_frente - self.processos + 1)
+
+    def _concluir(self, numero, chave, futura, enviado_em, executor):
+        with self._trava:
+            self._ativos.pop(numero, None)
+            if not futura.cancelled() and isinstance(futura.exception(), concurrent.futures.process.BrokenProcessPool):
+                # Um processo morreu durante o trabalho: não espera o próximo envio falhar
+                self._descartar_executor(executor)
+        # Alimenta o cache do processo principal com o PDF pronto
+        if not futura.cancelled() and futura.exception() is None:
+            conteudo, erro, medidas = futura.result()
+            registrar_varios(medidas)
+            registrar("gerar_pdf.fila_total", time.perf_counter() - enviado_em)
+            if conteudo and not erro:
+                cache_pdf.guardar(chave, conteudo)
+
+    def subir(self):
+        """Sobe os processos do pool na thread atual, sem esperar o aquecimento; retorna "" ou o erro"""
+        with self._trava:
+            try:
+                self._obter_executor()
+            except (concurrent.futures.process.BrokenProcessPool, RuntimeError, OSError) as e:
+                return f"{type(e).__name__}: {str(e)}"
+        return ""
+
+    def aquecer(self, timeout=None):
+        """Sobe todos os processos do pool e espera o aquecimento de cada um; retorna (prontos, erros)"""
+        erro = self.subir()
+        if erro:
+            return 0, [erro]
+        with self._trava:
+            prontos = self._prontos
+
+        # Conta os avisos dos inicializadores (um por processo), não as respostas aos envios
+        limite = None if timeout is None else time.monotonic() + timeout
+        processos, erros = set(), []
+        while len(processos) < self.processos:
+            espera = None if limite is None else max(0.0, limite - time.monotonic())
+            try:
+                pid, erro = prontos.get(timeout=espera)
+            except queue.Empty:
+                break
+            processos.add(pid)
+            if erro:
+                erros.append(erro)
+        return len(processos) - len(erros), erros
+
+    def enviar(self, dados_usuario, classificacao, programa, adaptacao, exercicios, restricoes):
+        """Encomenda o PDF; retorna (TrabalhoPDF, "") ou (None, mensagem) se a fila estiver cheia"""
+        argumentos = (dados_usuario, classificacao, programa, adaptacao, exercicios, restricoes)
+        chave = chave_pdf(*argumentos)
+
+        # Já renderizado: devolve um trabalho concluído, sem passar pelo pool
+        conteudo = cache_pdf.obter(chave)
+        if conteudo is not None:
+            futura = concurrent.futures.Future()
+            futura.set_result((conteudo, "", []))
+            return TrabalhoPDF(futura, -1), ""
+
+        with self._trava:
+            if len(self._ativos) >= self.limite:
+                return None, FILA_CHEIA
+            numero = self._proximo_numero
+            self._proximo_numero += 1
+            enviado_em = time.perf_counter()
+            executor = None
+            try:
+                executor = self._obter_executor()
+                futura = executor.submit(_renderizar, *argumentos)
+            except (concurrent.futures.process.BrokenProcessPool, RuntimeError, OSError) as e:
+                # Processo do pool morreu (ex.: falta de memória), pool encerrado ou falha ao subir um processo
+                self._descartar_executor(executor)
+                return None, f"Pool de PDFs indisponível: {str(e)}"
+            trabalho = TrabalhoPDF(futura, numero)
+            self._ativos[numero] = trabalho
+        futura.add_done_callback(lambda f: self._concluir(numero, chave, f, enviado_em, executor))
+        return trabalho, ""
+
+# Pool compartilhado pelo processo do servidor
+_fila = FilaPDF()
+
+def enviar_pdf(dados_usuario, classificacao, programa, adaptacao, exercicios, restricoes):
+    return _fila.enviar(dados_usuario, classificacao, programa, adaptacao, exercicios, restricoes)
+
+def subir_fila_pdf():
+    return _fila.subir()
+
+def aquecer_fila_pdf(timeout=None):
+    return _fila.aquecer(timeout)
+
+def tamanho_fila_pdf():
+    """Trabalhos em execução ou esperando no pool de PDFs"""
+    return _fila.tamanho()
@@ -1,88 +1,310 @@
-import gspread
-from google.oauth2.service_account import Credentials
+# gspread e google-auth são importados só na primeira conexão: o formulário
+# abre sem pagar por eles
+import atexit
 import datetime
+import os
+import threading
+import time
+
+from utils.armazenamento import CABECALHOS, CABECALHOS_GRAVADOS, POSICAO_ID, linha_gravada
+from utils.escritor import EscritorEmSegundoPlano
+from utils.metricas import medir
+from utils.resiliencia import (
+    Disjuntor,
+    DisjuntorAberto,
+    LimitadorDeTaxa,
+    executar_com_retentativas
+)
+from utils.spool import CAMINHO_SPOOL, Spool
+
+# ID da planilha
+SHEET_ID = "1WdcJclPYrrLoBJfIRrNLd9WEVJ9v2Rh5bekmwlAGjb0"
+
+# Escopos necessários
+ESCOPOS = [
+    'https://www.googleapis.com/auth/spreadsheets',
+    'https://www.googleapis.com/auth/drive'
+]
+
+# Renova o token com antecedência para nenhuma requisição esbarrar na expiração
+MARGEM_RENOVACAO = datetime.timedelta(minutes=5)
+
+# Cabeçalho que não confere é lembrado; a linha 1 só é lida de novo depois deste tempo
+RECONFERIR_CABECALHO_SEGUNDOS = 5 * 60
+
+# Conexão compartilhada pelo processo inteiro (todas as sessões do Streamlit)
+_trava = threading.RLock()
+_credenciais = None
+_cliente = None
+_planilha = None
+_folha = None
+_cabecalho_verificado = False
+_erro_cabecalho = None  # (reconferir_em, mensagem) da última linha 1 que não conferiu
+_spool = None
+_escritor = None
+
+# Cursor do spool que marca até onde a planilha já confirmou
+CURSOR_SHEETS = "sheets"
+
+# Protege a cota (uma ficha por requisição à API) e evita martelar a API durante uma queda
+_limitador = LimitadorDeTaxa()
+_disjuntor = Disjuntor()
+
+class CabecalhosDivergentes(Exception):
+    """Linha 1 da planilha não confere: planilha errada não é queda, não conta no disjuntor"""
+
+def _carregar_credenciais():
+    """Carrega as credenciais da conta de serviço"""
+    from google.oauth2.service_account import Credentials
+
+    # Tenta usar as credenciais do Streamlit (secrets)
+    try:
+        from streamlit import secrets
+        return Credentials.from_service_account_info(
+            secrets["gcp_service_account"],
+            scopes=ESCOPOS
+        )
+    except:
+        # Fallback para arquivo local (em desenvolvimento)
+        CREDENTIALS_PATH = 'credentials.json'
+        return Credentials.from_service_account_file(
+            CREDENTIALS_PATH,
+            scopes=ESCOPOS
+        )
+
+def _token_expirando(credenciais):
+    """Indica se o token ainda não existe ou expira dentro da margem de renovação"""
+    if not credenciais.token or credenciais.expiry is None:
+        return True
+    # expiry das credenciais do google-auth é UTC sem fuso
+    agora = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    return credenciais.expiry - MARGEM_RENOVACAO <= agora
+
+def resetar_conexao():
+    """Descarta o cliente compartilhado para que seja recriado na próxima chamada"""
+    global _credenciais, _cliente, _planilha, _folha, _cabecalho_verificado, _erro_cabecalho
+    with _trava:
+        _credenciais = _cliente = _planilha = _folha = None
+        _cabecalho_verificado = False
+        _erro_cabecalho = None
+
+def erro_de_autenticacao(e):
+    """Indica se um APIError do Google veio de credenciais inválidas ou expiradas"""
+    return getattr(e.response, 'status_code', None) in (401, 403)
+
+def _conectar():
+    """Cliente compartilhado, autorizando só quando necessário; levanta a exceção original"""
+    global _credenciais, _cliente
+    import gspread
+    from google.auth.transport.requests import Request
+
+    try:
+        with _trava:
+            if _cliente is None:
+                with medir("sheets.autenticar"):
+                    _credenciais = _carregar_credenciais()
+                    _cliente = gspread.authorize(_credenciais)
+
+            # Renovação proativa, antes que alguma requisição receba um 401
+            if _token_expirando(_credenciais):
+                with medir("sheets.autenticar"):
+                    _credenciais.refresh(Request())
+
+            return _cliente
+    except Exception:
+        resetar_conexao()
+        raise
+
+def _abrir_planilha():
+    """Planilha aberta, reaproveitando o handle entre submissões; levanta a exceção original"""
+    import gspread
+
+    global _planilha
+    cliente = _conectar()
+    try:
+        with _trava:
+            if _planilha is None:
+                _limitador.adquirir()
+                with medir("sheets.abrir"):
+                    _planilha = cliente.open_by_key(SHEET_ID)
+            return _planilha
+    except gspread.exceptions.APIError as e:
+        if erro_de_autenticacao(e):
+            resetar_conexao()
+        raise
+
+def _abrir_folha():
+    """Primeira aba da planilha, reaproveitando o handle entre submissões; levanta a exceção original"""
+    global _folha
+    planilha = _abrir_planilha()
+    with _trava:
+        if _folha is None:
+            _limitador.adquirir()  # sheet1 busca os metadados da planilha
+            with medir("sheets.abrir"):
+                _folha = planilha.sheet1
+        return _folha
 
 def conectar_google_sheets():
-    """Conecta ao Google Sheets API"""
+    """Retorna o cliente compartilhado do Google Sheets, autorizando só quando necessário"""
     try:
-        # Escopos necessários
-        escopos = [
-            'https://www.googleapis.com/auth/spreadsheets',
-            'https://www.googleapis.com/auth/drive'
-        ]
-        
-        # Tenta usar as credenciais do Streamlit (secrets)
-        try:
-            from streamlit import secrets
-            credenciais = Credentials.from_service_account_info(
-                secrets["gcp_service_account"],
-                scopes=escopos
-            )
-        except:
-            # Fallback para arquivo local (em desenvolvimento)
-            CREDENTIALS_PATH = 'credentials.json'
-            credenciais = Credentials.from_service_account_file(
-                CREDENTIALS_PATH, 
-                scopes=escopos
-            )
-        
-        cliente = gspread.authorize(credenciais)
-        return cliente, None  # Sucesso: retorna cliente e None para erro
-    
+        return _conectar(), None  # Sucesso: retorna cliente e None para erro
     except Exception as e:
         return None, f"🚨 Erro na conexão: {str(e)}"  # Falha: retorna None e mensagem de erro
 
-def salvar_dados_sheets(respostas, classificacao):
-    """Salva os dados na planilha do Google Sheets"""
+def obter_planilha():
+    """Retorna a planilha aberta, reaproveitando o handle entre submissões"""
+    import gspread
+
+    cliente, erro = conectar_google_sheets()
+    if erro or not cliente:
+        return None, erro or "Falha desconhecida na conexão"
+
     try:
-        cliente, erro = conectar_google_sheets()
-        if erro or not cliente:
-            return False, erro or "Falha desconhecida na conexão"
-        
-        # ID da planilha
-        SHEET_ID = "1WdcJclPYrrLoBJfIRrNLd9WEVJ9v2Rh5bekmwlAGjb0"
-        
-        # Abre a planilha
-        planilha = cliente.open_by_key(SHEET_ID)
-        
-        # Seleciona a primeira aba
-        folha = planilha.sheet1
-        
-        # Cabeçalhos
-        cabecalhos = [
-            "Timestamp", "Nome", "Telefone", "Perfil", "Objetivo", 
-            "Idade", "Sexo", "Condicao_Fisica", "Dias_Semana", 
-            "Tempo_Treino", "Horario", "Local", "Lesoes"
-        ]
-        
-        # Verifica se precisa adicionar cabeçalhos
-        if not folha.get_all_values():
-            folha.append_row(cabecalhos)
-        
-        # Prepara os dados
-        dados = [
-            datetime.datetime.now().strftime("%d/%m/%Y %H:%M"),  # Timestamp
-            respostas.get('nome', ''),
-            respostas.get('telefone', ''),
-            classificacao,
-            respostas.get('objetivo', ''),
-            respostas.get('idade', ''),
-            respostas.get('sexo', ''),
-            str(respostas.get('condicao_fisica', '')),  # Converte para string
-            respostas.get('dias_semana', ''),
-            respostas.get('tempo_treino', ''),
-            respostas.get('horario', ''),
-            respostas.get('local', ''),
-            respostas.get('lesoes', '')
-        ]
-        
-        # Adiciona nova linha
-        folha.append_row(dados)
+        return _abrir_planilha(), None
+
+    except gspread.exceptions.APIError as e:
+        error_msg = e.response.json().get('error', {}).get('message', str(e))
+        return None, f"🚨 Erro API Google: {error_msg}"
+
+    except Exception as e:
+        return None, f"🚨 Erro geral: {str(e)}"
+
+def obter_folha():
+    """Retorna a primeira aba da planilha, reaproveitando o handle entre submissões"""
+    planilha, erro = obter_planilha()
+    if erro or not planilha:
+        return None, erro or "Falha desconhecida na conexão"
+    return _abrir_folha(), None
+
+def verificar_cabecalhos(folha):
+    """Garante que a linha 1 da folha contém CABECALHOS_GRAVADOS; retorna mensagem de erro ou None"""
+    global _cabecalho_verificado, _erro_cabecalho
+    with _trava:
+        # Já conferido neste processo: nenhuma requisição extra
+        if _cabecalho_verificado:
+            return None
+        # Não conferiu há pouco: o escritor tenta a cada janela, sem reler a linha 1 toda vez
+        if _erro_cabecalho and time.monotonic() < _erro_cabecalho[0]:
+            return _erro_cabecalho[1]
+
+        # Lê apenas a linha 1, não a planilha inteira
+        esperado = CABECALHOS_GRAVADOS
+        with medir("sheets.cabecalho"):
+            _limitador.adquirir()
+            primeira_linha = folha.row_values(1)
+            # Planilha anterior às últimas colunas (id, respostas de saúde): o começo confere
+            anterior = (POSICAO_ID <= len(primeira_linha) < len(esperado)
+                        and primeira_linha == esperado[:len(primeira_linha)])
+            if not primeira_linha:
+                _limitador.adquirir()
+                folha.append_row(esperado)
+            elif anterior:
+                # Só acrescenta os cabeçalhos que faltam, no fim da linha 1
+                from gspread.utils import rowcol_to_a1
+                _limitador.adquirir()
+                folha.update([esperado[len(primeira_linha):]], rowcol_to_a1(1, len(primeira_linha) + 1))
+        if primeira_linha and not anterior and primeira_linha != esperado:
+            erro = f"🚨 Cabeçalhos da planilha não conferem: esperado {esperado}, encontrado {primeira_linha}"
+            _erro_cabecalho = (time.monotonic() + RECONFERIR_CABECALHO_SEGUNDOS, erro)
+            return erro
+
+        _cabecalho_verificado = True
+        _erro_cabecalho = None
+        return None
+
+def anexar_submissoes(submissoes, verificar_duplicatas=False):
+    """Anexa [(submissao_id, linha)] à planilha com uma única chamada append_rows.
+
+    Com `verificar_duplicatas`, lê a coluna de ids e descarta as submissões
+    que já chegaram à planilha (envio anterior que caiu sem confirmação).
+    """
+    import gspread
+
+    try:
+        incerto = [verificar_duplicatas]
+
+        # Conexão, cabeçalho e envio passam juntos pelo disjuntor:
+        # uma queda já na autenticação também conta falha e abre o circuito
+        def enviar(tentativa):
+            folha = _abrir_folha()
+            # Verifica se precisa adicionar cabeçalhos
+            erro = verificar_cabecalhos(folha)
+            if erro:
+                raise CabecalhosDivergentes(erro)
+
+            pendentes = submissoes
+            if incerto[0]:
+                _limitador.adquirir()
+                ja_enviados = set(folha.col_values(POSICAO_ID + 1))
+                pendentes = [(sid, linha) for sid, linha in submissoes if sid not in ja_enviados]
+            try:
+                if pendentes:
+                    _limitador.adquirir()
+                    folha.append_rows([linha_gravada(sid, linha) for sid, linha in pendentes])
+            except gspread.exceptions.APIError as e:
+                # 429 garante que nada foi gravado; 5xx pode ter gravado parte
+                incerto[0] = incerto[0] or e.response.status_code != 429
+                raise
+            except Exception:
+                incerto[0] = True
+                raise
+
+        with medir("sheets.anexar"):
+            executar_com_retentativas(enviar, _disjuntor)
         return True, ""  # Sucesso sem mensagem de erro
-        
+
+    except CabecalhosDivergentes as e:
+        # As linhas continuam no spool até a planilha ser corrigida
+        return False, str(e)
+
+    except DisjuntorAberto as e:
+        # Falha rápida: as linhas continuam no spool até o circuito fechar
+        return False, f"🚨 {str(e)}"
+
     except gspread.exceptions.APIError as e:
+        # Credenciais revogadas/expiradas: recria o cliente na próxima submissão
+        if erro_de_autenticacao(e):
+            resetar_conexao()
         error_msg = e.response.json().get('error', {}).get('message', str(e))
         return False, f"🚨 Erro API Google: {error_msg}"
-        
+
     except Exception as e:
-        return False, f"🚨 Erro geral: {str(e)}"
\ No newline at end of file
+        return False, f"🚨 Erro geral: {str(e)}"
+
+def obter_spool():
+    """Spool local compartilhado pelo escritor e pelas leituras de diagnóstico"""
+    global _spool
+    with _trava:
+        if _spool is None:
+            _spool = Spool(CABECALHOS)
+        return _spool
+
+def obter_escritor():
+    """Retorna o escritor em segundo plano do processo, criando-o na primeira chamada"""
+    global _escritor
+    with _trava:
+        if _escritor is None:
+            _escritor = EscritorEmSegundoPlano(obter_spool(), anexar_submissoes, CURSOR_SHEETS)
+            atexit.register(encerrar_escritor)
+        return _escritor
+
+def tamanho_fila():
+    """Quantidade de linhas do spool local aguardando envio para a planilha (não sobe o escritor)"""
+    if _spool is None and not os.path.exists(CAMINHO_SPOOL):
+        return 0  # Nada foi gravado ainda: nem cria o arquivo
+    return obter_spool().contar_pendentes(CURSOR_SHEETS)
+
+def descarregar_fila(timeout=None):
+    """Força o envio imediato das linhas pendentes; retorna True se a fila esvaziou"""
+    return obter_escritor().descarregar(timeout)
+
+def encerrar_escritor(timeout=30):
+    """Descarrega a fila e para a thread de escrita (desligamento do processo)"""
+    return _escritor.encerrar(timeout) if _escritor else True
+
+def diagnostico_sheets():
+    """Estado do disjuntor, fichas da cota e fila do spool, para o painel de diagnóstico"""
+    diagnostico = _disjuntor.diagnostico()
+    diagnostico["fichas"] = _limitador.fichas_disponiveis()
+    diagnostico["fila"] = tamanho_fila()
+    return diagnostico
@@ -0,0 +1,209 @@
+import atexit
+import bisect
+import collections
+import contextlib
+import json
+import os
+import threading
+import time
+
+# Destinos opcionais: cada medida vira uma linha JSON; o texto Prometheus é
+# regravado periodicamente (formato do textfile collector do node_exporter),
+# um arquivo por processo: metricas.prom -> metricas.<pid>.prom
+ARQUIVO_JSONL = os.environ.get('ROCKRUN_METRICAS_JSONL')
+ARQUIVO_PROMETHEUS = os.environ.get('ROCKRUN_METRICAS_PROMETHEUS')
+INTERVALO_PROMETHEUS = float(os.environ.get('ROCKRUN_METRICAS_INTERVALO', 15))
+
+# Limites (segundos) dos baldes do histograma e medidas recentes usadas nos percentis
+LIMITES = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+AMOSTRAS_RECENTES = 2048
+
+QUANTIS = (0.5, 0.95, 0.99)
+
+class Histograma:
+    """Contagem por balde (acumulável, como no Prometheus) e janela de medidas recentes para os percentis"""
+    __slots__ = ("contagem", "soma", "maximo", "baldes", "recentes")
+
+    def __init__(self):
+        self.contagem = 0
+        self.soma = 0.0
+        self.maximo = 0.0
+        self.baldes = [0] * (len(LIMITES) + 1)  # o último é o +Inf
+        self.recentes = collections.deque(maxlen=AMOSTRAS_RECENTES)
+
+    def registrar(self, segundos):
+        self.contagem += 1
+        self.soma += segundos
+        self.maximo = max(self.maximo, segundos)
+        self.baldes[bisect.bisect_left(LIMITES, segundos)] += 1
+        self.recentes.append(segundos)
+
+    def quantis(self):
+        """p50/p95/p99 das medidas recentes (método do posto mais próximo)"""
+        ordenadas = sorted(self.recentes)
+        if not ordenadas:
+            return {q: 0.0 for q in QUANTIS}
+        return {q: ordenadas[min(len(ordenadas) - 1, int(q * len(ordenadas)))] for q in QUANTIS}
+
+class Metricas:
+    """Duração de cada etapa do envio, agregada por nome da etapa"""
+
+    def __init__(self, arquivo_jsonl=ARQUIVO_JSONL, arquivo_prometheus=ARQUIVO_PROMETHEUS):
+        self.arquivo_jsonl = arquivo_jsonl
+        self.arquivo_prometheus = arquivo_prometheus
+        self._histogramas = {}
+        self._trava = threading.Lock()
+        self._ultima_gravacao = 0.0
+        self._remocao_registrada = False
+        self._local = threading.local()
+
+    def registrar(self, etapa, segundos):
+        coletor = getattr(self._local, "coletor", None)
+        if coletor is not None:
+            # Dentro de coletar(): a medida volta para quem pediu (ex.: processo pai do pool de PDFs)
+            coletor.append((etapa, segundos))
+            return
+        with self._trava:
+            histograma = self._histogramas.get(etapa)
+            if histograma is None:
+                histograma = self._histogramas[etapa] = Histograma()
+            histograma.registrar(segundos)
+            if self.arquivo_jsonl:
+                self._gravar_jsonl(etapa, segundos)
+            if self.arquivo_prometheus and time.monotonic() - self._ultima_gravacao >= INTERVALO_PROMETHEUS:
+                self._ultima_gravacao = time.monotonic()
+                self._gravar_prometheus()
+
+    def registrar_varios(self, medidas):
+        for etapa, segundos in medidas:
+            self.registrar(etapa, segundos)
+
+    @contextlib.contextmanager
+    def medir(self, etapa):
+        """Registra quanto tempo o bloco levou (mesmo se levantar exceção)"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(etapa, time.perf_counter() - inicio)
+
+    @contextlib.contextmanager
+    def coletar(self):
+        """Guarda as medidas da thread numa lista em vez de registrá-las aqui"""
+        anterior = getattr(self._local, "coletor", None)
+        self._local.coletor = medidas = []
+        try:
+            yield medidas
+        finally:
+            self._local.coletor = anterior
+
+    def resumo(self):
+        """{etapa: {contagem, soma, maximo, p50, p95, p99}} em segundos, por nome da etapa"""
+        with self._trava:
+            itens = sorted(self._histogramas.items())
+            resumo = {}
+            for etapa, histograma in itens:
+                quantis = histograma.quantis()
+                resumo[etapa] = {
+                    "contagem": histograma.contagem,
+                    "soma": histograma.soma,
+                    "maximo": histograma.maximo,
+                    "p50": quantis[0.5],
+                    "p95": quantis[0.95],
+                    "p99": quantis[0.99],
+                }
+            return resumo
+
+    def exportar_prometheus(self):
+        """Histogramas no formato de texto do Prometheus, mais os percentis recentes"""
+        with self._trava:
+            return self._texto_prometheus()
+
+    def limpar(self):
+        with self._trava:
+            self._histogramas.clear()
+
+    def _texto_prometheus(self):
+        linhas = [
+            "# HELP rockrun_etapa_segundos Duração das etapas do envio do questionário",
+            "# TYPE rockrun_etapa_segundos histogram",
+        ]
+        # Cada processo do servidor tem seus próprios contadores: o pid separa as séries
+        pid = os.getpid()
+        for etapa, histograma in sorted(self._histogramas.items()):
+            rotulos = f'etapa="{etapa}",pid="{pid}"'
+            acumulado = 0
+            for limite, quantidade in zip(LIMITES + (float("inf"),), histograma.baldes):
+                acumulado += quantidade
+                le = "+Inf" if limite == float("inf") else repr(limite)
+                linhas.append(f'rockrun_etapa_segundos_bucket{{{rotulos},le="{le}"}} {acumulado}')
+            linhas.append(f'rockrun_etapa_segundos_sum{{{rotulos}}} {histograma.soma!r}')
+            linhas.append(f'rockrun_etapa_segundos_count{{{rotulos}}} {histograma.contagem}')
+        linhas += [
+            f"# HELP rockrun_etapa_segundos_recentes Percentis das últimas {AMOSTRAS_RECENTES} medidas de cada etapa",
+            "# TYPE rockrun_etapa_segundos_recentes gauge",
+        ]
+        for etapa, histograma in sorted(self._histogramas.items()):
+            for quantil, valor in histograma.quantis().items():
+                linhas.append(f'rockrun_etapa_segundos_recentes{{etapa="{etapa}",pid="{pid}",quantile="{quantil}"}} {valor!r}')
+        return "\n".join(linhas) + "\n"
+
+    def _gravar_jsonl(self, etapa, segundos):
+        try:
+            with open(self.arquivo_jsonl, 'a', encoding='utf-8') as arquivo:
+                arquivo.write(json.dumps({
+                    "ts": round(time.time(), 3),
+                    "pid": os.getpid(),
+                    "etapa": etapa,
+                    "ms": round(segundos * 1000, 3),
+                }, ensure_ascii=False) + "\n")
+        except OSError:
+            pass  # Métrica nunca derruba o envio
+
+    def arquivo_prometheus_do_processo(self):
+        """Arquivo Prometheus deste processo; vários processos no mesmo caminho se sobrescreveriam"""
+        base, extensao = os.path.splitext(self.arquivo_prometheus)
+        return f"{base}.{os.getpid()}{extensao}"
+
+    def _gravar_prometheus(self):
+        # Grava ao lado e troca: o coletor nunca lê um arquivo pela metade
+        destino = self.arquivo_prometheus_do_processo()
+        temporario = f"{destino}.tmp"
+        try:
+            with open(temporario, 'w', encoding='utf-8') as arquivo:
+                arquivo.write(self._texto_prometheus())
+            os.replace(temporario, destino)
+        except OSError:
+            return
+        if not self._remocao_registrada:
+            # Processo encerrado não deixa séries paradas para o coletor
+            atexit.register(self._remover_prometheus, destino)
+            self._remocao_registrada = True
+
+    @staticmethod
+    def _remover_prometheus(destino):
+        try:
+            os.remove(destino)
+        except OSError:
+            pass
+
+# Métricas compartilhadas pelo processo
+metricas = Metricas()
+
+def medir(etapa):
+    return metricas.medir(etapa)
+
+def registrar(etapa, segundos):
+    metricas.registrar(etapa, segundos)
+
+def registrar_varios(medidas):
+    metricas.registrar_varios(medidas)
+
+def coletar():
+    return metricas.coletar()
+
+def resumo_metricas():
+    return metricas.resumo()
+
+def exportar_prometheus():
+    return metricas.exportar_prometheus()
@@ -0,0 +1,172 @@
+import hashlib
+import io
+import itertools
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+
+from pypdf import PdfReader, PdfWriter
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+from reportlab.platypus import Flowable
+
+from utils.metricas import medir, registrar
+from utils.pdf_generator import (
+    cabecalho_usuario,
+    gerar_pdf,
+    montar_story,
+    novo_documento
+)
+from utils.training_logic import (
+    CLASSIFICACOES,
+    OBJETIVOS_ADAPTADOS,
+    RESTRICOES,
+    gerar_programa_treino,
+    adaptar_por_objetivo,
+    gerar_exercicios_complementares
+)
+
+# Nome usado para dimensionar a área reservada da saudação; nomes que não
+# couberem nela caem na geração completa (gerar_pdf)
+NOME_REFERENCIA = "M" * 40
+
+logger = logging.getLogger(__name__)
+
+class RegiaoReservada(Flowable):
+    """Espaço em branco no modelo onde a saudação e a data são carimbadas depois"""
+
+    def __init__(self, altura):
+        Flowable.__init__(self)
+        self.altura = altura
+        self.largura = 0
+        self.posicao = None
+
+    def wrap(self, availWidth, availHeight):
+        self.largura = availWidth
+        return availWidth, self.altura
+
+    def draw(self):
+        # Página e canto inferior esquerdo em coordenadas absolutas da página
+        x, y = self.canv.absolutePosition(0, 0)
+        self.posicao = (self.canv.getPageNumber() - 1, x, y)
+
+class Modelo:
+    """PDF pré-renderizado de uma combinação de plano, com a área da saudação em branco"""
+
+    def __init__(self, conteudo, regiao):
+        self.conteudo = conteudo
+        self.pagina, self.x, self.y = regiao.posicao
+        self.largura = regiao.largura
+        self.altura = regiao.altura
+        # O PdfReader guarda os objetos já lidos; a trava evita leituras concorrentes do mesmo stream
+        self._leitor = PdfReader(io.BytesIO(conteudo))
+        self._trava = threading.Lock()
+
+    def carimbar(self, dados_usuario, data=None):
+        """Retorna os bytes do PDF com a saudação desenhada na área reservada, ou None se não couber"""
+        with medir("gerar_pdf.montar"):
+            flowables = cabecalho_usuario(dados_usuario, data)
+            alturas = [f.wrap(self.largura, self.altura)[1] for f in flowables]
+            if sum(alturas) > self.altura:
+                return None
+
+            # Página de sobreposição só com a saudação e a data
+            sobreposicao = io.BytesIO()
+            tela = canvas.Canvas(sobreposicao, pagesize=A4)
+            topo = self.y + self.altura
+            for flowable, altura in zip(flowables, alturas):
+                topo -= altura
+                flowable.drawOn(tela, self.x, topo)
+            tela.save()
+            pagina_sobreposta = PdfReader(sobreposicao).pages[0]
+
+            with self._trava:
+                escritor = PdfWriter(clone_from=self._leitor)
+            pagina = escritor.pages[self.pagina]
+            pagina.merge_page(pagina_sobreposta)
+            pagina.compress_content_streams()
+
+        with medir("gerar_pdf.serializar"):
+            saida = io.BytesIO()
+            escritor.write(saida)
+            return saida.getvalue()
+
+def chave_modelo(classificacao, programa, adaptacao, exercicios, restricoes):
+    """Hash do conteúdo comum a todos com o mesmo perfil, objetivo e restrições"""
+    conteudo = {
+        "classificacao": classificacao,
+        "programa": programa,
+        "adaptacao": adaptacao,
+        "exercicios": exercicios,
+        "restricoes": list(restricoes),
+    }
+    serializado = json.dumps(conteudo, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(serializado.encode('utf-8')).hexdigest()
+
+_trava = threading.Lock()
+_modelos = {}
+_altura_reservada = None
+
+def _altura_saudacao():
+    """Altura que a saudação e a data ocupam com NOME_REFERENCIA"""
+    global _altura_reservada
+    if _altura_reservada is None:
+        largura = novo_documento(io.BytesIO()).width
+        data = datetime.now().strftime('%d/%m/%Y')
+        _altura_reservada = sum(
+            f.wrap(largura, A4[1])[1]
+            for f in cabecalho_usuario({'nome': NOME_REFERENCIA}, data)
+        )
+    return _altura_reservada
+
+def renderizar_modelo(classificacao, programa, adaptacao, exercicios, restricoes):
+    """Executa o layout completo uma vez para a combinação, deixando a saudação em branco"""
+    regiao = RegiaoReservada(_altura_saudacao())
+    buffer = io.BytesIO()
+    with medir("gerar_pdf.modelo"):
+        novo_documento(buffer).build(montar_story(
+            classificacao, programa, adaptacao, exercicios, restricoes, [regiao]
+        ))
+    return Modelo(buffer.getvalue(), regiao)
+
+def obter_modelo(classificacao, programa, adaptacao, exercicios, restricoes):
+    """Retorna o modelo da combinação, renderizando-o na primeira vez"""
+    chave = chave_modelo(classificacao, programa, adaptacao, exercicios, restricoes)
+    with _trava:
+        modelo = _modelos.get(chave)
+    if modelo is None:
+        modelo = renderizar_modelo(classificacao, programa, adaptacao, exercicios, restricoes)
+        with _trava:
+            modelo = _modelos.setdefault(chave, modelo)
+    return modelo
+
+def pre_renderizar_modelos():
+    """Renderiza todos os modelos (perfil x objetivo x restrições); retorna quantos existem"""
+    exercicios = gerar_exercicios_complementares()
+    for classificacao in CLASSIFICACOES:
+        programa = gerar_programa_treino(classificacao, {})
+        for objetivo in OBJETIVOS_ADAPTADOS:
+            adaptacao = adaptar_por_objetivo(programa, objetivo)
+            for quantidade in range(len(RESTRICOES) + 1):
+                for restricoes in itertools.combinations(RESTRICOES, quantidade):
+                    obter_modelo(classificacao, programa, adaptacao, exercicios, list(restricoes))
+    return len(_modelos)
+
+def gerar_pdf_por_modelo(dados_usuario, classificacao, programa, adaptacao, exercicios, restricoes):
+    """Mesmo contrato de gerar_pdf: carimba o modelo pronto e só recorre ao layout completo se preciso"""
+    inicio = time.perf_counter()
+    try:
+        modelo = obter_modelo(classificacao, programa, adaptacao, exercicios, restricoes)
+        conteudo = modelo.carimbar(dados_usuario)
+        if conteudo is not None:
+            return io.BytesIO(conteudo), ""  # Sucesso
+    except Exception:
+        # Defeito no modelo ou no carimbo: vai para o log e para a métrica
+        # gerar_pdf.modelo_falhou (a contagem mostra quantos caíram no layout completo)
+        registrar("gerar_pdf.modelo_falhou", time.perf_counter() - inicio)
+        logger.exception("Falha no modelo de PDF de %s; usando o layout completo", classificacao)
+
+    # Saudação maior que a área reservada (ou falha no modelo): layout completo
+    return gerar_pdf(dados_usuario, classificacao, programa, adaptacao, exercicios, restricoes)
@@ -1,4 +1,6 @@
+import copy
 import io
+import threading
 from datetime import datetime
 from reportlab.lib.pagesizes import A4
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
@@ -6,124 +8,195 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import colors
 
+from utils.metricas import medir
+
+DICAS = [
+    "Comece devagar e seja consistente - é melhor correr pouco regularmente do que muito esporadicamente",
+    "Escute seu corpo - dor não é normal, desconforto muscular leve é esperado",
+    "Hidrate-se bem antes, durante e após os treinos",
+    "Use tênis adequado para corrida e substitua a cada 500-800km",
+    "Aqueça antes e alongue depois de cada sessão",
+    "Registre seus treinos para acompanhar a evolução",
+    "Tenha paciência - os resultados vêm com o tempo",
+    "Em caso de dúvidas, consulte um profissional de educação física"
+]
+
+ALERTAS = [
+    "Dores articulares persistentes",
+    "Fadiga excessiva que não melhora com descanso",
+    "Tontura ou desmaios",
+    "Lesões que não cicatrizam",
+    "Perda de motivação extrema ou sintomas depressivos"
+]
+
+# Estilos e trechos fixos do PDF: montados uma vez por processo e reaproveitados
+_trava = threading.RLock()
+_estilos = None
+_secoes_fixas = None
+_secoes_exercicios = {}
+
+def obter_estilos():
+    """Retorna (normal, titulo, subtitulo), criando os ParagraphStyle na primeira chamada"""
+    global _estilos
+    with _trava:
+        if _estilos is None:
+            styles = getSampleStyleSheet()
+            title_style = ParagraphStyle(
+                'CustomTitle',
+                parent=styles['Heading1'],
+                fontSize=18,
+                spaceAfter=20,
+                textColor=colors.HexColor('#FF6B35'),
+                alignment=1  # Centro
+            )
+
+            heading_style = ParagraphStyle(
+                'CustomHeading',
+                parent=styles['Heading2'],
+                fontSize=14,
+                spaceAfter=12,
+                textColor=colors.HexColor('#2E86AB')
+            )
+            _estilos = (styles['Normal'], title_style, heading_style)
+        return _estilos
+
+def _montar_secoes_fixas():
+    """Pré-processa o markup dos trechos que são iguais em todos os PDFs"""
+    normal, title_style, heading_style = obter_estilos()
+
+    titulo = [
+        Paragraph("PROGRAMA PERSONALIZADO DE CORRIDA", title_style),
+        Spacer(1, 1)
+    ]
+
+    # Dicas importantes
+    dicas = [Paragraph("DICAS IMPORTANTES PARA O SUCESSO", heading_style)]
+    for dica in DICAS:
+        dicas.append(Paragraph(f"• {dica}", normal))
+        dicas.append(Spacer(1, 4))
+
+    # Sinais de alerta
+    alertas = [
+        Spacer(1, 12),
+        Paragraph("SINAIS DE ALERTA - PROCURE ORIENTAÇÃO", heading_style)
+    ]
+    for alerta in ALERTAS:
+        alertas.append(Paragraph(f"• {alerta}", normal))
+        alertas.append(Spacer(1, 4))
+
+    # Rodapé
+    alertas.append(Spacer(1, 20))
+    alertas.append(Paragraph("Boa corrida e lembre-se: cada passo conta!", normal))
+
+    return {"titulo": titulo, "final": dicas + alertas}
+
+def _secao_exercicios(exercicios):
+    """Flowables dos exercícios complementares, pré-processados por conteúdo"""
+    chave = tuple((categoria, tuple(itens)) for categoria, itens in exercicios.items())
+    with _trava:
+        if chave not in _secoes_exercicios:
+            normal, _, heading_style = obter_estilos()
+            secao = [Paragraph("EXERCÍCIOS COMPLEMENTARES", heading_style)]
+            for categoria, exercicios_cat in exercicios.items():
+                secao.append(Paragraph(f"<b>{categoria}:</b>", normal))
+                for exercicio in exercicios_cat:
+                    secao.append(Paragraph(f"• {exercicio}", normal))
+                secao.append(Spacer(1, 8))
+            _secoes_exercicios[chave] = secao
+        return _secoes_exercicios[chave]
+
+def _secao_fixa(nome):
+    global _secoes_fixas
+    with _trava:
+        if _secoes_fixas is None:
+            _secoes_fixas = _montar_secoes_fixas()
+        return _secoes_fixas[nome]
+
+def _clonar(flowables):
+    """Cópia rasa por PDF: o layout grava largura/altura no flowable, o markup já processado é compartilhado"""
+    return [copy.copy(f) for f in flowables]
+
+def cabecalho_usuario(dados_usuario, data=None):
+    """Saudação com o nome e data de geração: a única parte do PDF que muda por pessoa"""
+    normal = obter_estilos()[0]
+    data = data or datetime.now().strftime('%d/%m/%Y')
+    return [
+        #nome do usuário
+        Paragraph(f"Olá, <b>{dados_usuario['nome']}</b>! Este Plano foi gerado com base em suas respostas ao questionário, levando em consideração as melhores práticas de recomendação de corrida. Refaça-o sempre que perceber sua evolução, ou qualquer alteração em seu estado físico.", normal),
+        # Data
+        Paragraph(f"Gerado em:<b>{data}</b>", normal),
+        Spacer(1, 12)
+    ]
+
+def montar_story(classificacao, programa, adaptacao, exercicios, restricoes, cabecalho):
+    """Monta a lista de flowables do PDF; `cabecalho` entra logo após o título"""
+    # Estilos
+    normal, title_style, heading_style = obter_estilos()
+
+    story = []
+
+    # Título
+    story.extend(_clonar(_secao_fixa("titulo")))
+
+    # Nome do usuário e data
+    story.extend(cabecalho)
+
+    # Classificação
+    story.append(Paragraph("CLASSIFICAÇÃO", heading_style))
+    story.append(Paragraph(f"Perfil: <b>{classificacao}</b>", normal))
+    story.append(Paragraph(f"Duração do programa: <b>{programa['duracao']}</b>", normal))
+    story.append(Spacer(1, 1))
+
+    # Restrições (se houver)
+    if restricoes:
+        story.append(Paragraph("ATENÇÕES ESPECIAIS", heading_style))
+        for restricao in restricoes:
+            story.append(Paragraph(f"• {restricao}", normal))
+        story.append(Spacer(1, 12))
+
+    # Programa de treino
+    story.append(Paragraph("PROGRAMA DE TREINO", heading_style))
+    for fase in programa['fases']:
+        story.append(Paragraph(f"<b>{fase['nome']} (Semanas {fase['semanas']})</b>", normal))
+        story.append(Paragraph(f"Frequência: {fase['frequencia']}", normal))
+        story.append(Paragraph(f"Duração: {fase['duracao']}", normal))
+        story.append(Paragraph("Estrutura:", normal))
+        for item in fase['estrutura']:
+            story.append(Paragraph(f"• {item}", normal))
+        story.append(Spacer(1, 8))
+
+    # Adaptação por objetivo
+    story.append(Paragraph("ADAPTAÇÃO PARA SEU OBJETIVO", heading_style))
+    story.append(Paragraph(f"<b>Modificação:</b> {adaptacao['modificacao']}", normal))
+    story.append(Paragraph(f"<b>Sessões extras:</b> {adaptacao['sessoes_extras']}", normal))
+    story.append(Paragraph(f"<b>Dica especial:</b> {adaptacao['dica']}", normal))
+    story.append(Spacer(1, 12))
+
+    # Exercícios complementares
+    story.extend(_clonar(_secao_exercicios(exercicios)))
+
+    # Dicas importantes, sinais de alerta e rodapé
+    #story.append(PageBreak())
+    story.extend(_clonar(_secao_fixa("final")))
+    return story
+
+def novo_documento(buffer):
+    return SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5*inch)
+
 def gerar_pdf(dados_usuario, classificacao, programa, adaptacao, exercicios, restricoes):
     """Gera PDF com o programa personalizado"""
     try:
         buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5*inch)
-
-        # Estilos
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=18,
-            spaceAfter=20,
-            textColor=colors.HexColor('#FF6B35'),
-            alignment=1  # Centro
-        )
-        
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=14,
-            spaceAfter=12,
-            textColor=colors.HexColor('#2E86AB')
-        )
-        
-        story = []
-
-        # Título
-        story.append(Paragraph("PROGRAMA PERSONALIZADO DE CORRIDA", title_style))
-        story.append(Spacer(1, 1))
-        
-        #nome do usuário
-        story.append(Paragraph(f"Olá, <b>{dados_usuario['nome']}</b>! Este Plano foi gerado com base em suas respostas ao questionário, levando em consideração as melhores práticas de recomendação de corrida. Refaça-o sempre que perceber sua evolução, ou qualquer alteração em seu estado físico.", styles['Normal']))
-   
-        # Data
-        story.append(Paragraph(f"Gerado em:<b>{datetime.now().strftime('%d/%m/%Y')}</b>", styles['Normal']))
-        story.append(Spacer(1, 12))
-        
-        # Classificação
-        story.append(Paragraph("CLASSIFICAÇÃO", heading_style))
-        story.append(Paragraph(f"Perfil: <b>{classificacao}</b>", styles['Normal']))
-        story.append(Paragraph(f"Duração do programa: <b>{programa['duracao']}</b>", styles['Normal']))
-        story.append(Spacer(1, 1))
-        
-        # Restrições (se houver)
-        if restricoes:
-            story.append(Paragraph("ATENÇÕES ESPECIAIS", heading_style))
-            for restricao in restricoes:
-                story.append(Paragraph(f"• {restricao}", styles['Normal']))
-            story.append(Spacer(1, 12))
-        
-        # Programa de treino
-        story.append(Paragraph("PROGRAMA DE TREINO", heading_style))
-        for fase in programa['fases']:
-            story.append(Paragraph(f"<b>{fase['nome']} (Semanas {fase['semanas']})</b>", styles['Normal']))
-            story.append(Paragraph(f"Frequência: {fase['frequencia']}", styles['Normal']))
-            story.append(Paragraph(f"Duração: {fase['duracao']}", styles['Normal']))
-            story.append(Paragraph("Estrutura:", styles['Normal']))
-            for item in fase['estrutura']:
-                story.append(Paragraph(f"• {item}", styles['Normal']))
-            story.append(Spacer(1, 8))
-        
-        # Adaptação por objetivo
-        story.append(Paragraph("ADAPTAÇÃO PARA SEU OBJETIVO", heading_style))
-        story.append(Paragraph(f"<b>Modificação:</b> {adaptacao['modificacao']}", styles['Normal']))
-        story.append(Paragraph(f"<b>Sessões extras:</b> {adaptacao['sessoes_extras']}", styles['Normal']))
-        story.append(Paragraph(f"<b>Dica especial:</b> {adaptacao['dica']}", styles['Normal']))
-        story.append(Spacer(1, 12))
-        
-        # Exercícios complementares
-        story.append(Paragraph("EXERCÍCIOS COMPLEMENTARES", heading_style))
-        for categoria, exercicios_cat in exercicios.items():
-            story.append(Paragraph(f"<b>{categoria}:</b>", styles['Normal']))
-            for exercicio in exercicios_cat:
-                story.append(Paragraph(f"• {exercicio}", styles['Normal']))
-            story.append(Spacer(1, 8))
-        
-        # Dicas importantes
-        #story.append(PageBreak())
-        story.append(Paragraph("DICAS IMPORTANTES PARA O SUCESSO", heading_style))
-        
-        dicas = [
-            "Comece devagar e seja consistente - é melhor correr pouco regularmente do que muito esporadicamente",
-            "Escute seu corpo - dor não é normal, desconforto muscular leve é esperado",
-            "Hidrate-se bem antes, durante e após os treinos",
-            "Use tênis adequado para corrida e substitua a cada 500-800km",
-            "Aqueça antes e alongue depois de cada sessão",
-            "Registre seus treinos para acompanhar a evolução",
-            "Tenha paciência - os resultados vêm com o tempo",
-            "Em caso de dúvidas, consulte um profissional de educação física"
-        ]
-        
-        for dica in dicas:
-            story.append(Paragraph(f"• {dica}", styles['Normal']))
-            story.append(Spacer(1, 4))
-        
-        # Sinais de alerta
-        story.append(Spacer(1, 12))
-        story.append(Paragraph("SINAIS DE ALERTA - PROCURE ORIENTAÇÃO", heading_style))
-        
-        alertas = [
-            "Dores articulares persistentes",
-            "Fadiga excessiva que não melhora com descanso",
-            "Tontura ou desmaios",
-            "Lesões que não cicatrizam",
-            "Perda de motivação extrema ou sintomas depressivos"
-        ]
-        
-        for alerta in alertas:
-            story.append(Paragraph(f"• {alerta}", styles['Normal']))
-            story.append(Spacer(1, 4))
-        
-        # Rodapé
-        story.append(Spacer(1, 20))
-        story.append(Paragraph("Boa corrida e lembre-se: cada passo conta!", styles['Normal']))
-        
-        doc.build(story)
+        doc = novo_documento(buffer)
+        with medir("gerar_pdf.montar"):
+            story = montar_story(
+                classificacao, programa, adaptacao, exercicios, restricoes,
+                cabecalho_usuario(dados_usuario)
+            )
+        # No ReportLab o layout e a escrita do arquivo acontecem juntos no build
+        with medir("gerar_pdf.serializar"):
+            doc.build(story)
         buffer.seek(0)
         return buffer, ""  # Sucesso
     except Exception as e:
-        return None, f"Erro ao gerar PDF: {str(e)}"
\ No newline at end of file
+        return None, f"Erro ao gerar PDF: {str(e)}"
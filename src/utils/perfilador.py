@@ -0,0 +1,91 @@
+import datetime
+import os
+import threading
+import time
+
+# "sempre" (ou "1"): perfila toda execução do script; "consulta": só as abertas com ?perfil=1;
+# vazio: desligado, e app.py chama main() direto, sem custo nenhum
+MODO_PERFIL = os.environ.get('ROCKRUN_PERFIL', '').strip().lower()
+PERFIL_ATIVO = MODO_PERFIL in ('1', 'sempre', 'consulta')
+
+# Diretório dos perfis (.prof do cProfile); os mais antigos saem quando passa do máximo
+DIRETORIO_PERFIS = os.environ.get('ROCKRUN_PERFIL_DIR', 'perfis')
+MAXIMO_PERFIS = int(os.environ.get('ROCKRUN_PERFIL_MAX', 500))
+
+# Função cuja presença no perfil indica que a execução processou um envio
+FUNCAO_ENVIO = 'processar_submissao'
+
+_trava_perfil = threading.Lock()
+
+def nome_perfil(etapa, envio, duracao):
+    """Nome do arquivo com as marcas da execução: data, processo, etapa, envio e duração"""
+    agora = datetime.datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+    return f"{agora}_p{os.getpid()}_e{etapa}_{'envio' if envio else 'navegacao'}_{duracao * 1000:.0f}ms.prof"
+
+def marcas_perfil(nome):
+    """Marcas gravadas no nome do arquivo: {"etapa", "envio", "ms"}; None se o nome não for de um perfil"""
+    partes = os.path.basename(nome)[:-len(".prof")].split("_")
+    try:
+        _, _, etapa, tipo, duracao = partes
+        return {"etapa": int(etapa[1:]), "envio": tipo == "envio", "ms": int(duracao[:-2])}
+    except ValueError:
+        return None
+
+def deve_perfilar():
+    if MODO_PERFIL == 'consulta':
+        import streamlit as st
+        return st.query_params.get('perfil') == '1'
+    return PERFIL_ATIVO
+
+def executar_com_perfil(funcao):
+    """Executa `funcao` (uma execução do script) sob o cProfile e grava o perfil em DIRETORIO_PERFIS"""
+    if not deve_perfilar():
+        return funcao()
+
+    # Uma execução perfilada por vez no processo: no Python 3.12+ só pode haver um
+    # profiler ativo, e as execuções que chegam enquanto isso rodam sem perfil
+    if not _trava_perfil.acquire(blocking=False):
+        return funcao()
+    try:
+        import cProfile
+        import streamlit as st
+
+        etapa = st.session_state.get('etapa_formulario', 0)
+        perfil = cProfile.Profile()
+        try:
+            perfil.enable()
+        except ValueError:
+            # Outra ferramenta de perfil (ou depurador) já está ativa
+            return funcao()
+        inicio = time.perf_counter()
+        try:
+            return funcao()
+        finally:
+            # Também quando a execução termina com st.rerun() ou st.stop()
+            perfil.disable()
+            _gravar(perfil, etapa, time.perf_counter() - inicio)
+    finally:
+        _trava_perfil.release()
+
+def _gravar(perfil, etapa, duracao):
+    import pstats
+
+    try:
+        estatisticas = pstats.Stats(perfil)
+        envio = any(funcao[2] == FUNCAO_ENVIO for funcao in estatisticas.stats)
+        os.makedirs(DIRETORIO_PERFIS, exist_ok=True)
+        caminho = os.path.join(DIRETORIO_PERFIS, nome_perfil(etapa, envio, duracao))
+        estatisticas.dump_stats(caminho + ".tmp")
+        os.replace(caminho + ".tmp", caminho)
+        _rotacionar()
+    except OSError:
+        pass  # Perfil nunca derruba a execução
+
+def _rotacionar():
+    """Mantém só os MAXIMO_PERFIS mais recentes (o nome começa pela data)"""
+    perfis = sorted(nome for nome in os.listdir(DIRETORIO_PERFIS) if nome.endswith(".prof"))
+    for nome in perfis[:-MAXIMO_PERFIS] if MAXIMO_PERFIS > 0 else []:
+        try:
+            os.remove(os.path.join(DIRETORIO_PERFIS, nome))
+        except OSError:
+            pass
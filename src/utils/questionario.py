@@ -0,0 +1,279 @@
+from collections.abc import MutableMapping
+
+from utils.helpers import formatar_tel
+
+# Opções de cada pergunta de múltipla escolha do formulário, na ordem exibida.
+# A resposta é guardada como código (posição na tupla) e só vira texto ao ser
+# lida: na tela, no PDF, na planilha e nas regras de classificação.
+OPCOES = {
+    'idade': (
+        "Menos de 18 anos",
+        "18-25 anos",
+        "26-35 anos",
+        "36-45 anos",
+        "46-55 anos",
+        "Mais de 55 anos"
+    ),
+    'sexo': (
+        "Feminino",
+        "Masculino",
+        "Prefiro não informar"
+    ),
+    'inatividade': (
+        "Pratico atualmente (pelo menos 2x por semana)",
+        "Parei há menos de 6 meses",
+        "Parei há 6 meses a 1 ano",
+        "Parei há 1 a 3 anos",
+        "Parei há mais de 3 anos",
+        "Nunca pratiquei exercícios regulares"
+    ),
+    'experiencia': (
+        "Corrida/caminhada",
+        "Academia/musculação",
+        "Esportes coletivos (futebol, vôlei, etc.)",
+        "Dança ou lutas",
+        "Ciclismo ou natação",
+        "Nunca tive experiência regular"
+    ),
+    'saude': (
+        "Não tenho nenhuma condição",
+        "Problemas cardíacos",
+        "Diabetes",
+        "Hipertensão",
+        "Problemas respiratórios (asma, etc.)",
+        "Outras condições"
+    ),
+    'medicamentos': (
+        "Não tomo medicamentos",
+        "Sim, mas não afeta exercícios",
+        "Sim, e pode afetar exercícios",
+        "Não tenho certeza"
+    ),
+    'liberacao_medica': (
+        "Sim, tenho liberação",
+        "Não preciso (sou saudável)",
+        "Pretendo consultar um médico antes",
+        "Não sei se preciso"
+    ),
+    'escada': (
+        "Sim, facilmente",
+        "Sim, mas fico um pouco cansado(a)",
+        "Com dificuldade",
+        "Não consigo"
+    ),
+    'caminhada': (
+        "Menos de 10 minutos",
+        "10-20 minutos",
+        "20-30 minutos",
+        "30-45 minutos",
+        "Mais de 45 minutos"
+    ),
+    'objetivo': (
+        "Emagrecimento/perda de peso",
+        "Melhorar a saúde geral",
+        "Reduzir estresse/bem-estar mental",
+        "Participar de provas/competições",
+        "Diversão e lazer",
+        "Socialização/fazer novos amigos"
+    ),
+    'dias_semana': (
+        "1-2 dias",
+        "3 dias",
+        "4 dias",
+        "5 dias",
+        "6-7 dias"
+    ),
+    'tempo_treino': (
+        "Menos de 20 minutos",
+        "20-30 minutos",
+        "30-45 minutos",
+        "45-60 minutos",
+        "Mais de 60 minutos"
+    ),
+    'horario': (
+        "Manhã (6h às 9h)",
+        "Meio do dia (9h às 14h)",
+        "Tarde (14h às 18h)",
+        "Noite (18h às 21h)",
+        "Varia conforme o dia"
+    ),
+    'local': (
+        "Rua/calçada",
+        "Parques/praças",
+        "Esteira (academia ou casa)",
+        "Pista de atletismo",
+        "Trilhas na natureza"
+    ),
+    'lesoes': (
+        "Não tenho dores ou lesões",
+        "Joelhos",
+        "Tornozelos/pés",
+        "Quadril/lombar",
+        "Ombros/pescoço",
+        "Outras regiões"
+    ),
+    'preferencia_social': (
+        "Sozinho(a) - prefiro meu próprio ritmo",
+        "Com um(a) parceiro(a) de treino",
+        "Em pequenos grupos (3-5 pessoas)",
+        "Em grupos maiores/assessorias",
+        "Não tenho preferência"
+    ),
+}
+
+# Texto da opção -> código, montado uma vez
+CODIGOS = {campo: {opcao: i for i, opcao in enumerate(opcoes)} for campo, opcoes in OPCOES.items()}
+
+# Perguntas do formulário. "tipo": "texto" (text_input), "escala" (slider de
+# ESCALA[0] a ESCALA[1]) ou "opcao" (selectbox com OPCOES[campo]). "erro" torna
+# a pergunta obrigatória; "normalizar" = (campo derivado, função), e a resposta
+# é inválida quando a função retorna None.
+PERGUNTAS = {
+    'nome': {"tipo": "texto", "rotulo": "Digite seu nome*:",
+             "erro": "Por favor, informe seu nome"},
+    'telefone_input': {"tipo": "texto", "rotulo": "Telefone* (formato: (99) 99999-9999):",
+                       "placeholder": "(99) 99999-9999", "max_chars": 15,
+                       "erro": "Por favor, informe um telefone válido com 11 dígitos: (99) 99999-9999)",
+                       "normalizar": ('telefone', formatar_tel)},
+    'idade': {"tipo": "opcao", "rotulo": "1. Qual é a sua idade?"},
+    'sexo': {"tipo": "opcao", "rotulo": "2. Qual é o seu sexo?"},
+    'inatividade': {"tipo": "opcao", "rotulo": "3. Há quanto tempo você não pratica exercícios físicos regulares?"},
+    'experiencia': {"tipo": "opcao", "rotulo": "4. Qual foi sua última experiência com atividade física regular?"},
+    'saude': {"tipo": "opcao", "rotulo": "5. Você possui alguma condição de saúde que pode afetar a prática de exercícios?"},
+    'medicamentos': {"tipo": "opcao", "rotulo": "6. Você toma algum medicamento regularmente?"},
+    'liberacao_medica': {"tipo": "opcao", "rotulo": "7. Você tem liberação médica para praticar exercícios?"},
+    'condicao_fisica': {"tipo": "escala", "rotulo": "8. Como você avalia sua condição física atual?",
+                        "padrao": 3, "ajuda": "1 = Muito ruim, 5 = Excelente"},
+    'escada': {"tipo": "opcao", "rotulo": "9. Você consegue subir 2 lances de escada sem ficar muito ofegante?"},
+    'caminhada': {"tipo": "opcao", "rotulo": "10. Quanto tempo você consegue caminhar em ritmo moderado sem parar?"},
+    'objetivo': {"tipo": "opcao", "rotulo": "11. Qual é seu principal objetivo com a corrida?"},
+    'motivacao': {"tipo": "escala", "rotulo": "12. Qual é seu nível de motivação para começar?",
+                  "padrao": 4, "ajuda": "1 = Pouco motivado, 5 = Muito motivado"},
+    'dias_semana': {"tipo": "opcao", "rotulo": "13. Quantos dias por semana você pode treinar?"},
+    'tempo_treino': {"tipo": "opcao", "rotulo": "14. Tempo disponível por sessão?"},
+    'horario': {"tipo": "opcao", "rotulo": "15. Horário preferido?"},
+    'local': {"tipo": "opcao", "rotulo": "16. Onde você prefere correr?"},
+    'sono': {"tipo": "escala", "rotulo": "17. Qualidade do seu sono?",
+             "padrao": 3, "ajuda": "1 = Muito ruim, 5 = Excelente"},
+    'estresse': {"tipo": "escala", "rotulo": "18. Como lida com o estresse?",
+                 "padrao": 3, "ajuda": "1 = Muito mal, 5 = Muito bem"},
+    'lesoes': {"tipo": "opcao", "rotulo": "19. Você já teve lesões ou sente dores em:"},
+    'preferencia_social': {"tipo": "opcao", "rotulo": "20. Como prefere treinar?"},
+}
+
+# Limites das perguntas de escala
+ESCALA = (1, 5)
+
+# Etapas do formulário, na ordem; "erros_apos": pergunta abaixo da qual aparecem os erros da etapa
+ETAPAS = (
+    {"titulo": "DADOS PESSOAIS", "perguntas": ('nome', 'telefone_input', 'idade', 'sexo'),
+     "erros_apos": 'telefone_input'},
+    {"titulo": "📚 HISTÓRICO DE ATIVIDADES FÍSICAS", "perguntas": ('inatividade', 'experiencia')},
+    {"titulo": "🏥 CONDIÇÃO DE SAÚDE", "perguntas": ('saude', 'medicamentos', 'liberacao_medica')},
+    {"titulo": "💪 CONDICIONAMENTO FÍSICO ATUAL", "perguntas": ('condicao_fisica', 'escada', 'caminhada')},
+    {"titulo": "🎯 OBJETIVOS E MOTIVAÇÃO", "perguntas": ('objetivo', 'motivacao')},
+    {"titulo": "⏰ DISPONIBILIDADE", "perguntas": ('dias_semana', 'tempo_treino', 'horario', 'local')},
+    {"titulo": "🌟 ESTILO DE VIDA", "perguntas": ('sono', 'estresse', 'lesoes', 'preferencia_social')},
+)
+
+# Respostas exigidas no envio final (sem elas o formulário volta à primeira etapa)
+OBRIGATORIAS = {
+    'nome': "Por favor, informe seu nome",
+    'telefone': "Por favor, informe seu telefone",
+}
+
+# Colunas da planilha na ordem gravada: (cabeçalho, campo das respostas);
+# campo None = preenchida por quem monta a linha (data e perfil)
+COLUNAS_PLANILHA = (
+    ("Timestamp", None),
+    ("Nome", 'nome'),
+    ("Telefone", 'telefone'),
+    ("Perfil", None),
+    ("Objetivo", 'objetivo'),
+    ("Idade", 'idade'),
+    ("Sexo", 'sexo'),
+    ("Condicao_Fisica", 'condicao_fisica'),
+    ("Dias_Semana", 'dias_semana'),
+    ("Tempo_Treino", 'tempo_treino'),
+    ("Horario", 'horario'),
+    ("Local", 'local'),
+    ("Lesoes", 'lesoes'),
+    ("Saude", 'saude'),
+    ("Medicamentos", 'medicamentos'),
+    ("Liberacao_Medica", 'liberacao_medica'),
+)
+
+# Todos os campos das respostas: as perguntas e os derivados delas (telefone formatado)
+CAMPOS = tuple(PERGUNTAS) + tuple(
+    pergunta["normalizar"][0] for pergunta in PERGUNTAS.values() if "normalizar" in pergunta
+)
+
+def validar_etapa(etapa, valores):
+    """Respostas a salvar de uma etapa (com os campos derivados) e a lista de erros, vazia se válida"""
+    salvar, erros = {}, []
+    for campo in ETAPAS[etapa]["perguntas"]:
+        pergunta, valor = PERGUNTAS[campo], valores[campo]
+        salvar[campo] = valor
+        if "normalizar" in pergunta:
+            derivado, normalizar = pergunta["normalizar"]
+            salvar[derivado] = normalizar(valor)
+            if salvar[derivado] is None:
+                erros.append(pergunta["erro"])
+        elif "erro" in pergunta and not valor:
+            erros.append(pergunta["erro"])
+    return salvar, erros
+
+def respostas_faltando(respostas):
+    """Mensagens das respostas obrigatórias ainda vazias"""
+    return [erro for campo, erro in OBRIGATORIAS.items() if not respostas.get(campo, '')]
+
+class Respostas(MutableMapping):
+    """Respostas de uma sessão com um slot por pergunta; opções ficam como código.
+
+    Lida como um dict de textos (`respostas['objetivo']`, `.get`, `dict(...)`),
+    então as regras, o PDF e a planilha recebem as mesmas opções de OPCOES.
+    """
+    __slots__ = CAMPOS
+
+    def __init__(self, respostas=(), **outras):
+        self.update(respostas, **outras)
+
+    def __getitem__(self, campo):
+        if campo not in _CAMPOS:
+            raise KeyError(campo)
+        try:
+            valor = object.__getattribute__(self, campo)
+        except AttributeError:
+            raise KeyError(campo) from None
+        opcoes = OPCOES.get(campo)
+        return valor if opcoes is None else opcoes[valor]
+
+    def __setitem__(self, campo, valor):
+        if campo not in _CAMPOS:
+            raise KeyError(f"pergunta desconhecida: '{campo}'")
+        codigos = CODIGOS.get(campo)
+        if codigos is not None:
+            if valor not in codigos:
+                raise ValueError(f"opção inválida para '{campo}': {valor!r}")
+            valor = codigos[valor]
+        object.__setattr__(self, campo, valor)
+
+    def __delitem__(self, campo):
+        if campo not in _CAMPOS or not hasattr(self, campo):
+            raise KeyError(campo)
+        object.__delattr__(self, campo)
+
+    def __iter__(self):
+        return (campo for campo in CAMPOS if hasattr(self, campo))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"Respostas({dict(self)!r})"
+
+    def codigo(self, campo, padrao=0):
+        """Código guardado de uma pergunta de múltipla escolha (índice da opção no selectbox)"""
+        return getattr(self, campo, padrao)
+
+_CAMPOS = frozenset(CAMPOS)
@@ -0,0 +1,323 @@
+import itertools
+import json
+import os
+
+from utils.questionario import ESCALA, OPCOES
+
+# Arquivo JSON com regras próprias (mesmo formato de REGRAS_PADRAO); sem ele valem as padrão
+CAMINHO_REGRAS = os.environ.get('ROCKRUN_REGRAS')
+
+# Regras de classificação e restrições. Cada resposta vira um código (posição
+# em "opcoes"; respostas fora da lista usam o código extra "outros") e o
+# compilador expande tudo em tabelas densas indexadas por esses códigos.
+REGRAS_PADRAO = {
+    "campos": {
+        # Valores fora das opções (frações, fora da escala) seguem a primeira entrada de "fora"
+        # que servir, como em `>= 4` / `== 3` / senão: de 4 em diante valem 4, o resto vale 1
+        "condicao_fisica": {"numerica": True, "opcoes": list(range(ESCALA[0], ESCALA[1] + 1)),
+                            "fora": [{"a_partir_de": 4, "equivale": 4}, {"equivale": 1}]},
+        # Opções das perguntas do formulário (utils.questionario), na mesma ordem
+        **{campo: {"opcoes": list(OPCOES[campo])} for campo in (
+            "inatividade", "caminhada", "saude", "medicamentos", "liberacao_medica", "lesoes"
+        )},
+    },
+    # Pontos de cada resposta; a soma decide o perfil
+    "pontuacao": {
+        "condicao_fisica": {"pontos": {"1": 1, "2": 1, "3": 2, "4": 3, "5": 3}},
+        "inatividade": {"pontos": {
+            "Pratico atualmente (pelo menos 2x por semana)": 3,
+            "Parei há menos de 6 meses": 2,
+            "Parei há 6 meses a 1 ano": 1,
+            "Parei há 1 a 3 anos": 1,
+            "Parei há mais de 3 anos": 1,
+            "Nunca pratiquei exercícios regulares": 1
+        }, "outros": 1},
+        "caminhada": {"pontos": {
+            "Menos de 10 minutos": -1,
+            "10-20 minutos": 0,
+            "20-30 minutos": 0,
+            "30-45 minutos": 0,
+            "Mais de 45 minutos": 1
+        }, "outros": 0},
+    },
+    # Faixas em ordem crescente: "ate" é a pontuação máxima do perfil; a última não tem limite
+    "perfis": [
+        {"ate": 3, "perfil": "SEDENTÁRIO"},
+        {"ate": 5, "perfil": "INICIANTE"},
+        {"perfil": "INICIANTE ATIVO"}
+    ],
+    # Na ordem em que aparecem no plano; "se": respostas que ativam, "exceto": respostas que não ativam
+    "restricoes": [
+        {"restricao": "ATENÇÃO MÉDICA OBRIGATÓRIA", "campo": "saude",
+         "exceto": ["Não tenho nenhuma condição"]},
+        {"restricao": "MONITORAMENTO ESPECIAL NECESSÁRIO", "campo": "medicamentos",
+         "se": ["Sim, e pode afetar exercícios"]},
+        {"restricao": "AGUARDAR LIBERAÇÃO MÉDICA", "campo": "liberacao_medica",
+         "se": ["Pretendo consultar um médico antes"]},
+        {"restricao": "ATENÇÃO ESPECIAL ÀS ARTICULAÇÕES", "campo": "lesoes",
+         "exceto": ["Não tenho dores ou lesões"]},
+    ],
+}
+
+class ErroDeRegras(ValueError):
+    """Regras inconsistentes ou incompletas; `problemas` lista todos os encontrados"""
+
+    def __init__(self, problemas):
+        super().__init__("Regras inválidas:\n- " + "\n- ".join(problemas))
+        self.problemas = problemas
+
+class MotorDeRegras:
+    """Regras compiladas: classificação e restrições são um acesso a tabela por submissão.
+
+    `pontuar`, `classificar`, `mascara_restricoes` e `restricoes` recebem o
+    dict de respostas: somam as consultas (resposta -> código x passo) de
+    cada campo e acessam a tabela densa com o índice.
+    """
+
+    def __init__(self, campos, campos_pontuacao, tabela_pontuacao, tabela_perfis,
+                 campos_restricoes, nomes_restricoes, tabela_mascaras):
+        self.campos = campos  # campo -> {"numerica", "opcoes", "codigos", "outros"}
+        self.campos_pontuacao = campos_pontuacao
+        self.passos_pontuacao = _passos(campos, campos_pontuacao)
+        self.tabela_pontuacao = tabela_pontuacao
+        self.tabela_perfis = tabela_perfis
+        self.campos_restricoes = campos_restricoes
+        self.passos_restricoes = _passos(campos, campos_restricoes)
+        self.nomes_restricoes = nomes_restricoes
+        self.tabela_mascaras = tabela_mascaras
+        # Lista de restrições de cada máscara, montada uma vez
+        self.tabela_restricoes = tuple(
+            tuple(nome for i, nome in enumerate(nomes_restricoes) if mascara & (1 << i))
+            for mascara in range(1 << len(nomes_restricoes))
+        )
+        indice_pontuacao = self._indice(campos_pontuacao, self.passos_pontuacao)
+        indice_restricoes = self._indice(campos_restricoes, self.passos_restricoes)
+        # Lista de restrições direto pelo índice, sem passar pela máscara
+        tabela_listas = tuple(self.tabela_restricoes[mascara] for mascara in tabela_mascaras)
+        self.pontuar = lambda respostas: tabela_pontuacao[indice_pontuacao(respostas)]
+        self.classificar = lambda respostas: tabela_perfis[indice_pontuacao(respostas)]
+        self.mascara_restricoes = lambda respostas: tabela_mascaras[indice_restricoes(respostas)]
+        self.restricoes = lambda respostas: list(tabela_listas[indice_restricoes(respostas)])
+
+    def _indice(self, nomes, passos):
+        """Função `respostas -> índice na tabela`, com um _Codificador (resposta -> código x passo) por campo"""
+        consultas = []
+        for campo, passo in zip(nomes, passos):
+            definicao = self.campos[campo]
+            if definicao["numerica"]:
+                padrao = lambda valor, campo=campo, passo=passo: self.codificar(campo, valor) * passo
+            else:
+                padrao = lambda valor, parcela=definicao["outros"] * passo: parcela
+            codificador = _Codificador(
+                ((opcao, codigo * passo) for opcao, codigo in definicao["codigos"].items()), padrao
+            )
+            consultas.append((campo, codificador))
+        consultas = tuple(consultas)
+
+        def indice(respostas):
+            return sum(codificador[respostas[campo]] for campo, codificador in consultas)
+        return indice
+
+    def codificar(self, campo, valor):
+        """Código da resposta: posição em "opcoes" ou o código extra de "outros" """
+        definicao = self.campos[campo]
+        if valor in definicao["codigos"]:
+            return definicao["codigos"][valor]
+        if definicao["numerica"]:
+            # Comparação direta, como no cálculo original: texto ou None levantam TypeError
+            for limite, codigo in definicao["fora"]:
+                if limite is None or valor >= limite:
+                    return codigo
+        return definicao["outros"]
+
+class _Codificador(dict):
+    """Resposta -> código x passo; respostas fora das opções vão para `padrao`"""
+    __slots__ = ("_padrao",)
+
+    def __init__(self, itens, padrao):
+        super().__init__(itens)
+        self._padrao = padrao
+
+    def __missing__(self, valor):
+        return self._padrao(valor)
+
+def _passos(campos, nomes):
+    """Multiplicador de cada código no índice da tabela densa (o último campo varia mais rápido)"""
+    passos = []
+    passo = 1
+    for nome in reversed(nomes):
+        passos.append(passo)
+        passo *= _tamanho(campos[nome])
+    return list(reversed(passos))
+
+def _tamanho(definicao):
+    """Quantidade de códigos do campo (opções + "outros", se não for numérico)"""
+    return len(definicao["opcoes"]) + (0 if definicao["numerica"] else 1)
+
+def _compilar_campos(regras, problemas):
+    campos = {}
+    for nome, definicao in regras.get("campos", {}).items():
+        opcoes = list(definicao.get("opcoes", []))
+        numerica = bool(definicao.get("numerica", False))
+        if not opcoes:
+            problemas.append(f"campo '{nome}' sem opções")
+            continue
+        if len(set(map(str, opcoes))) != len(opcoes):
+            problemas.append(f"campo '{nome}' com opções repetidas")
+        if numerica and opcoes != list(range(opcoes[0], opcoes[0] + len(opcoes))):
+            problemas.append(f"campo numérico '{nome}' precisa de inteiros consecutivos")
+            continue
+        fora = _compilar_fora(nome, definicao, opcoes, problemas) if numerica else []
+        if nome in OPCOES:
+            estranhas = [str(opcao) for opcao in opcoes if opcao not in OPCOES[nome]]
+            if estranhas:
+                problemas.append(f"campo '{nome}' com opções que o formulário não oferece: {', '.join(estranhas)}")
+        campos[nome] = {
+            "numerica": numerica,
+            "opcoes": opcoes,
+            "codigos": {opcao: i for i, opcao in enumerate(opcoes)},
+            "outros": len(opcoes),
+            "fora": fora,
+        }
+    return campos
+
+def _compilar_fora(nome, definicao, opcoes, problemas):
+    """[(limite ou None, código)] para números fora das opções; a última entrada vale para o resto"""
+    fora = []
+    entradas = definicao.get("fora", [])
+    if not entradas or "a_partir_de" in entradas[-1]:
+        problemas.append(f"campo numérico '{nome}' precisa de \"fora\" terminando numa entrada sem \"a_partir_de\"")
+        return fora
+    for entrada in entradas:
+        equivale = entrada.get("equivale")
+        if equivale not in opcoes:
+            problemas.append(f"campo '{nome}': \"fora\" equivale a opção inexistente '{equivale}'")
+            continue
+        fora.append((entrada.get("a_partir_de"), opcoes.index(equivale)))
+    return fora
+
+def _compilar_pontos(campos, regras, problemas):
+    """Pontos por código de cada campo pontuado; acusa opções sem pontos e pontos de opções inexistentes"""
+    pontos = {}
+    for nome, definicao in regras.get("pontuacao", {}).items():
+        if nome not in campos:
+            problemas.append(f"pontuação de campo desconhecido '{nome}'")
+            continue
+        campo = campos[nome]
+        por_opcao = definicao.get("pontos", {})
+        textos = [str(opcao) for opcao in campo["opcoes"]]
+        for opcao in por_opcao:
+            if opcao not in textos:
+                problemas.append(f"pontuação de '{nome}': opção inexistente '{opcao}'")
+        faltando = [texto for texto in textos if texto not in por_opcao]
+        if faltando:
+            problemas.append(f"pontuação de '{nome}' sem pontos para: {', '.join(faltando)}")
+            continue
+        lista = [por_opcao[texto] for texto in textos]
+        if not campo["numerica"]:
+            if "outros" not in definicao:
+                problemas.append(f"pontuação de '{nome}' sem \"outros\" (respostas fora das opções)")
+                continue
+            lista.append(definicao["outros"])
+        pontos[nome] = lista
+    if not regras.get("pontuacao"):
+        problemas.append("nenhum campo de pontuação")
+    return pontos
+
+def _compilar_faixas(regras, perfis_validos, problemas):
+    faixas = []
+    anterior = None
+    lista = regras.get("perfis", [])
+    for i, faixa in enumerate(lista):
+        perfil = faixa.get("perfil")
+        if perfis_validos is not None and perfil not in perfis_validos:
+            problemas.append(f"perfil '{perfil}' sem programa de treino ({', '.join(perfis_validos)})")
+        ate = faixa.get("ate")
+        if ate is None and i != len(lista) - 1:
+            problemas.append(f"faixa '{perfil}' sem \"ate\" antes da última")
+        if ate is not None and anterior is not None and ate <= anterior:
+            problemas.append(f"faixa '{perfil}' fora de ordem ({ate} <= {anterior})")
+        anterior = ate if ate is not None else anterior
+        faixas.append((ate, perfil))
+    if not faixas:
+        problemas.append("nenhuma faixa de perfil")
+    return faixas
+
+def _perfil(faixas, pontuacao):
+    for ate, perfil in faixas:
+        if ate is None or pontuacao <= ate:
+            return perfil
+    return None
+
+def _compilar_restricoes(campos, regras, problemas):
+    """Lista [(nome, campo, códigos que ativam)] na ordem das regras"""
+    restricoes = []
+    nomes = set()
+    for regra in regras.get("restricoes", []):
+        nome, campo = regra.get("restricao"), regra.get("campo")
+        if not nome or nome in nomes:
+            problemas.append(f"restrição sem nome ou repetida: '{nome}'")
+            continue
+        nomes.add(nome)
+        if campo not in campos:
+            problemas.append(f"restrição '{nome}' de campo desconhecido '{campo}'")
+            continue
+        if ("se" in regra) == ("exceto" in regra):
+            problemas.append(f"restrição '{nome}' precisa de exatamente um entre \"se\" e \"exceto\"")
+            continue
+        definicao = campos[campo]
+        valores = regra.get("se", regra.get("exceto"))
+        inexistentes = [valor for valor in valores if valor not in definicao["codigos"]]
+        if inexistentes:
+            problemas.append(f"restrição '{nome}': opções inexistentes em '{campo}': {', '.join(map(str, inexistentes))}")
+            continue
+        citados = {definicao["codigos"][valor] for valor in valores}
+        todos = set(range(_tamanho(definicao)))
+        ativam = citados if "se" in regra else todos - citados
+        restricoes.append((nome, campo, ativam))
+    return restricoes
+
+def compilar_regras(regras, perfis_validos=None):
+    """Valida as regras e as expande em tabelas densas; levanta ErroDeRegras com todas as falhas"""
+    problemas = []
+    campos = _compilar_campos(regras, problemas)
+    pontos = _compilar_pontos(campos, regras, problemas)
+    faixas = _compilar_faixas(regras, perfis_validos, problemas)
+    restricoes = _compilar_restricoes(campos, regras, problemas)
+    if problemas:
+        raise ErroDeRegras(problemas)
+
+    # Classificação: uma entrada por combinação de códigos dos campos pontuados
+    campos_pontuacao = list(pontos)
+    tabela_pontuacao = tuple(
+        sum(combinacao)
+        for combinacao in itertools.product(*(pontos[nome] for nome in campos_pontuacao))
+    )
+    sem_perfil = sorted({p for p in tabela_pontuacao if _perfil(faixas, p) is None})
+    if sem_perfil:
+        raise ErroDeRegras([f"pontuações sem faixa de perfil: {', '.join(map(str, sem_perfil))}"])
+    tabela_perfis = tuple(_perfil(faixas, p) for p in tabela_pontuacao)
+
+    # Restrições: uma máscara por combinação de códigos dos campos envolvidos
+    campos_restricoes = list(dict.fromkeys(campo for _, campo, _ in restricoes))
+    tabela_mascaras = []
+    for codigos in itertools.product(*(range(_tamanho(campos[nome])) for nome in campos_restricoes)):
+        por_campo = dict(zip(campos_restricoes, codigos))
+        mascara = 0
+        for i, (_, campo, ativam) in enumerate(restricoes):
+            if por_campo[campo] in ativam:
+                mascara |= 1 << i
+        tabela_mascaras.append(mascara)
+
+    return MotorDeRegras(
+        campos, campos_pontuacao, tabela_pontuacao, tabela_perfis,
+        campos_restricoes, tuple(nome for nome, _, _ in restricoes), tuple(tabela_mascaras)
+    )
+
+def carregar_regras(caminho=CAMINHO_REGRAS, perfis_validos=None):
+    """Compila as regras do arquivo JSON (ROCKRUN_REGRAS) ou as padrão"""
+    regras = REGRAS_PADRAO
+    if caminho:
+        with open(caminho, encoding='utf-8') as arquivo:
+            regras = json.load(arquivo)
+    return compilar_regras(regras, perfis_validos)
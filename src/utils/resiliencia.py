@@ -0,0 +1,147 @@
+import random
+import threading
+import time
+
+# Cota de escrita do Google Sheets: 60 requisições por minuto por usuário
+CAPACIDADE_COTA = 60
+REPOSICAO_POR_SEGUNDO = CAPACIDADE_COTA / 60.0
+
+# Retentativas com backoff exponencial e jitter
+MAX_TENTATIVAS = 5
+ESPERA_BASE = 1.0
+ESPERA_MAXIMA = 32.0
+
+# Disjuntor: abre após N falhas seguidas e testa de novo depois de um tempo
+LIMITE_FALHAS = 5
+TEMPO_ABERTO = 60.0
+
+FECHADO = "fechado"
+ABERTO = "aberto"
+SEMIABERTO = "semiaberto"
+
+class DisjuntorAberto(Exception):
+    """Chamada recusada sem tocar na rede porque o disjuntor está aberto"""
+
+def erro_retentavel(e):
+    """Indica se vale a pena tentar de novo: 429, 5xx ou falha de rede (inclusive ao renovar o token)"""
+    import requests
+    from google.auth.exceptions import TransportError
+
+    if isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout, TransportError)):
+        return True
+    status = getattr(getattr(e, 'response', None), 'status_code', None)
+    return status == 429 or (status is not None and 500 <= status < 600)
+
+def espera_backoff(tentativa, base=ESPERA_BASE, maximo=ESPERA_MAXIMA):
+    """Espera da tentativa N (a partir de 0) com "full jitter": uniforme entre 0 e base * 2^N"""
+    return random.uniform(0, min(maximo, base * (2 ** tentativa)))
+
+class LimitadorDeTaxa:
+    """Balde de fichas: até `capacidade` chamadas em rajada, repostas a `por_segundo`"""
+
+    def __init__(self, capacidade=CAPACIDADE_COTA, por_segundo=REPOSICAO_POR_SEGUNDO):
+        self.capacidade = capacidade
+        self.por_segundo = por_segundo
+        self._fichas = float(capacidade)
+        self._ultima = time.monotonic()
+        self._trava = threading.Lock()
+
+    def _repor(self):
+        agora = time.monotonic()
+        self._fichas = min(self.capacidade, self._fichas + (agora - self._ultima) * self.por_segundo)
+        self._ultima = agora
+
+    def adquirir(self, timeout=None):
+        """Consome uma ficha, esperando a reposição se preciso; retorna False se estourar o timeout"""
+        prazo = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._trava:
+                self._repor()
+                if self._fichas >= 1:
+                    self._fichas -= 1
+                    return True
+                espera = (1 - self._fichas) / self.por_segundo
+            if prazo is not None and time.monotonic() + espera > prazo:
+                return False
+            time.sleep(espera)
+
+    def fichas_disponiveis(self):
+        with self._trava:
+            self._repor()
+            return int(self._fichas)
+
+class Disjuntor:
+    """Circuit breaker: fechado -> aberto após falhas seguidas -> semiaberto após TEMPO_ABERTO"""
+
+    def __init__(self, limite_falhas=LIMITE_FALHAS, tempo_aberto=TEMPO_ABERTO):
+        self.limite_falhas = limite_falhas
+        self.tempo_aberto = tempo_aberto
+        self._estado = FECHADO
+        self._falhas = 0
+        self._aberto_em = 0.0
+        self.ultimo_erro = None
+        self._trava = threading.Lock()
+
+    def _atualizar(self):
+        if self._estado == ABERTO and time.monotonic() - self._aberto_em >= self.tempo_aberto:
+            self._estado = SEMIABERTO
+
+    def permitir(self):
+        """Indica se uma chamada pode seguir para a rede"""
+        with self._trava:
+            self._atualizar()
+            return self._estado != ABERTO
+
+    def registrar_sucesso(self):
+        with self._trava:
+            self._estado = FECHADO
+            self._falhas = 0
+            self.ultimo_erro = None
+
+    def registrar_falha(self, erro=None):
+        with self._trava:
+            self._falhas += 1
+            self.ultimo_erro = erro
+            # Em semiaberto, uma falha já reabre
+            if self._estado == SEMIABERTO or self._falhas >= self.limite_falhas:
+                self._estado = ABERTO
+                self._aberto_em = time.monotonic()
+
+    def diagnostico(self):
+        """Estado atual para exibição: estado, falhas seguidas, segundos até testar de novo e último erro"""
+        with self._trava:
+            self._atualizar()
+            reabre_em = 0
+            if self._estado == ABERTO:
+                reabre_em = max(0, int(self.tempo_aberto - (time.monotonic() - self._aberto_em)))
+            return {
+                "estado": self._estado,
+                "falhas": self._falhas,
+                "reabre_em": reabre_em,
+                "ultimo_erro": self.ultimo_erro,
+            }
+
+def executar_com_retentativas(funcao, disjuntor, max_tentativas=MAX_TENTATIVAS):
+    """Executa `funcao(tentativa)` respeitando o disjuntor.
+
+    Erros retentáveis são repetidos com backoff exponencial com jitter;
+    os demais sobem imediatamente, sem contar sucesso nem falha. Levanta
+    DisjuntorAberto sem chamar a função se o circuito estiver aberto. Uma
+    tentativa pode fazer várias requisições: quem chama a API consome uma
+    ficha do LimitadorDeTaxa por requisição.
+    """
+    for tentativa in range(max_tentativas):
+        if not disjuntor.permitir():
+            raise DisjuntorAberto("Circuito do Google Sheets aberto após falhas seguidas")
+        try:
+            resultado = funcao(tentativa)
+        except Exception as e:
+            if not erro_retentavel(e):
+                raise
+            disjuntor.registrar_falha(str(e))
+            if tentativa == max_tentativas - 1:
+                raise
+            time.sleep(espera_backoff(tentativa))
+        else:
+            disjuntor.registrar_sucesso()
+            return resultado
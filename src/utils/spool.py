@@ -0,0 +1,145 @@
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+import uuid
+
+# Diário local das submissões (pode ser trocado por variável de ambiente)
+CAMINHO_SPOOL = os.environ.get('ROCKRUN_SPOOL', 'rockrun_spool.db')
+
+def _nome_coluna(cabecalho):
+    """Converte um cabeçalho da planilha em nome de coluna SQL ("Condicao_Fisica" -> "condicao_fisica")"""
+    sem_acentos = unicodedata.normalize('NFKD', cabecalho).encode('ascii', 'ignore').decode()
+    return re.sub(r'\W', '_', sem_acentos).lower()
+
+def nova_submissao_id():
+    """Gera um identificador único para uma submissão"""
+    return uuid.uuid4().hex
+
+class Spool:
+    """Diário local só de inclusão (SQLite em modo WAL) das linhas enviadas à planilha.
+
+    Cada linha recebe um `seq` crescente e um `submissao_id` único. Os
+    consumidores (ex.: o replicador do Google Sheets) guardam até onde já
+    leram na tabela `cursores`, então o envio pode ser retomado após uma
+    queda ou reinício do processo sem perder nem repetir linhas.
+    """
+
+    def __init__(self, colunas, caminho=CAMINHO_SPOOL):
+        self.colunas = list(colunas)
+        self._nomes = [_nome_coluna(c) for c in self.colunas]
+        self._trava = threading.Lock()
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False, isolation_level=None)
+        with self._trava:
+            # WAL + synchronous=NORMAL: cada inserção é um append no log, sem fsync por commit
+            self._conexao.execute("PRAGMA journal_mode=WAL")
+            self._conexao.execute("PRAGMA synchronous=NORMAL")
+            colunas_sql = ", ".join(f"{nome} TEXT" for nome in self._nomes)
+            self._conexao.execute(
+                "CREATE TABLE IF NOT EXISTS submissoes ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "submissao_id TEXT NOT NULL UNIQUE, "
+                f"{colunas_sql})"
+            )
+            # Diário de antes de uma coluna nova: as linhas antigas ficam com ela vazia
+            existentes = {linha[1] for linha in self._conexao.execute("PRAGMA table_info(submissoes)")}
+            for nome in self._nomes:
+                if nome not in existentes:
+                    try:
+                        self._conexao.execute(f"ALTER TABLE submissoes ADD COLUMN {nome} TEXT NOT NULL DEFAULT ''")
+                    except sqlite3.OperationalError as e:
+                        # Outro processo acrescentou a mesma coluna ao mesmo tempo
+                        if "duplicate column" not in str(e):
+                            raise
+            self._conexao.execute(
+                "CREATE TABLE IF NOT EXISTS cursores ("
+                "nome TEXT PRIMARY KEY, "
+                "seq INTEGER NOT NULL DEFAULT 0, "
+                "incerto INTEGER NOT NULL DEFAULT 0)"
+            )
+
+    def registrar(self, linha, submissao_id=None):
+        """Grava uma linha no diário e retorna seu submissao_id (repetir o mesmo id não duplica)"""
+        submissao_id = submissao_id or nova_submissao_id()
+        marcadores = ", ".join("?" for _ in self._nomes)
+        with self._trava:
+            self._conexao.execute(
+                f"INSERT OR IGNORE INTO submissoes (submissao_id, {', '.join(self._nomes)}) "
+                f"VALUES (?, {marcadores})",
+                [submissao_id] + [str(valor) for valor in linha]
+            )
+        return submissao_id
+
+    def _cursor(self, nome):
+        linha = self._conexao.execute(
+            "SELECT seq, incerto FROM cursores WHERE nome = ?", (nome,)
+        ).fetchone()
+        return linha or (0, 0)
+
+    def pendentes(self, nome_cursor, limite):
+        """Retorna até `limite` linhas ainda não confirmadas pelo cursor: [(seq, submissao_id, linha)]"""
+        with self._trava:
+            seq, _ = self._cursor(nome_cursor)
+            registros = self._conexao.execute(
+                f"SELECT seq, submissao_id, {', '.join(self._nomes)} FROM submissoes "
+                "WHERE seq > ? ORDER BY seq LIMIT ?",
+                (seq, limite)
+            ).fetchall()
+        return [(r[0], r[1], list(r[2:])) for r in registros]
+
+    def contar_pendentes(self, nome_cursor):
+        """Quantidade de linhas além do cursor"""
+        with self._trava:
+            seq, _ = self._cursor(nome_cursor)
+            return self._conexao.execute(
+                "SELECT COUNT(*) FROM submissoes WHERE seq > ?", (seq,)
+            ).fetchone()[0]
+
+    def envio_incerto(self, nome_cursor):
+        """Indica se o último envio deste cursor terminou sem confirmação"""
+        with self._trava:
+            return bool(self._cursor(nome_cursor)[1])
+
+    def marcar_envio(self, nome_cursor):
+        """Marca que um lote está sendo enviado; fica marcado até avancar_cursor"""
+        with self._trava:
+            self._conexao.execute(
+                "INSERT INTO cursores (nome, incerto) VALUES (?, 1) "
+                "ON CONFLICT(nome) DO UPDATE SET incerto = 1",
+                (nome_cursor,)
+            )
+
+    def avancar_cursor(self, nome_cursor, seq):
+        """Confirma o envio de todas as linhas até `seq`"""
+        with self._trava:
+            self._conexao.execute(
+                "INSERT INTO cursores (nome, seq, incerto) VALUES (?, ?, 0) "
+                "ON CONFLICT(nome) DO UPDATE SET seq = MAX(seq, excluded.seq), incerto = 0",
+                (nome_cursor, seq)
+            )
+
+    def contar(self):
+        """Quantidade total de linhas no diário"""
+        with self._trava:
+            return self._conexao.execute("SELECT COUNT(*) FROM submissoes").fetchone()[0]
+
+    def iterar(self, tamanho_bloco=1000):
+        """Gera (submissao_id, linha) de todo o diário, em ordem, lendo em blocos"""
+        seq = 0
+        while True:
+            with self._trava:
+                registros = self._conexao.execute(
+                    f"SELECT seq, submissao_id, {', '.join(self._nomes)} FROM submissoes "
+                    "WHERE seq > ? ORDER BY seq LIMIT ?",
+                    (seq, tamanho_bloco)
+                ).fetchall()
+            if not registros:
+                return
+            for r in registros:
+                yield r[1], list(r[2:])
+            seq = registros[-1][0]
+
+    def fechar(self):
+        with self._trava:
+            self._conexao.close()
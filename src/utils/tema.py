@@ -0,0 +1,55 @@
+import functools
+import hashlib
+import json
+import os
+import re
+
+import streamlit as st
+
+# Folha de estilo do app (legível, com comentários); vai minificada para o navegador
+CAMINHO_TEMA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static', 'tema.css')
+
+# "1": reenvia o <style> em toda execução do script, como antes (comparação e navegadores sem JS)
+TEMA_INLINE = os.environ.get('ROCKRUN_TEMA_INLINE', '0') == '1'
+
+def minificar_css(css):
+    """Remove comentários e espaços dispensáveis"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{}:;,>])\s*', r'\1', css)
+    return css.replace(';}', '}').strip()
+
+@functools.lru_cache(maxsize=1)
+def carregar_tema(caminho=CAMINHO_TEMA):
+    """CSS minificado e o hash do conteúdo, lidos uma vez por processo"""
+    with open(caminho, encoding='utf-8') as arquivo:
+        css = minificar_css(arquivo.read())
+    return css, hashlib.sha256(css.encode('utf-8')).hexdigest()[:12]
+
+def _script_injecao(css, identificador):
+    """JS que põe o <style> no <head> da página (fora da árvore que o Streamlit redesenha)"""
+    conteudo = json.dumps(css).replace('</', '<\\/')
+    return f"""<script>
+const doc = window.parent.document;
+if (!doc.getElementById("{identificador}")) {{
+    doc.querySelectorAll('style[id^="rockrun-tema-"]').forEach(function (antigo) {{ antigo.remove(); }});
+    const estilo = doc.createElement("style");
+    estilo.id = "{identificador}";
+    estilo.textContent = {conteudo};
+    doc.head.appendChild(estilo);
+}}
+</script>"""
+
+def aplicar_tema():
+    """Aplica o tema na página; só a primeira execução de cada sessão (ou outra versão do CSS) envia o conteúdo"""
+    css, versao = carregar_tema()
+    if TEMA_INLINE:
+        st.markdown(f"<style>{css}</style>", unsafe_allow_html=True)
+        return
+    if st.session_state.get('tema_aplicado') == versao:
+        return
+    # O <style> fica no <head> da página e sobrevive às próximas execuções,
+    # que não reenviam nada; o id com o hash evita duplicar ou manter versões antigas
+    import streamlit.components.v1 as components
+    components.html(_script_injecao(css, f"rockrun-tema-{versao}"), height=0)
+    st.session_state.tema_aplicado = versao
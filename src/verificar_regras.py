@@ -0,0 +1,61 @@
+"""Valida um arquivo de regras de classificação antes de publicá-lo
+
+Uso:
+    python src/verificar_regras.py --exportar regras.json   # ponto de partida: as regras padrão
+    python src/verificar_regras.py regras.json              # confere cobertura e mostra o resultado
+    ROCKRUN_REGRAS=regras.json streamlit run src/app.py     # usa as regras no app
+
+Sai com código 1 listando todos os problemas (opções sem pontos, faixas
+de perfil com buracos, restrições citando respostas que não existem...).
+"""
+import argparse
+import collections
+import itertools
+import json
+import os
+import sys
+
+# Adiciona o diretório src ao path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.regras import REGRAS_PADRAO, ErroDeRegras, carregar_regras
+from utils.training_logic import CLASSIFICACOES
+
+def main():
+    parser = argparse.ArgumentParser(description="Valida um arquivo de regras de classificação")
+    parser.add_argument("arquivo", nargs="?", help="JSON de regras (padrão: regras embutidas)")
+    parser.add_argument("--exportar", metavar="ARQUIVO", help="Grava as regras padrão neste JSON e sai")
+    args = parser.parse_args()
+
+    if args.exportar:
+        with open(args.exportar, 'w', encoding='utf-8') as arquivo:
+            json.dump(REGRAS_PADRAO, arquivo, ensure_ascii=False, indent=2)
+            arquivo.write("\n")
+        print(f"Regras padrão gravadas em {args.exportar}")
+        return
+
+    try:
+        motor = carregar_regras(args.arquivo, perfis_validos=CLASSIFICACOES)
+    except ErroDeRegras as e:
+        print(e)
+        sys.exit(1)
+
+    print(f"Tabela de perfis: {len(motor.tabela_perfis)} combinações de {', '.join(motor.campos_pontuacao)}")
+    print(f"Tabela de restrições: {len(motor.tabela_mascaras)} combinações de {', '.join(motor.campos_restricoes)}")
+
+    # Perfis resultantes de todas as combinações de respostas do formulário
+    respostas_possiveis = [
+        [(campo, opcao) for opcao in motor.campos[campo]["opcoes"]]
+        for campo in motor.campos_pontuacao
+    ]
+    perfis = collections.Counter(
+        motor.classificar(dict(combinacao)) for combinacao in itertools.product(*respostas_possiveis)
+    )
+    total = sum(perfis.values())
+    print(f"Perfis nas {total} combinações de respostas do formulário:")
+    for perfil in CLASSIFICACOES:
+        print(f"  {perfil:20} {perfis[perfil]:5} ({perfis[perfil] / total:.0%})")
+    print("Restrições, na ordem do plano: " + ", ".join(motor.nomes_restricoes))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""A classificação em lote (utils.classificacao_lote) dá o mesmo resultado da escalar, linha a linha"""
+import os
+import random
+import sys
+
+import pandas as pd
+import pytest
+
+# Adiciona o diretório src ao path
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(BASE_DIR, 'src'))
+
+from utils.classificacao_lote import (
+    mascara_restricoes_lote,
+    classificar_lote,
+    restricoes_da_mascara
+)
+from utils.questionario import OPCOES
+from utils.training_logic import calcular_classificacao, identificar_restricoes
+
+CASOS = 5000
+
+# Opções do formulário (utils.questionario)
+DOMINIOS = {
+    campo: list(OPCOES[campo])
+    for campo in ('inatividade', 'caminhada', 'saude', 'medicamentos', 'liberacao_medica', 'lesoes')
+}
+
+def gerar_texto(aleatorio, dominio):
+    """Quase sempre uma opção do formulário; às vezes vazio, lixo ou variação de caixa/espaços"""
+    sorteio = aleatorio.random()
+    if sorteio < 0.85:
+        return aleatorio.choice(dominio)
+    if sorteio < 0.90:
+        return ""
+    if sorteio < 0.95:
+        opcao = aleatorio.choice(dominio)
+        return aleatorio.choice([opcao.upper(), opcao + " ", " " + opcao, opcao[:-1]])
+    return "".join(aleatorio.choice("abcãé -/0123") for _ in range(aleatorio.randint(1, 12)))
+
+def gerar_condicao(aleatorio):
+    """Quase sempre 1-5; às vezes fora da escala ou fracionária"""
+    sorteio = aleatorio.random()
+    if sorteio < 0.85:
+        return aleatorio.randint(1, 5)
+    if sorteio < 0.95:
+        return aleatorio.randint(-2, 8)
+    return aleatorio.choice([2.5, 3.0, 3.5, 4.0, 4.5, 0.5])
+
+def gerar_respostas(aleatorio):
+    respostas = {coluna: gerar_texto(aleatorio, dominio) for coluna, dominio in DOMINIOS.items()}
+    respostas['condicao_fisica'] = gerar_condicao(aleatorio)
+    return respostas
+
+@pytest.mark.parametrize("semente", [0, 1, 2])
+@pytest.mark.parametrize("categorico", [False, True], ids=["texto", "categorico"])
+def test_lote_igual_escalar(semente, categorico):
+    aleatorio = random.Random(semente)
+    linhas = [gerar_respostas(aleatorio) for _ in range(CASOS)]
+    df = pd.DataFrame(linhas)
+    if categorico:
+        # Vazios viram NaN para exercitar o código -1 das categorias
+        df = df.replace("", None).astype({coluna: 'category' for coluna in DOMINIOS})
+        linhas = [{chave: (None if valor == "" else valor) for chave, valor in respostas.items()} for respostas in linhas]
+
+    perfis = classificar_lote(df)
+    mascaras = mascara_restricoes_lote(df)
+    divergencias = []
+    for i, respostas in enumerate(linhas):
+        esperado = (calcular_classificacao(respostas), identificar_restricoes(respostas))
+        obtido = (perfis.iloc[i], restricoes_da_mascara(mascaras[i]))
+        if esperado != obtido:
+            divergencias.append((respostas, esperado, obtido))
+    assert not divergencias, f"{len(divergencias)} de {CASOS} divergem; primeira: {divergencias[0]}"
@@ -0,0 +1,186 @@
+"""O motor de regras (utils.regras) dá o mesmo resultado do cálculo original com if/elif"""
+import copy
+import itertools
+import math
+import os
+import sys
+
+import pytest
+
+# Adiciona o diretório src ao path
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(BASE_DIR, 'src'))
+
+from utils.questionario import ESCALA, OPCOES
+from utils.regras import REGRAS_PADRAO, ErroDeRegras, compilar_regras
+from utils.training_logic import CLASSIFICACOES, calcular_classificacao, identificar_restricoes
+
+# Cálculo original, antes do motor de regras: a referência do teste
+def classificacao_original(respostas):
+    score_condicao = 0
+    score_experiencia = 0
+
+    if respostas['condicao_fisica'] >= 4:
+        score_condicao = 3
+    elif respostas['condicao_fisica'] == 3:
+        score_condicao = 2
+    else:
+        score_condicao = 1
+
+    if respostas['inatividade'] == "Pratico atualmente (pelo menos 2x por semana)":
+        score_experiencia = 3
+    elif respostas['inatividade'] == "Parei há menos de 6 meses":
+        score_experiencia = 2
+    else:
+        score_experiencia = 1
+
+    if respostas['caminhada'] == "Mais de 45 minutos":
+        score_condicao += 1
+    elif respostas['caminhada'] == "Menos de 10 minutos":
+        score_condicao -= 1
+
+    score_total = score_condicao + score_experiencia
+
+    if score_total <= 3:
+        return "SEDENTÁRIO"
+    elif score_total <= 5:
+        return "INICIANTE"
+    else:
+        return "INICIANTE ATIVO"
+
+def restricoes_original(respostas):
+    restricoes = []
+
+    if respostas['saude'] != "Não tenho nenhuma condição":
+        restricoes.append("ATENÇÃO MÉDICA OBRIGATÓRIA")
+
+    if respostas['medicamentos'] == "Sim, e pode afetar exercícios":
+        restricoes.append("MONITORAMENTO ESPECIAL NECESSÁRIO")
+
+    if respostas['liberacao_medica'] == "Pretendo consultar um médico antes":
+        restricoes.append("AGUARDAR LIBERAÇÃO MÉDICA")
+
+    if respostas['lesoes'] != "Não tenho dores ou lesões":
+        restricoes.append("ATENÇÃO ESPECIAL ÀS ARTICULAÇÕES")
+
+    return restricoes
+
+# Respostas fora das opções do formulário (planilha antiga, regras próprias, dado corrompido)
+FORA_DO_FORMULARIO = ["", None, "Outra resposta"]
+
+# Condição física fora da escala: frações, negativos, acima do máximo, NaN e infinitos
+CONDICOES_FORA = [-2, 0, 0.5, 2.5, 2.999, 3.0, 3.5, 3.999, 4.0, 4.5, 6, 10,
+                  math.nan, math.inf, -math.inf]
+
+def valores(campo):
+    return list(OPCOES[campo]) + FORA_DO_FORMULARIO
+
+def test_classificacao_todas_as_combinacoes():
+    condicoes = list(range(ESCALA[0], ESCALA[1] + 1)) + CONDICOES_FORA
+    divergencias = []
+    for condicao, inatividade, caminhada in itertools.product(
+        condicoes, valores('inatividade'), valores('caminhada')
+    ):
+        respostas = {'condicao_fisica': condicao, 'inatividade': inatividade, 'caminhada': caminhada}
+        esperado, obtido = classificacao_original(respostas), calcular_classificacao(respostas)
+        if esperado != obtido:
+            divergencias.append((respostas, esperado, obtido))
+    assert not divergencias, f"{len(divergencias)} divergem; primeira: {divergencias[0]}"
+
+def test_restricoes_todas_as_combinacoes():
+    campos = ('saude', 'medicamentos', 'liberacao_medica', 'lesoes')
+    divergencias = []
+    for combinacao in itertools.product(*(valores(campo) for campo in campos)):
+        respostas = dict(zip(campos, combinacao))
+        esperado, obtido = restricoes_original(respostas), identificar_restricoes(respostas)
+        if esperado != obtido:
+            divergencias.append((respostas, esperado, obtido))
+    assert not divergencias, f"{len(divergencias)} divergem; primeira: {divergencias[0]}"
+
+@pytest.mark.parametrize("condicao", ["4", None])
+def test_condicao_nao_numerica_levanta_como_o_original(condicao):
+    respostas = {'condicao_fisica': condicao, 'inatividade': "", 'caminhada': ""}
+    with pytest.raises(TypeError):
+        classificacao_original(respostas)
+    with pytest.raises(TypeError):
+        calcular_classificacao(respostas)
+
+def test_regras_padrao_compilam():
+    compilar_regras(REGRAS_PADRAO, CLASSIFICACOES)
+
+def alterar(alteracao):
+    """Cópia das regras padrão com `alteracao(regras)` aplicada"""
+    regras = copy.deepcopy(REGRAS_PADRAO)
+    alteracao(regras)
+    return regras
+
+def _sem_faixa_final(regras):
+    regras["perfis"][-1]["ate"] = 6
+
+def _faixas_fora_de_ordem(regras):
+    regras["perfis"][1]["ate"] = 2
+
+def _faixa_sem_limite_no_meio(regras):
+    del regras["perfis"][0]["ate"]
+
+def _perfil_sem_programa(regras):
+    regras["perfis"][0]["perfil"] = "ATLETA"
+
+def _sem_outros(regras):
+    del regras["pontuacao"]["inatividade"]["outros"]
+
+def _opcao_sem_pontos(regras):
+    del regras["pontuacao"]["caminhada"]["pontos"]["Mais de 45 minutos"]
+
+def _pontos_de_opcao_inexistente(regras):
+    regras["pontuacao"]["caminhada"]["pontos"]["Mais de 2 horas"] = 2
+
+def _pontuacao_de_campo_desconhecido(regras):
+    regras["pontuacao"]["altura"] = {"pontos": {}, "outros": 0}
+
+def _opcao_fora_do_formulario(regras):
+    regras["campos"]["lesoes"]["opcoes"].append("Cotovelo")
+
+def _restricao_de_opcao_inexistente(regras):
+    regras["restricoes"][1]["se"] = ["Sim, sempre"]
+
+def _restricao_com_se_e_exceto(regras):
+    regras["restricoes"][0]["se"] = ["Diabetes"]
+
+def _restricao_repetida(regras):
+    regras["restricoes"].append(dict(regras["restricoes"][0]))
+
+def _numerica_sem_fora(regras):
+    del regras["campos"]["condicao_fisica"]["fora"]
+
+def _numerica_fora_sem_resto(regras):
+    regras["campos"]["condicao_fisica"]["fora"] = [{"a_partir_de": 4, "equivale": 4}]
+
+def _numerica_fora_para_opcao_inexistente(regras):
+    regras["campos"]["condicao_fisica"]["fora"] = [{"a_partir_de": 4, "equivale": 9}, {"equivale": 1}]
+
+# Alteração das regras padrão e o trecho esperado num dos problemas de ErroDeRegras
+REGRAS_INVALIDAS = [
+    (_sem_faixa_final, "pontuações sem faixa de perfil: 7"),
+    (_faixas_fora_de_ordem, "fora de ordem"),
+    (_faixa_sem_limite_no_meio, "sem \"ate\" antes da última"),
+    (_perfil_sem_programa, "sem programa de treino"),
+    (_sem_outros, "sem \"outros\""),
+    (_opcao_sem_pontos, "sem pontos para: Mais de 45 minutos"),
+    (_pontos_de_opcao_inexistente, "opção inexistente 'Mais de 2 horas'"),
+    (_pontuacao_de_campo_desconhecido, "campo desconhecido 'altura'"),
+    (_opcao_fora_do_formulario, "que o formulário não oferece: Cotovelo"),
+    (_restricao_de_opcao_inexistente, "opções inexistentes em 'medicamentos'"),
+    (_restricao_com_se_e_exceto, "exatamente um entre"),
+    (_restricao_repetida, "repetida"),
+    (_numerica_sem_fora, "precisa de \"fora\""),
+    (_numerica_fora_sem_resto, "precisa de \"fora\""),
+    (_numerica_fora_para_opcao_inexistente, "opção inexistente '9'"),
+]
+
+@pytest.mark.parametrize("alteracao, trecho", REGRAS_INVALIDAS,
+                         ids=[alteracao.__name__.strip("_") for alteracao, _ in REGRAS_INVALIDAS])
+def test_regras_invalidas(alteracao, trecho):
+    with pytest.raises(ErroDeRegras) as erro:
+        compilar_regras(alterar(alteracao), CLASSIFICACOES)
+    assert any(trecho in problema for problema in erro.value.problemas), erro.value.problemas
@@ -0,0 +1,257 @@
+"""O spool local e o escritor em segundo plano não perdem nem repetem submissões a caminho da planilha"""
+import json
+import os
+import sys
+import threading
+
+import pytest
+import requests
+from gspread.exceptions import APIError
+
+# Adiciona o diretório src ao path
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(BASE_DIR, 'src'))
+
+from utils import gsheets, resiliencia
+from utils.armazenamento import CABECALHOS, CABECALHOS_GRAVADOS, POSICAO_ID
+from utils.escritor import EscritorEmSegundoPlano
+from utils.resiliencia import LIMITE_FALHAS, Disjuntor, LimitadorDeTaxa
+from utils.spool import Spool
+
+CURSOR = "teste"
+JANELA = 0.05
+
+def linha(nome):
+    return [nome] + [f"{cabecalho} de {nome}" for cabecalho in CABECALHOS[1:]]
+
+@pytest.fixture
+def caminho_spool(tmp_path, monkeypatch):
+    """Diário num diretório temporário, também via ROCKRUN_SPOOL para quem lê a variável"""
+    caminho = str(tmp_path / "spool.db")
+    monkeypatch.setenv('ROCKRUN_SPOOL', caminho)
+    return caminho
+
+@pytest.fixture
+def spool(caminho_spool):
+    spool = Spool(CABECALHOS, caminho_spool)
+    yield spool
+    spool.fechar()
+
+class Destino:
+    """gravar_lote falso: registra as chamadas e falha as `falhas` primeiras"""
+
+    def __init__(self, falhas=0):
+        self.falhas = falhas
+        self.chamadas = []
+        self.gravadas = []
+        self._trava = threading.Lock()
+
+    def __call__(self, submissoes, verificar_duplicatas):
+        with self._trava:
+            self.chamadas.append(([sid for sid, _ in submissoes], verificar_duplicatas))
+            if self.falhas:
+                self.falhas -= 1
+                return False, "🚨 Erro API Google: indisponível"
+            self.gravadas.extend(submissoes)
+            return True, ""
+
+# Spool
+
+def test_mesmo_id_registrado_duas_vezes_grava_uma_linha(spool):
+    assert spool.registrar(linha("Ana"), "id-1") == "id-1"
+    assert spool.registrar(linha("Ana de novo"), "id-1") == "id-1"
+    assert spool.contar() == 1
+    assert [(sid, valores) for _, sid, valores in spool.pendentes(CURSOR, 10)] == [("id-1", linha("Ana"))]
+
+def test_cursor_avanca_so_ate_o_confirmado(spool):
+    for nome in ("Ana", "Bia", "Caio"):
+        spool.registrar(linha(nome), f"id-{nome}")
+    seq_bia = spool.pendentes(CURSOR, 2)[-1][0]
+
+    spool.avancar_cursor(CURSOR, seq_bia)
+    assert spool.contar_pendentes(CURSOR) == 1
+    assert [sid for _, sid, _ in spool.pendentes(CURSOR, 10)] == ["id-Caio"]
+
+    # Confirmação atrasada de um lote anterior não faz o cursor voltar
+    spool.avancar_cursor(CURSOR, seq_bia - 1)
+    assert spool.contar_pendentes(CURSOR) == 1
+    # Cada cursor anda sozinho
+    assert spool.contar_pendentes("outro") == 3
+
+def test_envio_incerto_ate_a_confirmacao(spool):
+    spool.registrar(linha("Ana"))
+    assert not spool.envio_incerto(CURSOR)
+    spool.marcar_envio(CURSOR)
+    assert spool.envio_incerto(CURSOR)
+    spool.avancar_cursor(CURSOR, spool.pendentes(CURSOR, 1)[0][0])
+    assert not spool.envio_incerto(CURSOR)
+
+def test_retoma_depois_de_reiniciar(caminho_spool):
+    spool = Spool(CABECALHOS, caminho_spool)
+    for nome in ("Ana", "Bia", "Caio"):
+        spool.registrar(linha(nome), f"id-{nome}")
+    spool.avancar_cursor(CURSOR, spool.pendentes(CURSOR, 1)[0][0])
+    spool.marcar_envio(CURSOR)  # Processo cai com um envio sem resposta
+    spool.fechar()
+
+    spool = Spool(CABECALHOS, caminho_spool)
+    try:
+        assert [sid for _, sid, _ in spool.pendentes(CURSOR, 10)] == ["id-Bia", "id-Caio"]
+        assert spool.envio_incerto(CURSOR)
+    finally:
+        spool.fechar()
+
+# Escritor
+
+def test_escritor_envia_e_avanca_o_cursor(spool):
+    destino = Destino()
+    escritor = EscritorEmSegundoPlano(spool, destino, CURSOR, janela=JANELA)
+    ids = [escritor.enfileirar(linha(nome)) for nome in ("Ana", "Bia")]
+
+    assert escritor.descarregar(timeout=5)
+    assert escritor.encerrar(timeout=5)
+    assert [sid for sid, _ in destino.gravadas] == ids
+    assert escritor.tamanho_fila() == 0
+    assert not spool.envio_incerto(CURSOR)
+
+def test_escritor_nao_reenvia_o_mesmo_id(spool):
+    destino = Destino()
+    escritor = EscritorEmSegundoPlano(spool, destino, CURSOR, janela=JANELA)
+    escritor.enfileirar(linha("Ana"), "id-1")
+    escritor.enfileirar(linha("Ana"), "id-1")
+
+    assert escritor.descarregar(timeout=5)
+    escritor.encerrar(timeout=5)
+    assert [sid for sid, _ in destino.gravadas] == ["id-1"]
+
+def test_falha_repete_o_lote_verificando_duplicatas(spool):
+    destino = Destino(falhas=2)
+    escritor = EscritorEmSegundoPlano(spool, destino, CURSOR, janela=JANELA)
+    sid = escritor.enfileirar(linha("Ana"))
+
+    assert escritor.descarregar(timeout=5)
+    escritor.encerrar(timeout=5)
+    # O primeiro envio não sabe de nada incerto; os seguintes pedem a verificação
+    assert destino.chamadas == [([sid], False), ([sid], True), ([sid], True)]
+    assert escritor.ultimo_erro is None
+
+def test_encerrar_deixa_o_pendente_para_o_proximo_processo(caminho_spool):
+    spool = Spool(CABECALHOS, caminho_spool)
+    fora_do_ar = Destino(falhas=10 ** 6)
+    escritor = EscritorEmSegundoPlano(spool, fora_do_ar, CURSOR, janela=JANELA)
+    sid = escritor.enfileirar(linha("Ana"))
+
+    assert not escritor.descarregar(timeout=0.3)
+    assert not escritor.encerrar(timeout=5)
+    assert escritor.tamanho_fila() == 1
+    assert escritor.ultimo_erro
+    spool.fechar()
+
+    # Reinício: o escritor novo acha a linha no diário e reenvia verificando duplicatas
+    spool = Spool(CABECALHOS, caminho_spool)
+    try:
+        destino = Destino()
+        escritor = EscritorEmSegundoPlano(spool, destino, CURSOR, janela=JANELA)
+        assert escritor.descarregar(timeout=5)
+        escritor.encerrar(timeout=5)
+        assert destino.chamadas == [([sid], True)]
+    finally:
+        spool.fechar()
+
+# anexar_submissoes com uma folha falsa
+
+def resposta(status):
+    """Resposta HTTP como a que o gspread recebe do Google"""
+    resposta = requests.Response()
+    resposta.status_code = status
+    resposta._content = json.dumps({"error": {"code": status, "message": f"HTTP {status}"}}).encode()
+    return resposta
+
+class FolhaFalsa:
+    """Worksheet do gspread em memória; `cair_apos` grava só essa quantidade no próximo append_rows e levanta 503"""
+
+    def __init__(self, cair_apos=None):
+        self.linhas = [list(CABECALHOS_GRAVADOS)]
+        self.cair_apos = cair_apos
+        self.chamadas = []
+
+    def row_values(self, numero):
+        self.chamadas.append("row_values")
+        return list(self.linhas[numero - 1]) if len(self.linhas) >= numero else []
+
+    def append_row(self, valores):
+        self.chamadas.append("append_row")
+        self.linhas.append(list(valores))
+
+    def col_values(self, coluna):
+        self.chamadas.append("col_values")
+        return [linha[coluna - 1] for linha in self.linhas]
+
+    def append_rows(self, valores):
+        self.chamadas.append("append_rows")
+        if self.cair_apos is not None:
+            self.linhas.extend(list(v) for v in valores[:self.cair_apos])
+            self.cair_apos = None
+            raise APIError(resposta(503))
+        self.linhas.extend(list(v) for v in valores)
+
+    def ids(self):
+        return [linha[POSICAO_ID] for linha in self.linhas[1:]]
+
+@pytest.fixture
+def sheets(caminho_spool, monkeypatch):
+    """Estado do utils.gsheets isolado: spool temporário, disjuntor novo e retentativas sem espera"""
+    monkeypatch.setattr(gsheets, "_disjuntor", Disjuntor())
+    monkeypatch.setattr(gsheets, "_limitador", LimitadorDeTaxa())
+    monkeypatch.setattr(gsheets, "_spool", Spool(CABECALHOS, caminho_spool))
+    monkeypatch.setattr(gsheets, "_escritor", None)
+    monkeypatch.setattr(gsheets, "CAMINHO_SPOOL", caminho_spool)
+    monkeypatch.setattr(resiliencia, "espera_backoff", lambda tentativa: 0)
+    gsheets.resetar_conexao()
+    yield gsheets
+    if gsheets._escritor is not None:
+        gsheets._escritor.encerrar(timeout=5)
+    gsheets._spool.fechar()
+    gsheets.resetar_conexao()
+
+def test_503_depois_de_anexar_parte_nao_duplica(sheets, monkeypatch):
+    folha = FolhaFalsa(cair_apos=1)
+    monkeypatch.setattr(sheets, "_abrir_folha", lambda: folha)
+    submissoes = [(f"id-{nome}", linha(nome)) for nome in ("Ana", "Bia", "Caio")]
+
+    assert sheets.anexar_submissoes(submissoes) == (True, "")
+    assert folha.ids() == ["id-Ana", "id-Bia", "id-Caio"]
+    # A retentativa confere a coluna de ids antes de anexar o restante
+    assert folha.chamadas == ["row_values", "append_rows", "col_values", "append_rows"]
+
+def test_escritor_com_planilha_mesmo_id_duas_vezes(sheets, monkeypatch):
+    folha = FolhaFalsa(cair_apos=0)
+    monkeypatch.setattr(sheets, "_abrir_folha", lambda: folha)
+    escritor = sheets.obter_escritor()
+    escritor.enfileirar(linha("Ana"), "id-1")
+    escritor.enfileirar(linha("Ana"), "id-1")
+
+    assert sheets.descarregar_fila(timeout=5)
+    assert folha.ids() == ["id-1"]
+    assert sheets.tamanho_fila() == 0
+
+def test_falhas_ao_conectar_abrem_o_disjuntor(sheets, monkeypatch):
+    tentativas = []
+
+    def conectar():
+        tentativas.append(1)
+        raise requests.exceptions.ConnectionError("sem rede")
+
+    monkeypatch.setattr(sheets, "_conectar", conectar)
+    for _ in range(LIMITE_FALHAS):
+        sucesso, erro = sheets.anexar_submissoes([("id-1", linha("Ana"))])
+        assert not sucesso and "sem rede" in erro
+        if sheets._disjuntor.diagnostico()["estado"] == resiliencia.ABERTO:
+            break
+    assert len(tentativas) == LIMITE_FALHAS
+    assert sheets._disjuntor.diagnostico()["estado"] == resiliencia.ABERTO
+
+    # Com o circuito aberto a próxima chamada falha rápido, sem tocar na rede
+    sucesso, erro = sheets.anexar_submissoes([("id-1", linha("Ana"))])
+    assert not sucesso and "aberto" in erro
+    assert len(tentativas) == LIMITE_FALHAS